@@ -7,9 +7,21 @@ from api.app_factory import create_app
 
 app = create_app()
 
+def run_production():
+    """Serve the app with the pre-forking gunicorn runner (see gunicorn.conf.py)"""
+    from gunicorn.app.wsgiapp import run
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+    sys.argv = ['gunicorn', '-c', config_path, 'api.wsgi:app']
+    run()
+
 if __name__ == '__main__':
-    # Get host and port from environment variables or use defaults
-    host = os.environ.get('HOST', '0.0.0.0')
-    port = int(os.environ.get('PORT', 5000))
-    
-    app.run(host=host, port=port, debug=True)
\ No newline at end of file
+    # The Flask development server (reloader + debugger) is only used when asked for explicitly
+    development = '--dev' in sys.argv or os.environ.get('APP_ENV') == 'development'
+    if development:
+        # Get host and port from environment variables or use defaults
+        host = os.environ.get('HOST', '0.0.0.0')
+        port = int(os.environ.get('PORT', 5000))
+        
+        app.run(host=host, port=port, debug=True)
+    else:
+        run_production()
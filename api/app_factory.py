@@ -1,22 +1,50 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-import os
+from sqlalchemy import event
+from api.config import Config, engine_options, is_sqlite, sqlite_pragmas
 
 # Initialize extensions
 db = SQLAlchemy()
 
-def create_app():
-    """Application factory function"""
+def _apply_sqlite_pragmas(engine, pragmas):
+    """Run the SQLite connection pragmas on every new pooled connection"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def create_app(config=None):
+    """
+    Application factory function
+
+    ``config`` may be a mapping or an object/class whose upper-case attributes
+    override the environment-driven defaults in ``api.config.Config``.
+    """
     app = Flask(__name__)
     
     # Configuration
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'devkey')
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///shopping.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
+    # Faster JSON encoding when orjson is installed
+    from api.utils.json_provider import OrjsonProvider, orjson
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
     
     # Initialize extensions
     db.init_app(app)
+    if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            _apply_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
     
     # Enable CORS for React frontend
     CORS(app)
@@ -27,13 +55,21 @@ def create_app():
     from api.routes.options import options_bp
     from api.routes.dashboard import dashboard_bp
     from api.routes.export import export_bp
+    from api.routes.imports import imports_bp
     from api.routes.health import health_bp
+    from api.routes.jobs import jobs_bp
+    from api.routes.batch import batch_bp
+    from api.routes.search import search_bp
     
     app.register_blueprint(categories_bp)
     app.register_blueprint(items_bp)
     app.register_blueprint(options_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(export_bp)
+    app.register_blueprint(imports_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(search_bp)
     
     return app
\ No newline at end of file
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark and regression check for the URL parsers
+Serves the saved pages in fixtures/pages from a local HTTP server and runs
+each through the static tier (raw HTML + structured data) and its store's
+browser parser in lean and full navigation mode. Reports per parser and tier
+the share of expected fields (fixtures/pages/expected.json) extracted, p50/p95
+latency and peak Python memory; --output saves the report as JSON and
+--baseline fails on accuracy or latency regressions against a saved report
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.utils.scraper_bench import TIERS, compare, load_corpus, run_benchmark
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=PAGES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=PAGES_DIR, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(report):
+    print(f"{'parser':<10} {'tier':<13} {'accuracy':>8} {'p50':>10} {'p95':>10} {'peak':>10} {'errors':>6}")
+    for parser, tiers in sorted(report['parsers'].items()):
+        for tier, stats in tiers.items():
+            print(f"{parser:<10} {tier:<13} {stats['accuracy']:>8.0%} {stats['p50_ms']:>7.1f} ms "
+                  f"{stats['p95_ms']:>7.1f} ms {stats['peak_kib']:>6.0f} KiB {stats['errors']:>6}")
+    for case in report['cases']:
+        if case['missed'] or case['error']:
+            print(f"  {case['page']} [{case['tier']}]: missed {case['missed']} {case['error'] or ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tiers', default=','.join(TIERS),
+                        help=f"comma-separated tiers to run (default: {','.join(TIERS)})")
+    parser.add_argument('--repeat', type=int, default=5, help='parses per page and tier')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report to compare against; exits 1 on regressions')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='allowed p95 slowdown against the baseline, as a fraction')
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+            with app.app_context():
+                try:
+                    report = run_benchmark(f'http://127.0.0.1:{server.server_port}', load_corpus(PAGES_DIR),
+                                           tiers=args.tiers.split(','), repeat=args.repeat, version=git_version())
+                finally:
+                    pool = app.extensions.get('browser_pool')
+                    if pool is not None:
+                        pool.close()
+    finally:
+        server.shutdown()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, latency_tolerance=args.latency_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the response serializers
+Compares the previous ORM-hydration + hand-built dicts + stdlib json path with
+column tuples + compiled shapes + orjson, for 10k items and 100k options
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from api.app_factory import create_app
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.json_provider import orjson
+from api.utils.serializers import ITEM_SHAPE, OPTION_SHAPE
+
+ITEM_COUNT = 10_000
+OPTION_COUNT = 100_000
+
+def seed():
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    db.session.execute(insert(Item), [
+        {'id': i, 'name': f'item {i}', 'room': 'آشپزخانه', 'notes': 'یادداشت', 'budget': 1000.0 + i,
+         'created_at': start + timedelta(minutes=i)}
+        for i in range(1, ITEM_COUNT + 1)
+    ])
+    db.session.execute(insert(Option), [
+        {'item_id': rng.randint(1, ITEM_COUNT), 'brand': 'Brand', 'model_name': f'model {i}',
+         'price': rng.uniform(1, 1e6), 'store': 'Digikala', 'link': f'https://example.com/{i}',
+         'features': 'a, b, c', 'rating': 7.5, 'warranty_months': 18, 'available': True,
+         'notes': None, 'selected': False, 'last_checked': date(2024, 5, 1)}
+        for i in range(OPTION_COUNT)
+    ])
+    db.session.commit()
+
+def legacy_items():
+    return [
+        {
+            'id': item.id,
+            'name': item.name,
+            'room': item.room,
+            'notes': item.notes,
+            'budget': item.budget,
+            'created_at': item.created_at.isoformat() if item.created_at else None,
+            'category_id': item.category_id,
+            'subcategory_id': item.subcategory_id
+        }
+        for item in Item.query.all()
+    ]
+
+def legacy_options():
+    return [
+        {
+            'id': opt.id,
+            'brand': opt.brand,
+            'model_name': opt.model_name,
+            'price': opt.price,
+            'store': opt.store,
+            'link': opt.link,
+            'features': opt.features,
+            'rating': opt.rating,
+            'warranty_months': opt.warranty_months,
+            'available': opt.available,
+            'notes': opt.notes,
+            'selected': opt.selected,
+            'last_checked': opt.last_checked.isoformat() if opt.last_checked else None
+        }
+        for opt in Option.query.all()
+    ]
+
+def shaped(shape):
+    return shape.many(db.session.execute(select(*shape.columns)))
+
+def measure(label, build, encode, count, repeat=3):
+    best_build = best_encode = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        data = build()
+        built = time.perf_counter()
+        encode(data)
+        encoded = time.perf_counter()
+        best_build = min(best_build, built - started)
+        best_encode = min(best_encode, encoded - built)
+    total = best_build + best_encode
+    print(f"  {label:<10} build {best_build * 1000:8.1f} ms  encode {best_encode * 1000:7.1f} ms  "
+          f"-> {count / total:>10,.0f} rows/s")
+    return total
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            db.create_all()
+            seed()
+            stdlib = lambda data: json.dumps(data)
+            fast = orjson.dumps if orjson is not None else stdlib
+            if orjson is None:
+                print("orjson is not installed; the 'after' numbers use the stdlib encoder")
+
+            for label, count, legacy, shape in (
+                ('items', ITEM_COUNT, legacy_items, ITEM_SHAPE),
+                ('options', OPTION_COUNT, legacy_options, OPTION_SHAPE),
+            ):
+                print(f"{count:,} {label}:")
+                before = measure('before', legacy, stdlib, count)
+                after = measure('after', lambda: shaped(shape), fast, count)
+                print(f"  speedup    {before / after:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Application configuration
+
+Every setting can be overridden through an environment variable of the same
+name, or by passing a mapping/object to ``create_app``.
+"""
+
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_ttls(name, default):
+    """Parse "domain=seconds,domain=seconds" into a dict"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    pairs = (item.split('=', 1) for item in value.split(',') if item.strip())
+    return {domain.strip().lower(): int(seconds) for domain, seconds in pairs}
+
+
+def _env_list(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'devkey')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database profile
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI', 'sqlite:///shopping.db')
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 10)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 20)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)  # seconds; -1 disables
+    DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+
+    # Applied to every new SQLite connection
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = _env_int('SQLITE_BUSY_TIMEOUT_MS', 15000)
+    SQLITE_CACHE_SIZE_KB = _env_int('SQLITE_CACHE_SIZE_KB', 64 * 1024)
+    SQLITE_MMAP_SIZE = _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+
+    EXPORT_BATCH = _env_int('EXPORT_BATCH', 1000)  # rows fetched and written per export chunk
+    IMPORT_BATCH = _env_int('IMPORT_BATCH', 2000)  # rows per executemany INSERT batch
+    IMPORT_MAX_ERRORS = _env_int('IMPORT_MAX_ERRORS', 100)  # row errors listed in an import report
+    SEARCH_LIMIT = _env_int('SEARCH_LIMIT', 20)  # default /api/search results
+    SEARCH_MAX_LIMIT = _env_int('SEARCH_MAX_LIMIT', 100)
+    AUTOCOMPLETE_LIMIT = _env_int('AUTOCOMPLETE_LIMIT', 8)  # default /api/autocomplete suggestions
+    AUTOCOMPLETE_MAX_LIMIT = _env_int('AUTOCOMPLETE_MAX_LIMIT', 50)
+    AUTOCOMPLETE_RECHECK_SECONDS = _env_int('AUTOCOMPLETE_RECHECK_SECONDS', 5)  # how stale other processes' writes may be
+    AUTOCOMPLETE_WARM = _env_bool('AUTOCOMPLETE_WARM', True)  # build the index when a worker starts
+
+    # Headless browser pool used by the URL parser (per worker process)
+    BROWSER_POOL_SIZE = _env_int('BROWSER_POOL_SIZE', 2)  # concurrent pages
+    BROWSER_MAX_PAGES = _env_int('BROWSER_MAX_PAGES', 100)  # relaunch a browser after this many pages
+    BROWSER_POOL_WARM = _env_bool('BROWSER_POOL_WARM', True)  # launch browsers when the server starts
+    PARSE_TIMEOUT = _env_int('PARSE_TIMEOUT', 60)  # seconds to wait for a slot and the parse
+
+    # Lean navigation: block unneeded resources, wait for the parser's selectors, hard phase budgets
+    BROWSER_LEAN_MODE = _env_bool('BROWSER_LEAN_MODE', True)  # false = domcontentloaded + networkidle
+    BROWSER_NAVIGATE_TIMEOUT_MS = _env_int('BROWSER_NAVIGATE_TIMEOUT_MS', 10000)
+    BROWSER_WAIT_TIMEOUT_MS = _env_int('BROWSER_WAIT_TIMEOUT_MS', 5000)  # all selector waits together
+    BROWSER_SELECTOR_TIMEOUT_MS = _env_int('BROWSER_SELECTOR_TIMEOUT_MS', 2000)  # each text read
+    BROWSER_ALLOWED_DOMAINS = _env_list('BROWSER_ALLOWED_DOMAINS', [])  # third-party hosts let through besides the built-in CDNs
+    BROWSER_BLOCKED_DOMAINS = _env_list('BROWSER_BLOCKED_DOMAINS', [])  # blocked even on the page's own site
+
+    # Static tier: raw HTML + structured data before rendering in a browser
+    STATIC_TIER_ENABLED = _env_bool('STATIC_TIER_ENABLED', True)
+    STATIC_FETCH_WORKERS = _env_int('STATIC_FETCH_WORKERS', 8)
+    STATIC_FETCH_TIMEOUT = _env_int('STATIC_FETCH_TIMEOUT', 10)  # seconds
+    STATIC_MAX_BYTES = _env_int('STATIC_MAX_BYTES', 3 * 1024 * 1024)
+
+    # Parse result cache: fresh for the domain TTL, then served stale while refreshing
+    PARSE_CACHE_TTL = _env_int('PARSE_CACHE_TTL', 6 * 3600)
+    PARSE_CACHE_DOMAIN_TTLS = _env_ttls('PARSE_CACHE_DOMAIN_TTLS', {
+        'digikala.com': 3600,
+        'torob.com': 1800,
+    })
+    PARSE_CACHE_STALE = _env_int('PARSE_CACHE_STALE', 24 * 3600)
+
+    # Raw page archive: fetched HTML kept compressed on disk for offline re-extraction
+    PAGE_ARCHIVE_ENABLED = _env_bool('PAGE_ARCHIVE_ENABLED', False)
+    PAGE_ARCHIVE_DIR = os.environ.get('PAGE_ARCHIVE_DIR', '')  # default: <instance folder>/page_archive
+    REEXTRACT_PROCESSES = _env_int('REEXTRACT_PROCESSES', 2)
+    REEXTRACT_BATCH = _env_int('REEXTRACT_BATCH', 200)  # options per UPDATE batch
+
+    # Background job queue and worker processes (python worker.py)
+    JOB_MAX_ATTEMPTS = _env_int('JOB_MAX_ATTEMPTS', 3)
+    JOB_RETRY_BASE_SECONDS = _env_int('JOB_RETRY_BASE_SECONDS', 30)  # doubled after every failed attempt
+    JOB_RETRY_MAX_SECONDS = _env_int('JOB_RETRY_MAX_SECONDS', 3600)
+    JOB_LEASE_SECONDS = _env_int('JOB_LEASE_SECONDS', 300)  # renewed while a job runs; reclaimed once it lapses
+    WORKER_PROCESSES = _env_int('WORKER_PROCESSES', 2)
+    WORKER_POLL_SECONDS = _env_int('WORKER_POLL_SECONDS', 1)
+    WORKER_BROWSER_POOL_SIZE = _env_int('WORKER_BROWSER_POOL_SIZE', 1)  # each worker runs one job at a time
+
+    # Scheduled price refresh (refresh jobs, scheduled by the workers)
+    PRICE_REFRESH_INTERVAL = _env_int('PRICE_REFRESH_INTERVAL', 3600)  # seconds between runs; 0 disables
+    PRICE_REFRESH_MAX_AGE_DAYS = _env_int('PRICE_REFRESH_MAX_AGE_DAYS', 1)  # refresh options checked this long ago
+    PRICE_REFRESH_BATCH = _env_int('PRICE_REFRESH_BATCH', 100)  # options per tick
+    PRICE_REFRESH_CONCURRENCY = _env_int('PRICE_REFRESH_CONCURRENCY', 4)
+    PRICE_REFRESH_PER_DOMAIN = _env_int('PRICE_REFRESH_PER_DOMAIN', 1)
+    PRICE_REFRESH_DOMAIN_INTERVAL = _env_int('PRICE_REFRESH_DOMAIN_INTERVAL', 2)  # seconds between parses per store
+    PRICE_REFRESH_TICK_TIMEOUT = _env_int('PRICE_REFRESH_TICK_TIMEOUT', 600)
+
+    # Price history series (GET /api/options/<id>/price-history, /api/items/<id>/price-history)
+    PRICE_HISTORY_DAYS = _env_int('PRICE_HISTORY_DAYS', 90)  # window when no range is given
+    PRICE_HISTORY_MAX_DAYS = _env_int('PRICE_HISTORY_MAX_DAYS', 730)
+
+    # Batch URL parsing (POST /api/options/parse-urls)
+    BATCH_PARSE_MAX_URLS = _env_int('BATCH_PARSE_MAX_URLS', 50)
+    BATCH_PARSE_CONCURRENCY = _env_int('BATCH_PARSE_CONCURRENCY', 4)  # parses in flight per request
+    BATCH_PARSE_PER_DOMAIN = _env_int('BATCH_PARSE_PER_DOMAIN', 2)  # parses in flight per host
+    BATCH_PARSE_TIMEOUT = _env_int('BATCH_PARSE_TIMEOUT', 300)  # seconds for the whole batch
+    BATCH_MAX_OPERATIONS = _env_int('BATCH_MAX_OPERATIONS', 200)  # operations accepted by one /api/batch request
+
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def is_sqlite_memory(uri):
+    return is_sqlite(uri) and (uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri)
+
+
+def engine_options(config):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the database profile settings"""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if is_sqlite_memory(uri):
+        # Flask-SQLAlchemy pins in-memory databases to a single static connection
+        return options
+    options.update(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    if is_sqlite(uri):
+        # Python-level wait for locks; busy_timeout below covers the C level
+        options['connect_args'] = {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+    return options
+
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA temp_store={config['SQLITE_TEMP_STORE']}",
+    ]
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'shopping.db'}",
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+FIXTURE_PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+
+
+@pytest.fixture
+def page_server():
+    """Local HTTP server for product pages: fixtures/pages/*.html plus any added to .pages"""
+    pages = {f'/{path.name}': path.read_text(encoding='utf-8') for path in FIXTURE_PAGES.glob('*.html')}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            self.send_response(200 if body else 404)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.end_headers()
+            self.wfile.write((body or 'not found').encode('utf-8'))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield SimpleNamespace(url=f'http://127.0.0.1:{server.server_port}', pages=pages)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def chromium():
+    """Skip browser-tier tests where Playwright's Chromium is not installed"""
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            installed = os.path.exists(p.chromium.executable_path)
+    except Exception:
+        installed = False
+    if not installed:
+        pytest.skip("Chromium is not installed for Playwright")
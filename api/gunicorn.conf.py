@@ -0,0 +1,63 @@
+"""
+Gunicorn settings for the production API server
+
+    gunicorn -c api/gunicorn.conf.py api.wsgi:app
+
+Every setting can be overridden through the environment.
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+
+# Pre-forking master with multi-threaded workers
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Build the app once in the master so forked workers start warm
+preload_app = True
+
+# Connection handling
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+
+def _dispose_engine(server):
+    from api.app_factory import db
+    app = server.app.wsgi()
+    with app.app_context():
+        # Never share pooled connections across processes
+        db.engine.dispose(close=False)
+
+
+def post_fork(server, worker):
+    _dispose_engine(server)
+
+
+def post_worker_init(worker):
+    # Browser threads cannot be inherited across fork, so each worker launches its own
+    from api.utils.autocomplete import warm_autocomplete
+    from api.utils.browser_pool import warm_browser_pool
+    warm_browser_pool(worker.wsgi)
+    warm_autocomplete(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    from api.app_factory import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
+    pool = app.extensions.get('browser_pool')
+    if pool is not None:
+        pool.close()
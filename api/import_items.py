@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Import items and options from a CSV or JSONL file in one transaction
+Nothing is written if any row is invalid; the errors are printed with
+their row numbers
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.utils.importers import IMPORT_FORMATS, import_rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help='CSV or JSONL file (- for stdin)')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                        help='input format (default: from the file extension)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='validate every row without writing anything')
+    parser.add_argument('--batch', type=int, default=None,
+                        help='rows per INSERT batch (default: IMPORT_BATCH)')
+    args = parser.parse_args()
+
+    fmt = args.format
+    if fmt is None:
+        extension = os.path.splitext(args.path)[1].lstrip('.').lower()
+        fmt = 'jsonl' if extension == 'ndjson' else extension
+    if fmt not in IMPORT_FORMATS:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        if args.path == '-':
+            report = import_rows(sys.stdin.buffer, fmt, dry_run=args.dry_run, batch_size=args.batch)
+        else:
+            with open(args.path, 'rb') as f:
+                report = import_rows(f, fmt, dry_run=args.dry_run, batch_size=args.batch)
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors']:
+            print(f"Row {error['row']}: {error['message']}")
+        if report['invalid_rows'] > len(report['errors']):
+            print(f"... and {report['invalid_rows'] - len(report['errors'])} more invalid rows")
+        verb = 'Imported' if report['imported'] else 'Would import' if not report['invalid_rows'] else 'Not imported:'
+        print(f"{verb} {report['items']} items and {report['options']} options "
+              f"from {report['rows']} rows in {elapsed:.1f}s")
+        return 1 if report['invalid_rows'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from api.app_factory import create_app
 from api.app_factory import db
 from api.models import Category, Subcategory
+from api.utils.migrations import migrate
+from api.utils.versioning import bump_taxonomy_version
 
 def init_database():
     """Initialize the database with proper setup"""
@@ -26,8 +28,8 @@ def init_database():
             os.makedirs(instance_path, mode=0o755)
             print(f"✅ Created instance directory: {instance_path}")
         
-        # Create database tables
-        db.create_all()
+        # Create database tables and apply pending schema migrations
+        migrate()
         print("✅ Database tables created")
         
         # Check if categories already exist
@@ -123,6 +125,7 @@ def init_database():
             for sub_name in general_subs:
                 db.session.add(Subcategory(name=sub_name, category_id=general.id))
             
+            bump_taxonomy_version()
             db.session.commit()
             print("✅ Categories and subcategories created successfully")
         
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Apply pending schema migrations to an existing database in place
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.utils.migrations import MIGRATIONS, migrate
+
+def main():
+    app = create_app()
+    with app.app_context():
+        applied = migrate()
+        if applied:
+            for version, description, _ in MIGRATIONS:
+                if version in applied:
+                    print(f"Applied migration {version}: {description}")
+        else:
+            print("Database schema is up to date")
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
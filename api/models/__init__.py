@@ -2,5 +2,12 @@ from .category import Category
 from .subcategory import Subcategory
 from .item import Item
 from .option import Option
+from .dashboard_summary import DashboardSummary
+from .data_version import DataVersion
+from .schema_migration import SchemaMigration
+from .parse_cache import ParseCache
+from .job import Job
+from .price_history import PriceHistory
+from .page_snapshot import PageSnapshot
 
-__all__ = ['Category', 'Subcategory', 'Item', 'Option']
\ No newline at end of file
+__all__ = ['Category', 'Subcategory', 'Item', 'Option', 'DashboardSummary', 'DataVersion', 'SchemaMigration', 'ParseCache', 'Job', 'PriceHistory', 'PageSnapshot']
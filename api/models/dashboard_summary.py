@@ -0,0 +1,21 @@
+from api.app_factory import db
+
+class DashboardSummary(db.Model):
+    """Pre-aggregated dashboard totals, one row overall and one per category"""
+    __tablename__ = 'dashboard_summary'
+    
+    TOTAL_KEY = 'total'
+    
+    key = db.Column(db.String(32), primary_key=True)  # 'total' or 'category:<id>' / 'category:none'
+    category_id = db.Column(db.Integer, nullable=True)
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    items_with_choice = db.Column(db.Integer, nullable=False, default=0)
+    total_selected_cost = db.Column(db.Float, nullable=False, default=0)
+    total_budget = db.Column(db.Float, nullable=False, default=0)
+    
+    @staticmethod
+    def category_key(category_id):
+        return f'category:{category_id if category_id is not None else "none"}'
+    
+    def __repr__(self):
+        return f'<DashboardSummary {self.key}>'
@@ -0,0 +1,11 @@
+from api.app_factory import db
+
+class DataVersion(db.Model):
+    """Monotonically increasing change counters used to build ETags"""
+    __tablename__ = 'data_version'
+    
+    scope = db.Column(db.String(64), primary_key=True)  # 'global', 'taxonomy' or 'item:<id>'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.scope}={self.version}>'
@@ -4,6 +4,15 @@ from datetime import datetime
 
 class Item(db.Model):
     __tablename__ = 'item'
+    __table_args__ = (
+        # Keyset pagination / filtering: each filter column is paired with id so
+        # "WHERE col = ? AND id > ? ORDER BY id" is a single index range scan
+        db.Index('ix_item_category_id_id', 'category_id', 'id'),
+        db.Index('ix_item_subcategory_id_id', 'subcategory_id', 'id'),
+        db.Index('ix_item_room_id', 'room', 'id'),
+        db.Index('ix_item_created_at_id', 'created_at', 'id'),
+        db.Index('ix_item_budget', 'budget'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
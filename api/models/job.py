@@ -0,0 +1,35 @@
+from api.app_factory import db
+from datetime import datetime
+
+class Job(db.Model):
+    """Durable background job (URL parse, price refresh) claimed by worker processes"""
+    __tablename__ = 'job'
+    __table_args__ = (
+        # Claim query: next due job by status and run_after
+        db.Index('ix_job_status_run_after', 'status', 'run_after', 'id'),
+        db.Index('ux_job_unique_key', 'unique_key', unique=True),
+    )
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    # Set for jobs that must be enqueued once, e.g. the next tick of a refresh run
+    unique_key = db.Column(db.String(200))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -3,6 +3,12 @@ from datetime import date
 
 class Option(db.Model):
     __tablename__ = 'option'
+    __table_args__ = (
+        # Options of one item ordered by price (item detail) and per-item counts
+        db.Index('ix_option_item_id_price', 'item_id', 'price'),
+        # "Is anything selected for this item" checks and the selection updates
+        db.Index('ix_option_item_id_selected', 'item_id', 'selected'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
@@ -24,4 +30,22 @@ class Option(db.Model):
         return " ".join([p for p in parts if p]).strip() or f"Option #{self.id}"
     
     def __repr__(self):
-        return f'<Option {self.model_name}>'
\ No newline at end of file
+        return f'<Option {self.model_name}>'
+
+# Partial index over the (few) selected options: dashboard selected-option
+# lookups, has_selection filters and the summary aggregates only touch these
+db.Index(
+    'ix_option_selected_item_id',
+    Option.item_id, Option.price,
+    sqlite_where=Option.selected == True,
+    postgresql_where=Option.selected == True
+)
+
+# At most one selected option per item, enforced by the database
+db.Index(
+    'ux_option_item_id_selected',
+    Option.item_id,
+    unique=True,
+    sqlite_where=Option.selected == True,
+    postgresql_where=Option.selected == True
+)
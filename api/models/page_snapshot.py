@@ -0,0 +1,25 @@
+from api.app_factory import db
+from datetime import datetime
+
+class PageSnapshot(db.Model):
+    """One archived fetch of a product page; the HTML itself is in the content-addressed page archive"""
+    __tablename__ = 'page_snapshot'
+    __table_args__ = (
+        # Latest snapshot per canonical URL
+        db.Index('ix_page_snapshot_url_key_fetched_at', 'url_key', 'fetched_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url_key = db.Column(db.String(400), nullable=False)  # canonical_url() of the page
+    url = db.Column(db.String(400), nullable=False)
+    domain = db.Column(db.String(200), nullable=False)
+    source = db.Column(db.String(20), nullable=False)  # 'static' (raw HTML) or 'browser' (rendered DOM)
+    sha256 = db.Column(db.String(64), nullable=False)  # archive key of the HTML
+    size = db.Column(db.Integer, nullable=False)  # uncompressed bytes
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # What the parse of this fetch read; tells its own history rows from later edits
+    price = db.Column(db.Float)
+    available = db.Column(db.Boolean)
+    
+    def __repr__(self):
+        return f'<PageSnapshot {self.url_key} {self.fetched_at}>'
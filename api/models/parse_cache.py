@@ -0,0 +1,16 @@
+from api.app_factory import db
+from datetime import datetime
+
+class ParseCache(db.Model):
+    """Last parse result per canonical product URL"""
+    __tablename__ = 'parse_cache'
+    
+    url_key = db.Column(db.String(400), primary_key=True)  # canonical_url() of the product link
+    domain = db.Column(db.String(200), nullable=False)
+    url = db.Column(db.String(400), nullable=False)  # link as last requested
+    data = db.Column(db.JSON, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ParseCache {self.url_key}>'
@@ -0,0 +1,19 @@
+from api.app_factory import db
+from datetime import datetime
+
+class PriceHistory(db.Model):
+    """Append-only log of option price/availability changes, one row per change"""
+    __tablename__ = 'price_history'
+    __table_args__ = (
+        # Series reads and "latest value" lookups: one option's changes in time order
+        db.Index('ix_price_history_option_id_recorded_at', 'option_id', 'recorded_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    option_id = db.Column(db.Integer, db.ForeignKey('option.id'), nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    price = db.Column(db.Float)
+    available = db.Column(db.Boolean)
+    
+    def __repr__(self):
+        return f'<PriceHistory {self.option_id} {self.recorded_at} {self.price}>'
@@ -0,0 +1,13 @@
+from api.app_factory import db
+from datetime import datetime
+
+class SchemaMigration(db.Model):
+    """Schema migrations that have been applied to this database"""
+    __tablename__ = 'schema_migration'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}>'
@@ -3,6 +3,9 @@ from sqlalchemy.orm import relationship
 
 class Subcategory(db.Model):
     __tablename__ = 'subcategory'
+    __table_args__ = (
+        db.Index('ix_subcategory_category_id_name', 'category_id', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Rebuild the full-text search index from the live item and option rows
+Run after writing to the database outside the app (sqlite shell, restores)
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.app_factory import db
+from api.utils.search import create_search_index, search_available
+
+def main():
+    app = create_app()
+    with app.app_context():
+        if not search_available():
+            print("Search needs a SQLite database")
+            return 1
+        db.create_all()
+        with db.engine.begin() as connection:
+            create_search_index(connection)
+        print("Search index rebuilt")
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
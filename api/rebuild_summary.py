@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Recompute the dashboard summary table from scratch
+Run with --check to only compare the stored summary against the live aggregates
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.app_factory import db
+from api.utils.summary import check_summary, rebuild_summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--check', action='store_true',
+                        help='compare the stored summary with live aggregates without rewriting it')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if not args.check:
+            rebuild_summary()
+            db.session.commit()
+            print("Dashboard summary rebuilt")
+
+        mismatches = check_summary()
+        if mismatches:
+            print(f"Found {len(mismatches)} mismatches:")
+            for key, field, stored, expected in mismatches:
+                print(f"  {key}.{field}: stored={stored} expected={expected}")
+            return 1
+        print("Dashboard summary matches live aggregates")
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
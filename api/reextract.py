@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Re-run the current parsers over the archived product pages
+Parses the newest archived snapshot of every option's link in a process pool
+and updates price and availability in batches, without any network access.
+Pages are archived while PAGE_ARCHIVE_ENABLED is on
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.utils.reextract import reextract
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--processes', type=int, default=None,
+                        help='parser processes; 0 parses in this process (default: REEXTRACT_PROCESSES)')
+    parser.add_argument('--batch', type=int, default=None,
+                        help='options per UPDATE batch (default: REEXTRACT_BATCH)')
+    parser.add_argument('--static-only', action='store_true',
+                        help='only run the structured-data extractor, never the browser parsers')
+    parser.add_argument('--domain', default=None,
+                        help='only re-extract pages whose host contains this, e.g. digikala.com')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        stats = reextract(processes=args.processes, batch_size=args.batch,
+                          render=not args.static_only, domain=args.domain)
+    print(f"Re-extracted {stats['snapshots']} pages for {stats['options']} options in {stats['elapsed_s']} s: "
+          f"{stats['items_changed']} items changed, {stats['outdated']} options newer than their page, "
+          f"{stats['failed']} pages failed")
+    return 1 if stats['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
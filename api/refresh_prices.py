@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Refresh the prices of options not checked for PRICE_REFRESH_MAX_AGE_DAYS
+By default queues a refresh run for the workers; with --inline, runs the
+ticks in this process and prints the throughput of each
+"""
+
+import argparse
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+from api.utils.price_refresh import refresh_tick, schedule_refresh
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--inline', action='store_true',
+                        help='run the refresh here instead of queueing it for the workers')
+    parser.add_argument('--after-id', type=int, default=0,
+                        help='resume an inline run after this option id')
+    parser.add_argument('--batch', type=int, default=None,
+                        help='options per tick (default: PRICE_REFRESH_BATCH)')
+    parser.add_argument('--max-ticks', type=int, default=None,
+                        help='stop an inline run after this many ticks')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not args.inline:
+            job_id = schedule_refresh()
+            if job_id is None:
+                print("A price refresh is already queued or running")
+                return 1
+            print(f"Queued price refresh job {job_id}")
+            return 0
+
+        after_id = args.after_id
+        ticks = 0
+        while after_id is not None and (args.max_ticks is None or ticks < args.max_ticks):
+            stats = refresh_tick(after_id=after_id, limit=args.batch)
+            ticks += 1
+            print(f"Options after {after_id}: {stats['refreshed']}/{stats['checked']} refreshed, "
+                  f"{stats['failed']} failed, {stats['items_changed']} items changed, "
+                  f"{stats['per_minute']} options/min")
+            after_id = stats['next_after_id']
+        if after_id is not None:
+            print(f"Stopped; resume with --after-id {after_id}")
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+from flask import Blueprint, current_app, jsonify, request
+from api.app_factory import db
+from api.utils.mutations import MutationError, apply_batch
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api')
+
+@batch_bp.route('/batch', methods=['POST'])
+def batch():
+    """
+    Apply several item/option writes in order, all in one transaction
+    
+    Expected JSON input:
+    {
+        "operations": [
+            {"op": "create", "type": "item", "ref": "kettle", "data": {"name": "Kettle"}},
+            {"op": "create", "type": "option", "ref": "bosch", "data": {"item_id": "$kettle", "price": 2450000}},
+            {"op": "select", "type": "option", "id": "$bosch"},
+            {"op": "delete", "type": "option", "id": 17}
+        ]
+    }
+    
+    op/type: create|update|delete on item or option, select|unselect on option.
+    "$ref" stands for the id created by an earlier operation with that "ref".
+    Either every operation is applied, or (on the first failure) none is.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"message": "فهرست عملیات الزامی است.", "success": False}), 400
+    if len(operations) > current_app.config['BATCH_MAX_OPERATIONS']:
+        return jsonify({
+            "message": f"حداکثر {current_app.config['BATCH_MAX_OPERATIONS']} عملیات در هر درخواست مجاز است.",
+            "success": False
+        }), 400
+    try:
+        results = apply_batch(operations)
+        db.session.commit()
+        return jsonify({"message": "همه عملیات انجام شد.", "success": True, "results": results}), 200
+    except MutationError as e:
+        db.session.rollback()
+        return jsonify({
+            "message": f"عملیات {e.index} انجام نشد و هیچ تغییری ذخیره نشد: {str(e)}",
+            "success": False,
+            "failed_index": e.index
+        }), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"خطا در اجرای عملیات: {str(e)}", "success": False}), 500
@@ -1,13 +1,16 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from api.app_factory import db
 from api.models import Category, Subcategory
+from api.utils.migrations import migrate
+from api.utils.taxonomy import get_taxonomy
+from api.utils.versioning import GLOBAL_SCOPE, TAXONOMY_SCOPE, bump_taxonomy_version, conditional_get
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/api')
 
 @categories_bp.route('/init-db', methods=['POST'])
 def init_db():
     try:
-        db.create_all()
+        migrate()
         # Seed categories and subcategories
         if not Category.query.first():
             # آشپزخانه
@@ -97,6 +100,7 @@ def init_db():
             for sub_name in general_subs:
                 db.session.add(Subcategory(name=sub_name, category_id=general.id))
             
+            bump_taxonomy_version()
             db.session.commit()
             return jsonify({"message": "دیتابیس با موفقیت راه‌اندازی شد.", "success": True}), 200
         else:
@@ -105,6 +109,7 @@ def init_db():
         return jsonify({"message": f"خطا در راه‌اندازی دیتابیس: {str(e)}", "success": False}), 500
 
 @categories_bp.route('/categories')
+@conditional_get(lambda: [TAXONOMY_SCOPE])
 def get_categories():
     try:
         categories = Category.query.all()
@@ -121,9 +126,23 @@ def get_categories():
         return jsonify({"message": f"خطا در دریافت دسته‌بندی‌ها: {str(e)}", "success": False}), 500
 
 @categories_bp.route('/subcategories/<int:category_id>')
+@conditional_get(lambda category_id: [TAXONOMY_SCOPE])
 def get_subcategories(category_id):
     try:
         subcategories = Subcategory.query.filter_by(category_id=category_id).order_by(Subcategory.name).all()
         return jsonify({'subcategories': [{'id': sub.id, 'name': sub.name} for sub in subcategories]}), 200
     except Exception as e:
-        return jsonify({"message": f"خطا در دریافت زیردسته‌ها: {str(e)}", "success": False}), 500
\ No newline at end of file
+        return jsonify({"message": f"خطا در دریافت زیردسته‌ها: {str(e)}", "success": False}), 500
+
+@categories_bp.route('/taxonomy')
+@conditional_get(lambda: [TAXONOMY_SCOPE, GLOBAL_SCOPE])
+def get_taxonomy_tree():
+    """
+    Categories, subcategories and per-node item counts from the in-process
+    snapshot. The counts change with every item write, so clients revalidate
+    (no-cache) and get a 304 while the ETag still matches.
+    """
+    try:
+        return Response(get_taxonomy(), mimetype='application/json'), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت دسته‌بندی‌ها: {str(e)}", "success": False}), 500
@@ -1,183 +1,154 @@
 from flask import Blueprint, jsonify, request
-from sqlalchemy import func
+from sqlalchemy import select
 from api.app_factory import db
 from api.models import Category, Subcategory, Item, Option
+from api.utils.serializers import ITEM_LIST_SHAPE, OPTION_SHAPE, RECENT_ITEM_SHAPE
+from api.utils.pagination import PaginationError, apply_item_filters, apply_keyset, finish_page
+from api.utils.summary import dashboard_totals
+from api.utils.taxonomy import get_index, resolve_filters
+from api.utils.versioning import GLOBAL_SCOPE, conditional_get
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api')
 
+UNCATEGORIZED = "سایر"
+
+
+DASHBOARD_ITEM_SHAPE = ITEM_LIST_SHAPE.extend(
+    ('category', Category.name, None),
+    ('subcategory', Subcategory.name, None),
+)
+# Trailing item_id lets selected options be grouped without being serialized
+SELECTED_OPTION_COLUMNS = OPTION_SHAPE.columns + (Option.item_id,)
+
+
+def _load_items(items_query, page_args=None):
+    """
+    Load the filtered item rows together with their category/subcategory
+    names, option counts and selected option using a fixed number of queries.
+
+    Returns a list of (item_row, selected_option_dict) tuples ordered by item
+    id, and the next-page cursor when ``page_args`` asks for keyset pagination.
+    """
+    rows_query = (
+        items_query
+        .outerjoin(Category, Item.category_id == Category.id)
+        .outerjoin(Subcategory, Item.subcategory_id == Subcategory.id)
+        .with_entities(*DASHBOARD_ITEM_SHAPE.columns)
+    )
+    next_cursor = None
+    if page_args is not None:
+        rows_query, limit, sort = apply_keyset(rows_query, page_args)
+        rows, next_cursor = finish_page(rows_query.all(), limit, sort)
+        item_ids = [row.id for row in rows]
+    else:
+        rows = rows_query.order_by(Item.id).all()
+        item_ids = items_query.with_entities(Item.id).scalar_subquery()
+    if not rows:
+        return [], next_cursor
+
+    # One query for every selected option of the loaded items; the first one
+    # (by id) wins, matching the previous per-item ``next(...)`` lookup.
+    selected_by_item = {}
+    selected_options = db.session.execute(
+        select(*SELECTED_OPTION_COLUMNS)
+        .where(Option.selected == True, Option.item_id.in_(item_ids))
+        .order_by(Option.id)
+    )
+    from_row = OPTION_SHAPE.from_row
+    for opt in selected_options:
+        if opt.item_id not in selected_by_item:
+            selected_by_item[opt.item_id] = from_row(opt)
+
+    return [(row, selected_by_item.get(row.id)) for row in rows], next_cursor
+
+
 @dashboard_bp.route('/dashboard')
+@conditional_get(lambda: [GLOBAL_SCOPE])
 def dashboard():
     try:
         # Get filter parameters - frontend sends category names as strings
         category_filter = request.args.get('category', '')
         subcategory_filter = request.args.get('subcategory', '')
-        
-        # Dashboard stats
-        total_items = Item.query.count()
-        items_with_choice = Item.query.join(Option).filter(Option.selected==True).distinct().count()
-        completion = int((items_with_choice / total_items) * 100) if total_items else 0
-
-        # Cost summaries
-        total_selected_cost = db.session.query(func.sum(Option.price)).filter(Option.selected==True).scalar() or 0
-        total_budget = db.session.query(func.sum(Item.budget)).scalar() or 0
-
-        # List items grouped by category with filtering
-        categories = Category.query.order_by(Category.name).all()
-        
-        # Apply filters
+
+        # Dashboard stats and cost summaries, maintained incrementally by the write paths
+        totals = dashboard_totals()
+
+        # Category tree from the in-process taxonomy snapshot (ordered by name)
+        taxonomy = get_index()
+        categories = taxonomy.categories
+
+        # Apply filters, resolving names to ids without touching the database
+        category_id, subcategory_ids = resolve_filters(
+            category_filter if category_filter != 'all' else None,
+            subcategory_filter if subcategory_filter != 'all' else None,
+            index=taxonomy
+        )
         items_query = Item.query
-        if category_filter and category_filter != 'all':
-            category_obj = Category.query.filter(Category.name == category_filter).first()
-            if category_obj:
-                items_query = items_query.filter(Item.category_id == category_obj.id)
-        if subcategory_filter and subcategory_filter != 'all':
-            subcategory_obj = Subcategory.query.filter(Subcategory.name == subcategory_filter).first()
-            if subcategory_obj:
-                items_query = items_query.filter(Item.subcategory_id == subcategory_obj.id)
-        
-        # Get all items for display (not just by category)
-        all_items = items_query.all()
-        items_data = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'room': item.room,
-                'notes': item.notes,
-                'budget': item.budget,
-                'created_at': item.created_at.isoformat() if item.created_at else None,
-                'category_id': item.category_id,
-                'subcategory_id': item.subcategory_id,
-                'options_count': len(item.options),
-                'selected_option': next(({
-                    'id': opt.id,
-                    'brand': opt.brand,
-                    'model_name': opt.model_name,
-                    'price': opt.price,
-                    'store': opt.store,
-                    'link': opt.link,
-                    'features': opt.features,
-                    'rating': opt.rating,
-                    'warranty_months': opt.warranty_months,
-                    'available': opt.available,
-                    'notes': opt.notes,
-                    'selected': opt.selected,
-                    'last_checked': opt.last_checked.isoformat() if opt.last_checked else None
-                } for opt in item.options if opt.selected), None),
-                'category': item.category.name if item.category else None,
-                'subcategory': item.subcategory.name if item.subcategory else None
-            }
-            for item in all_items
-        ]
-        
-        # Group items by category for the items_by_category structure
+        if category_id is not None:
+            items_query = items_query.filter(Item.category_id == category_id)
+        if subcategory_ids:
+            items_query = items_query.filter(Item.subcategory_id.in_(subcategory_ids))
+        items_query = apply_item_filters(items_query, request.args)
+
+        # Single pass over the filtered items; everything below is built in memory.
+        # Passing ``limit`` or ``cursor`` switches the item lists to keyset pages.
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        loaded_items, next_cursor = _load_items(items_query, request.args if paginate else None)
+        items_data = []
+        grouped = {cat_id: [] for cat_id, _, _ in categories}
+        uncategorized = []
+        for row, selected_option in loaded_items:
+            item_data = DASHBOARD_ITEM_SHAPE.from_row(row)
+            item_data['selected_option'] = selected_option
+            items_data.append(item_data)
+            data = ITEM_LIST_SHAPE.from_row(row)
+            data['selected_option'] = selected_option
+
+            # An item belongs to its category and also to the category whose
+            # name matches its room
+            member_of = set()
+            if row.category_id in grouped:
+                member_of.add(row.category_id)
+            room_category_id = taxonomy.category_ids.get(row.room)
+            if room_category_id is not None:
+                member_of.add(room_category_id)
+            for member_id in member_of:
+                grouped[member_id].append(data)
+
+            # Items that don't have a category but have a room go to "سایر"
+            if row.category_id is None and row.room is not None:
+                uncategorized.append(data)
+
         items_by_category = {}
-        for category in categories:
-            # Get items by category_id first
-            category_items = items_query.filter(Item.category_id == category.id).all()
-            
-            # Also get items by room name if it matches the category name
-            room_items = items_query.filter(Item.room == category.name).all()
-            
-            # Combine both sets of items, avoiding duplicates
-            all_category_items = list(set(category_items + room_items))
-            
-            if all_category_items:
-                items_by_category[category.name] = [
-                    {
-                        'id': item.id,
-                        'name': item.name,
-                        'room': item.room,
-                        'notes': item.notes,
-                        'budget': item.budget,
-                        'created_at': item.created_at.isoformat() if item.created_at else None,
-                        'category_id': item.category_id,
-                        'subcategory_id': item.subcategory_id,
-                        'options_count': len(item.options),
-                        'selected_option': next(({
-                            'id': opt.id,
-                            'brand': opt.brand,
-                            'model_name': opt.model_name,
-                            'price': opt.price,
-                            'store': opt.store,
-                            'link': opt.link,
-                            'features': opt.features,
-                            'rating': opt.rating,
-                            'warranty_months': opt.warranty_months,
-                            'available': opt.available,
-                            'notes': opt.notes,
-                            'selected': opt.selected,
-                            'last_checked': opt.last_checked.isoformat() if opt.last_checked else None
-                        } for opt in item.options if opt.selected), None)
-                    }
-                    for item in all_category_items
-                ]
-        
-        # Add items that don't have a category but have a room to a "سایر" category
-        uncategorized_items = items_query.filter(
-            Item.category_id.is_(None),
-            Item.room.isnot(None)
-        ).all()
-        
-        if uncategorized_items:
-            items_by_category["سایر"] = [
-                {
-                    'id': item.id,
-                    'name': item.name,
-                    'room': item.room,
-                    'notes': item.notes,
-                    'budget': item.budget,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'category_id': item.category_id,
-                    'subcategory_id': item.subcategory_id,
-                    'options_count': len(item.options),
-                    'selected_option': next(({
-                            'id': opt.id,
-                            'brand': opt.brand,
-                            'model_name': opt.model_name,
-                            'price': opt.price,
-                            'store': opt.store,
-                            'link': opt.link,
-                            'features': opt.features,
-                            'rating': opt.rating,
-                            'warranty_months': opt.warranty_months,
-                            'available': opt.available,
-                            'notes': opt.notes,
-                            'selected': opt.selected,
-                            'last_checked': opt.last_checked.isoformat() if opt.last_checked else None
-                        } for opt in item.options if opt.selected), None)
-                }
-                for item in uncategorized_items
-            ]
-        
+        for cat_id, name, _ in categories:
+            if grouped[cat_id]:
+                items_by_category[name] = grouped[cat_id]
+        if uncategorized:
+            items_by_category[UNCATEGORIZED] = uncategorized
+
         # Build subcategories structure
-        subcategories = {}
-        for category in categories:
-            subcategories[category.name] = [sub.name for sub in category.subcategories]
-        
-        recent_items = Item.query.order_by(Item.created_at.desc()).limit(10).all()
-        recent_items_data = [
-            {
-                'id': item.id,
-                'name': item.name,
-                'room': item.room,
-                'created_at': item.created_at.isoformat() if item.created_at else None
-            }
-            for item in recent_items
-        ]
-        
-        return jsonify({
-            'total_items': total_items,
-            'items_with_choice': items_with_choice,
-            'completion': completion,
-            'total_selected_cost': total_selected_cost,
-            'total_budget': total_budget,
-            'categories': [{'id': cat.id, 'name': cat.name} for cat in categories],
+        subcategories = {name: [sub_name for _, sub_name in subs] for _, name, subs in categories}
+
+        recent_items_data = RECENT_ITEM_SHAPE.many(db.session.execute(
+            select(*RECENT_ITEM_SHAPE.columns)
+            .order_by(Item.created_at.desc())
+            .limit(10)
+        ))
+
+        response = {
+            **totals,
+            'categories': [{'id': cat_id, 'name': name} for cat_id, name, _ in categories],
             'subcategories': subcategories,
             'items': items_data,
             'items_by_category': items_by_category,
             'recent_items': recent_items_data,
             'current_category': category_filter,
             'current_subcategory': subcategory_filter
-        }), 200
+        }
+        if paginate:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
+    except PaginationError as e:
+        return jsonify({"message": f"پارامتر نامعتبر: {str(e)}", "success": False}), 400
     except Exception as e:
-        return jsonify({"message": f"خطا در دریافت اطلاعات: {str(e)}", "success": False}), 500
\ No newline at end of file
+        return jsonify({"message": f"خطا در دریافت اطلاعات: {str(e)}", "success": False}), 500
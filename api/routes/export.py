@@ -1,20 +1,25 @@
-from flask import Blueprint, Response, jsonify
-from api.models import Option
+from flask import Blueprint, Response, jsonify, stream_with_context
+from api.utils.exporters import EXPORT_FORMATS, EXPORT_SCOPES, open_export
 
 export_bp = Blueprint('export', __name__, url_prefix='/api')
 
-@export_bp.route('/export/selected.csv')
-def export_selected():
+@export_bp.route('/export/<scope>.<fmt>')
+def export_data(scope, fmt):
+    """
+    Stream an export without loading it into memory
+    
+    scope: "selected" (the selected option of each item) or "catalogue"
+           (every item with all its options)
+    fmt:   "csv", "ndjson" or "xlsx"
+    """
+    if scope not in EXPORT_SCOPES or fmt not in EXPORT_FORMATS:
+        return jsonify({"message": "نوع یا قالب خروجی نامعتبر است.", "success": False}), 404
     try:
-        rows = Option.query.filter_by(selected=True).all()
-        def gen():
-            yield "Item,Brand,Model,Price,Store,Link,Rating,Notes\n"
-            for r in rows:
-                def s(x):
-                    return (str(x or "")).replace('"', '""')
-                line = f'"{s(r.item.name)}","{s(r.brand)}","{s(r.model_name)}","{s(r.price)}","{s(r.store)}","{s(r.link)}","{s(r.rating)}","{s(r.notes)}"\n'
-                yield line
-        return Response(gen(), mimetype='text/csv',
-                        headers={"Content-Disposition": "attachment;filename=selected_options.csv"})
+        # The query runs here so database errors are still reported as JSON
+        batches = open_export(scope)
+        writer, mimetype = EXPORT_FORMATS[fmt]
+        export = EXPORT_SCOPES[scope]
+        return Response(stream_with_context(writer(batches, export.columns)), mimetype=mimetype,
+                        headers={"Content-Disposition": f"attachment;filename={export.filename}.{fmt}"})
     except Exception as e:
-        return jsonify({"message": f"خطا در صادرات: {str(e)}", "success": False}), 500
\ No newline at end of file
+        return jsonify({"message": f"خطا در صادرات: {str(e)}", "success": False}), 500
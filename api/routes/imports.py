@@ -0,0 +1,51 @@
+import os
+from flask import Blueprint, jsonify, request
+from api.utils.importers import IMPORT_FORMATS, import_rows
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/api')
+
+_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json-lines': 'jsonl',
+}
+
+
+def _import_format(upload):
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt.lower()
+    if upload is not None and upload.filename:
+        extension = os.path.splitext(upload.filename)[1].lstrip('.').lower()
+        return 'jsonl' if extension == 'ndjson' else extension
+    return _CONTENT_TYPES.get(request.mimetype)
+
+
+@imports_bp.route('/import', methods=['POST'])
+def bulk_import():
+    """
+    Import items and options from CSV or JSONL in one transaction
+
+    Send the file as multipart field "file" or as the raw request body.
+    The format comes from ?format=csv|jsonl, the file extension or the
+    Content-Type. With ?dry_run=1 the rows are only validated.
+    """
+    upload = request.files.get('file')
+    fmt = _import_format(upload)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"message": "قالب فایل باید csv یا jsonl باشد.", "success": False}), 400
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        report = import_rows(upload.stream if upload is not None else request.stream, fmt, dry_run=dry_run)
+    except ValueError as e:
+        return jsonify({"message": f"خطا در خواندن فایل: {str(e)}", "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": f"خطا در وارد کردن داده‌ها: {str(e)}", "success": False}), 500
+
+    if report['invalid_rows']:
+        return jsonify({"message": "برخی ردیف‌ها نامعتبر هستند؛ هیچ داده‌ای وارد نشد.", "success": False,
+                        "report": report}), 400
+    if dry_run:
+        return jsonify({"message": "همه ردیف‌ها معتبر هستند.", "success": True, "report": report}), 200
+    return jsonify({"message": "داده‌ها وارد شدند.", "success": True, "report": report}), 201
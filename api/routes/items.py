@@ -1,137 +1,99 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, current_app, jsonify, request
+from sqlalchemy import select
 from api.app_factory import db
 from api.models import Item, Option, Category, Subcategory
+from api.utils.serializers import ITEM_LIST_SHAPE, ITEM_SHAPE, OPTION_SHAPE
+from api.utils import mutations
+from api.utils.price_history import daily_series, history_window
+from api.utils.pagination import PaginationError, apply_item_filters, apply_keyset, finish_page
+from api.utils.versioning import GLOBAL_SCOPE, TAXONOMY_SCOPE, bump_item_version, conditional_get, item_scope
 
 items_bp = Blueprint('items', __name__, url_prefix='/api')
 
 @items_bp.route('/items', methods=['GET', 'POST'])
+@conditional_get(lambda: [GLOBAL_SCOPE])
 def items():
     if request.method == 'GET':
         try:
-            items = Item.query.all()
-            items_data = [
-                {
-                    'id': item.id,
-                    'name': item.name,
-                    'room': item.room,
-                    'notes': item.notes,
-                    'budget': item.budget,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'category_id': item.category_id,
-                    'subcategory_id': item.subcategory_id,
-                    'options_count': len(item.options)
-                }
-                for item in items
-            ]
-            return jsonify(items_data), 200
+            items_query = Item.query.with_entities(*ITEM_LIST_SHAPE.columns)
+            items_query = apply_item_filters(items_query, request.args)
+            items_query, limit, sort = apply_keyset(items_query, request.args)
+            rows, next_cursor = finish_page(items_query.all(), limit, sort)
+            return jsonify({
+                'items': ITEM_LIST_SHAPE.many(rows),
+                'next_cursor': next_cursor,
+                'limit': limit,
+                'sort': sort
+            }), 200
+        except PaginationError as e:
+            return jsonify({"message": f"پارامتر نامعتبر: {str(e)}", "success": False}), 400
         except Exception as e:
             return jsonify({"message": f"خطا در دریافت آیتم‌ها: {str(e)}", "success": False}), 500
     
     elif request.method == 'POST':
         try:
             data = request.get_json()
-            name = data.get('name')
-            room = data.get('room')
-            notes = data.get('notes')
-            budget = data.get('budget')
-            category_id = data.get('category_id')
-            subcategory_id = data.get('subcategory_id')
-            
-            if not name:
+            if not data.get('name'):
                 return jsonify({"message": "نام وسیله الزامی است.", "success": False}), 400
 
-            item = Item(
-                name=name, 
-                room=room, 
-                notes=notes,
-                budget=float(budget) if budget else None,
-                category_id=int(category_id) if category_id else None,
-                subcategory_id=int(subcategory_id) if subcategory_id else None
-            )
-            db.session.add(item)
+            item = mutations.create_item(data)
+            bump_item_version(item.id)
             db.session.commit()
             
             return jsonify({
                 "message": "وسیله اضافه شد.",
                 "success": True,
-                "item": {
-                    'id': item.id,
-                    'name': item.name,
-                    'room': item.room,
-                    'notes': item.notes,
-                    'budget': item.budget,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'category_id': item.category_id,
-                    'subcategory_id': item.subcategory_id
-                }
+                "item": ITEM_SHAPE.from_object(item)
             }), 201
         except Exception as e:
             return jsonify({"message": f"خطا در اضافه کردن آیتم: {str(e)}", "success": False}), 500
 
+ITEM_DETAIL_SHAPE = ITEM_SHAPE.extend(
+    ('category', Category.name, None),
+    ('subcategory', Subcategory.name, None),
+)
+
+
+def _item_detail_response(item_id):
+    item_row = db.session.execute(
+        select(*ITEM_DETAIL_SHAPE.columns)
+        .outerjoin(Category, Item.category_id == Category.id)
+        .outerjoin(Subcategory, Item.subcategory_id == Subcategory.id)
+        .where(Item.id == item_id)
+    ).first()
+    if item_row is None:
+        abort(404)
+    try:
+        options_data = OPTION_SHAPE.many(db.session.execute(
+            select(*OPTION_SHAPE.columns)
+            .where(Option.item_id == item_id)
+            .order_by(Option.price.asc().nullslast())
+        ))
+        
+        # Determine item status based on whether any option is selected
+        item_data = ITEM_DETAIL_SHAPE.from_row(item_row)
+        item_data['status'] = 'selected' if any(opt['selected'] for opt in options_data) else 'not_selected'
+        
+        return jsonify({
+            'item': item_data,
+            'options': options_data
+        }), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت اطلاعات: {str(e)}", "success": False}), 500
+
 @items_bp.route('/items/<int:item_id>', methods=['GET', 'PUT', 'DELETE'])
+@conditional_get(lambda item_id: [item_scope(item_id), TAXONOMY_SCOPE])
 def item_detail(item_id):
-    item = Item.query.get_or_404(item_id)
-    
     if request.method == 'GET':
-        try:
-            options = Option.query.filter_by(item_id=item_id).order_by(Option.price.asc().nullslast()).all()
-            options_data = [
-                {
-                    'id': opt.id,
-                    'brand': opt.brand,
-                    'model_name': opt.model_name,
-                    'price': opt.price,
-                    'store': opt.store,
-                    'link': opt.link,
-                    'features': opt.features,
-                    'rating': opt.rating,
-                    'warranty_months': opt.warranty_months,
-                    'available': opt.available,
-                    'notes': opt.notes,
-                    'selected': opt.selected,
-                    'last_checked': opt.last_checked.isoformat() if opt.last_checked else None
-                }
-                for opt in options
-            ]
-            
-            # Determine item status based on whether any option is selected
-            item_status = 'selected' if any(opt['selected'] for opt in options_data) else 'not_selected'
-            
-            return jsonify({
-                'item': {
-                    'id': item.id,
-                    'name': item.name,
-                    'room': item.room,
-                    'notes': item.notes,
-                    'budget': item.budget,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'category_id': item.category_id,
-                    'subcategory_id': item.subcategory_id,
-                    'category': item.category.name if item.category else None,
-                    'subcategory': item.subcategory.name if item.subcategory else None,
-                    'status': item_status
-                },
-                'options': options_data
-            }), 200
-        except Exception as e:
-            return jsonify({"message": f"خطا در دریافت اطلاعات: {str(e)}", "success": False}), 500
+        return _item_detail_response(item_id)
     
-    elif request.method == 'PUT':
+    item = Item.query.get_or_404(item_id)
+    
+    if request.method == 'PUT':
         try:
             data = request.get_json()
-            if 'name' in data:
-                item.name = data['name']
-            if 'room' in data:
-                item.room = data['room']
-            if 'notes' in data:
-                item.notes = data['notes']
-            if 'budget' in data:
-                item.budget = float(data['budget']) if data['budget'] else None
-            if 'category_id' in data:
-                item.category_id = int(data['category_id']) if data['category_id'] else None
-            if 'subcategory_id' in data:
-                item.subcategory_id = int(data['subcategory_id']) if data['subcategory_id'] else None
-            
+            mutations.update_item(item, data)
+            bump_item_version(item.id)
             db.session.commit()
             return jsonify({"message": "آیتم با موفقیت به‌روزرسانی شد.", "success": True}), 200
         except Exception as e:
@@ -139,8 +101,29 @@ def item_detail(item_id):
     
     elif request.method == 'DELETE':
         try:
-            db.session.delete(item)
+            mutations.delete_item(item)
+            bump_item_version(item_id)
             db.session.commit()
             return jsonify({"message": "وسیله حذف شد.", "success": True}), 200
         except Exception as e:
-            return jsonify({"message": f"خطا در حذف آیتم: {str(e)}", "success": False}), 500
\ No newline at end of file
+            return jsonify({"message": f"خطا در حذف آیتم: {str(e)}", "success": False}), 500
+
+@items_bp.route('/items/<int:item_id>/price-history', methods=['GET'])
+def item_price_history(item_id):
+    """Daily min/max/last price series of every option of an item (?days=90 or ?since=&until=)"""
+    Item.query.get_or_404(item_id)
+    try:
+        since, until = history_window(request.args, current_app.config['PRICE_HISTORY_DAYS'],
+                                      current_app.config['PRICE_HISTORY_MAX_DAYS'])
+    except ValueError as e:
+        return jsonify({"message": f"بازه زمانی نامعتبر: {str(e)}", "success": False}), 400
+    try:
+        series = daily_series(select(Option.id).where(Option.item_id == item_id), since, until)
+        return jsonify({
+            "success": True,
+            "since": since.isoformat(),
+            "until": until.isoformat() if until else None,
+            "series": series
+        }), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت تاریخچه قیمت: {str(e)}", "success": False}), 500
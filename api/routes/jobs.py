@@ -0,0 +1,66 @@
+from flask import Blueprint, jsonify, request, url_for
+from api.app_factory import db
+from api.models import Job
+from api.utils.jobs import JobError, enqueue, serialize_job
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api')
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue background work and return its id immediately
+    
+    Expected JSON input:
+    {
+        "kind": "parse",
+        "payload": {"url": "https://example.com/product", "item_id": 1, "force_refresh": false}
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        kind = data.get('kind')
+        payload = data.get('payload') or {}
+        if not kind:
+            return jsonify({"message": "نوع کار الزامی است.", "success": False}), 400
+        if not isinstance(payload, dict):
+            return jsonify({"message": "داده‌های کار نامعتبر است.", "success": False}), 400
+        
+        job = enqueue(kind, payload)
+        db.session.commit()
+        
+        response = jsonify({
+            "message": "کار در صف قرار گرفت.",
+            "success": True,
+            "job": serialize_job(job),
+            "status_url": url_for('jobs.get_job', job_id=job.id)
+        })
+        response.headers['Location'] = url_for('jobs.get_job', job_id=job.id)
+        return response, 202
+    except JobError as e:
+        db.session.rollback()
+        return jsonify({"message": f"خطا در ایجاد کار: {str(e)}", "success": False}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"خطا در ایجاد کار: {str(e)}", "success": False}), 500
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    return jsonify({"success": True, "job": serialize_job(job)}), 200
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent jobs, newest first; filter with ?status=queued|running|done|failed and ?kind="""
+    try:
+        query = Job.query
+        if request.args.get('status'):
+            query = query.filter(Job.status == request.args['status'])
+        if request.args.get('kind'):
+            query = query.filter(Job.kind == request.args['kind'])
+        limit = min(int(request.args.get('limit', 50)), 500)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+        return jsonify({"success": True, "jobs": [serialize_job(job) for job in jobs]}), 200
+    except ValueError as e:
+        return jsonify({"message": f"ورودی نامعتبر: {str(e)}", "success": False}), 400
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت کارها: {str(e)}", "success": False}), 500
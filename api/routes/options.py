@@ -1,8 +1,12 @@
-from flask import Blueprint, jsonify, request
-from datetime import datetime
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy.exc import IntegrityError
 from api.app_factory import db
 from api.models import Option, Item
-from api.utils.helpers import ensure_one_selected
+from api.utils import mutations
+from api.utils.price_history import daily_series, history_window
+from api.utils.serializers import OPTION_SHAPE
+from api.utils.summary import dashboard_totals
+from api.utils.versioning import bump_item_version
 
 options_bp = Blueprint('options', __name__, url_prefix='/api')
 
@@ -17,65 +21,58 @@ def add_option():
         
         item = Item.query.get_or_404(item_id)
         
-        option = Option(
-            item_id=item_id,
-            brand=data.get('brand'),
-            model_name=data.get('model_name'),
-            price=float(data.get('price')) if data.get('price') else None,
-            store=data.get('store'),
-            link=data.get('link'),
-            features=data.get('features'),
-            rating=float(data.get('rating')) if data.get('rating') else None,
-            warranty_months=int(data.get('warranty_months')) if data.get('warranty_months') else None,
-            available=data.get('available', True),
-            notes=data.get('notes'),
-            last_checked=datetime.utcnow().date()
-        )
-        
-        db.session.add(option)
+        option = mutations.create_option(item, data)
+        bump_item_version(item.id)
         db.session.commit()
         
         return jsonify({
             "message": "مدل/گزینه اضافه شد.",
             "success": True,
-            "option": {
-                'id': option.id,
-                'brand': option.brand,
-                'model_name': option.model_name,
-                'price': option.price,
-                'store': option.store,
-                'link': option.link,
-                'features': option.features,
-                'rating': option.rating,
-                'warranty_months': option.warranty_months,
-                'available': option.available,
-                'notes': option.notes,
-                'selected': option.selected,
-                'last_checked': option.last_checked.isoformat() if option.last_checked else None
-            }
+            "option": OPTION_SHAPE.from_object(option)
         }), 201
     except Exception as e:
         return jsonify({"message": f"خطا در اضافه کردن گزینه: {str(e)}", "success": False}), 500
 
 @options_bp.route('/options/<int:option_id>/select', methods=['PUT'])
 def select_option(option_id):
+    """Make this option its item's only choice; returns the new selection and dashboard totals"""
     try:
         option = Option.query.get_or_404(option_id)
-        option.selected = True
+        unselected = mutations.select_option(option)
+        bump_item_version(option.item_id)
         db.session.commit()
-        ensure_one_selected(option)
-        return jsonify({"message": "این گزینه به عنوان انتخاب نهایی علامت خورد.", "success": True}), 200
+        return jsonify({
+            "message": "این گزینه به عنوان انتخاب نهایی علامت خورد.",
+            "success": True,
+            "selection": {"item_id": option.item_id, "selected_option_id": option.id,
+                          "unselected_option_ids": unselected, "status": "selected"},
+            "totals": dashboard_totals()
+        }), 200
+    except IntegrityError:
+        # A concurrent selection for the same item won the unique index
+        db.session.rollback()
+        return jsonify({"message": "گزینه دیگری همزمان انتخاب شد؛ دوباره تلاش کنید.", "success": False}), 409
     except Exception as e:
+        db.session.rollback()
         return jsonify({"message": f"خطا در انتخاب گزینه: {str(e)}", "success": False}), 500
 
 @options_bp.route('/options/<int:option_id>/unselect', methods=['PUT'])
 def unselect_option(option_id):
     try:
         option = Option.query.get_or_404(option_id)
-        option.selected = False
+        was_selected = bool(option.selected)
+        mutations.unselect_option(option)
+        bump_item_version(option.item_id)
         db.session.commit()
-        return jsonify({"message": "گزینه از حالت انتخاب خارج شد.", "success": True}), 200
+        return jsonify({
+            "message": "گزینه از حالت انتخاب خارج شد.",
+            "success": True,
+            "selection": {"item_id": option.item_id, "selected_option_id": None,
+                          "unselected_option_ids": [option.id] if was_selected else [], "status": "not_selected"},
+            "totals": dashboard_totals()
+        }), 200
     except Exception as e:
+        db.session.rollback()
         return jsonify({"message": f"خطا در خارج کردن گزینه از حالت انتخاب: {str(e)}", "success": False}), 500
 
 @options_bp.route('/options/<int:option_id>', methods=['PUT', 'DELETE'])
@@ -85,27 +82,8 @@ def option_detail(option_id):
     if request.method == 'PUT':
         try:
             data = request.get_json()
-            if 'brand' in data:
-                option.brand = data['brand']
-            if 'model_name' in data:
-                option.model_name = data['model_name']
-            if 'price' in data:
-                option.price = float(data['price']) if data['price'] else None
-            if 'store' in data:
-                option.store = data['store']
-            if 'link' in data:
-                option.link = data['link']
-            if 'features' in data:
-                option.features = data['features']
-            if 'rating' in data:
-                option.rating = float(data['rating']) if data['rating'] else None
-            if 'warranty_months' in data:
-                option.warranty_months = int(data['warranty_months']) if data['warranty_months'] else None
-            if 'available' in data:
-                option.available = data['available']
-            if 'notes' in data:
-                option.notes = data['notes']
-            
+            mutations.update_option(option, data)
+            bump_item_version(option.item_id)
             db.session.commit()
             return jsonify({"message": "گزینه با موفقیت به‌روزرسانی شد.", "success": True}), 200
         except Exception as e:
@@ -114,13 +92,34 @@ def option_detail(option_id):
     elif request.method == 'DELETE':
         try:
             item_id = option.item_id
-            db.session.delete(option)
+            mutations.delete_option(option)
+            bump_item_version(item_id)
             db.session.commit()
             return jsonify({"message": "گزینه حذف شد.", "success": True}), 200
         except Exception as e:
             return jsonify({"message": f"خطا در حذف گزینه: {str(e)}", "success": False}), 500
 
 
+@options_bp.route('/options/<int:option_id>/price-history', methods=['GET'])
+def option_price_history(option_id):
+    """Daily min/max/last price series of an option (?days=90 or ?since=&until=)"""
+    Option.query.get_or_404(option_id)
+    try:
+        since, until = history_window(request.args, current_app.config['PRICE_HISTORY_DAYS'],
+                                      current_app.config['PRICE_HISTORY_MAX_DAYS'])
+    except ValueError as e:
+        return jsonify({"message": f"بازه زمانی نامعتبر: {str(e)}", "success": False}), 400
+    try:
+        series = daily_series([option_id], since, until)
+        return jsonify({
+            "success": True,
+            "since": since.isoformat(),
+            "until": until.isoformat() if until else None,
+            "series": series[0] if series else {"option_id": option_id, "opening": None, "points": []}
+        }), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت تاریخچه قیمت: {str(e)}", "success": False}), 500
+
 @options_bp.route('/options/parse-url', methods=['POST'])
 def parse_option_url():
     """
@@ -128,7 +127,8 @@ def parse_option_url():
     
     Expected JSON input:
     {
-        "url": "https://example.com/product"
+        "url": "https://example.com/product",
+        "force_refresh": false      // optional: bypass the parse cache
     }
     
     Returns:
@@ -141,7 +141,8 @@ def parse_option_url():
             "store": "Example Store",
             "link": "https://example.com/product",
             ...
-        }
+        },
+        "timings": {"cache": "miss", "tier": "static", "fetch_ms": 210.4, "extract_ms": 1.2, "total_ms": 212.0}
     }
     """
     try:
@@ -154,13 +155,122 @@ def parse_option_url():
             return jsonify({"message": "URL الزامی است.", "success": False}), 400
         
         # Parse URL to extract product information
-        parsed_data = parse_product_url(url)
+        timings = {}
+        parsed_data = parse_product_url(url, timings, force_refresh=bool(data.get('force_refresh')))
         
         return jsonify({
             "message": "اطلاعات محصول با موفقیت استخراج شد.",
             "success": True,
-            "data": parsed_data
+            "data": parsed_data,
+            "timings": timings
         }), 200
         
     except Exception as e:
-        return jsonify({"message": f"خطا در تجزیه URL: {str(e)}", "success": False}), 500
\ No newline at end of file
+        return jsonify({"message": f"خطا در تجزیه URL: {str(e)}", "success": False}), 500
+
+@options_bp.route('/options/parse-cache', methods=['GET'])
+def parse_cache_stats():
+    """Hit/miss counters of this process's parse cache and the number of cached URLs"""
+    try:
+        from api.utils.parse_cache import cache_stats
+        return jsonify({"success": True, "stats": cache_stats()}), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت آمار کش: {str(e)}", "success": False}), 500
+
+@options_bp.route('/options/parse-stats', methods=['GET'])
+def parse_domain_stats():
+    """Per-domain averages (time per phase, bytes, blocked requests) by tier and navigation mode"""
+    try:
+        from api.utils.parse_stats import parse_stats
+        return jsonify({"success": True, "domains": parse_stats()}), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در دریافت آمار تجزیه: {str(e)}", "success": False}), 500
+
+PARSED_OPTION_FIELDS = ('brand', 'model_name', 'price', 'store', 'link', 'features', 'rating', 'warranty_months')
+
+@options_bp.route('/options/parse-urls', methods=['POST'])
+def parse_option_urls():
+    """
+    Parse several product URLs concurrently and stream the results as NDJSON
+    
+    Expected JSON input:
+    {
+        "urls": ["https://example.com/a", "https://example.org/b"],
+        "item_id": 1,            // optional: create an option per parsed URL
+        "concurrency": 4,        // optional, capped by BATCH_PARSE_CONCURRENCY
+        "per_domain": 2,         // optional, capped by BATCH_PARSE_PER_DOMAIN
+        "force_refresh": false   // optional: bypass the parse cache
+    }
+    
+    Streams one line per URL as soon as it is parsed:
+    {"index": 0, "url": "...", "success": true, "data": {...}, "timings": {...}}
+    {"index": 1, "url": "...", "success": false, "message": "..."}
+    and a final line:
+    {"done": true, "parsed": 1, "failed": 1, "options": [{"index": 0, "option": {...}}]}
+    """
+    from api.utils.batch_parser import iter_parsed
+    from api.utils.parse_cache import submit_cached_parse
+    from api.utils.url_parser import url_domain
+    
+    config = current_app.config
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({"message": "بدنه درخواست باید یک شیء JSON باشد.", "success": False}), 400
+        urls = data.get('urls')
+        if not isinstance(urls, list) or not urls or not all(isinstance(url, str) for url in urls):
+            return jsonify({"message": "فهرست URL ها الزامی است.", "success": False}), 400
+        if len(urls) > config['BATCH_PARSE_MAX_URLS']:
+            return jsonify({"message": f"حداکثر {config['BATCH_PARSE_MAX_URLS']} URL در هر درخواست مجاز است.", "success": False}), 400
+        concurrency = min(int(data.get('concurrency') or config['BATCH_PARSE_CONCURRENCY']), config['BATCH_PARSE_CONCURRENCY'])
+        per_domain = min(int(data.get('per_domain') or config['BATCH_PARSE_PER_DOMAIN']), config['BATCH_PARSE_PER_DOMAIN'])
+        if concurrency < 1 or per_domain < 1:
+            return jsonify({"message": "مقادیر همزمانی باید مثبت باشند.", "success": False}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"ورودی نامعتبر: {str(e)}", "success": False}), 400
+    
+    item_id = data.get('item_id')
+    if item_id is not None:
+        Item.query.get_or_404(item_id)
+    force_refresh = bool(data.get('force_refresh'))
+    
+    def submit(url):
+        return submit_cached_parse(url, force_refresh=force_refresh)
+    
+    def generate():
+        dumps = current_app.json.dumps
+        parsed = []
+        failed = 0
+        for outcome in iter_parsed(urls, submit, url_domain,
+                                   concurrency=concurrency, per_domain=per_domain,
+                                   timeout=config['BATCH_PARSE_TIMEOUT']):
+            if outcome.error is None:
+                parsed.append(outcome)
+                line = {"index": outcome.index, "url": outcome.url, "success": True,
+                        "data": outcome.data, "timings": outcome.timings}
+            else:
+                failed += 1
+                line = {"index": outcome.index, "url": outcome.url, "success": False,
+                        "message": f"خطا در تجزیه URL: {outcome.error}"}
+            yield dumps(line) + '\n'
+        
+        summary = {"done": True, "parsed": len(parsed), "failed": failed}
+        if item_id is not None and parsed:
+            try:
+                summary["options"] = _insert_parsed_options(item_id, sorted(parsed))
+            except Exception as e:
+                db.session.rollback()
+                summary.update(success=False, message=f"خطا در ذخیره گزینه‌ها: {str(e)}")
+        yield dumps(summary) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _insert_parsed_options(item_id, outcomes):
+    """Create one option per parsed URL with a single multi-row INSERT"""
+    records = [dict({field: outcome.data.get(field) for field in PARSED_OPTION_FIELDS},
+                    available=outcome.data.get('available') is not False)
+               for outcome in outcomes]
+    created = mutations.create_options(db.session.get(Item, item_id), records)
+    bump_item_version(item_id)
+    db.session.commit()
+    return [{"index": outcome.index, "option": option} for outcome, option in zip(outcomes, created)]
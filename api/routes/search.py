@@ -0,0 +1,59 @@
+from flask import Blueprint, current_app, jsonify, request
+from api.utils.autocomplete import AUTOCOMPLETE_FIELDS, suggest
+from api.utils.search import SEARCH_TYPES, search, search_available
+from api.utils.versioning import GLOBAL_SCOPE, conditional_get
+
+search_bp = Blueprint('search', __name__, url_prefix='/api')
+
+@search_bp.route('/search')
+@conditional_get(lambda: [GLOBAL_SCOPE])
+def search_catalogue():
+    """
+    Ranked full-text search over items and options
+    
+    ?q=      words to find; each matches as a prefix, Persian spellings folded
+    ?type=   all (default), item or option
+    ?limit=  number of results (default SEARCH_LIMIT, at most SEARCH_MAX_LIMIT)
+    """
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'all')
+    if not query:
+        return jsonify({"message": "عبارت جستجو الزامی است.", "success": False}), 400
+    if kind not in SEARCH_TYPES:
+        return jsonify({"message": f"نوع جستجو نامعتبر است: {kind}", "success": False}), 400
+    try:
+        limit = int(request.args.get('limit', current_app.config['SEARCH_LIMIT']))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({"message": "پارامتر limit نامعتبر است.", "success": False}), 400
+    if not search_available():
+        return jsonify({"message": "جستجو فقط با SQLite در دسترس است.", "success": False}), 501
+    try:
+        results = search(query, kind, min(limit, current_app.config['SEARCH_MAX_LIMIT']))
+        return jsonify({"success": True, "query": query, "results": results}), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در جستجو: {str(e)}", "success": False}), 500
+
+@search_bp.route('/autocomplete/<field>')
+def autocomplete(field):
+    """
+    Suggestions for the brand, store or room fields from the in-memory prefix index
+    
+    ?q=      what has been typed so far; empty lists the most used values
+    ?limit=  number of suggestions (default AUTOCOMPLETE_LIMIT, at most AUTOCOMPLETE_MAX_LIMIT)
+    """
+    if field not in AUTOCOMPLETE_FIELDS:
+        return jsonify({"message": f"فیلد نامعتبر است: {field}", "success": False}), 400
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', current_app.config['AUTOCOMPLETE_LIMIT']))
+        if limit < 1:
+            raise ValueError(limit)
+    except ValueError:
+        return jsonify({"message": "پارامتر limit نامعتبر است.", "success": False}), 400
+    try:
+        suggestions = suggest(field, query, min(limit, current_app.config['AUTOCOMPLETE_MAX_LIMIT']))
+        return jsonify({"success": True, "field": field, "query": query, "suggestions": suggestions}), 200
+    except Exception as e:
+        return jsonify({"message": f"خطا در پیشنهاد مقادیر: {str(e)}", "success": False}), 500
@@ -0,0 +1,151 @@
+from sqlalchemy import event, insert, update
+
+from api.app_factory import db
+from api.models import DataVersion, Item, Option
+from api.utils import autocomplete
+from api.utils.autocomplete import get_index, suggest, suggestion_key
+from api.utils.versioning import GLOBAL_SCOPE, current_versions
+
+
+def _values(field, prefix=''):
+    return [(hit['value'], hit['count']) for hit in suggest(field, prefix)]
+
+
+def _item(client, **data):
+    return client.post('/api/items', json=data).get_json()['item']['id']
+
+
+def _option(client, item_id, **data):
+    return client.post('/api/options', json=dict(data, item_id=item_id)).get_json()['option']['id']
+
+
+def test_keys_fold_spelling_drift():
+    assert suggestion_key('Digi Kala') == suggestion_key('DIGIKALA') == suggestion_key('digi-kala') == 'digikala'
+    assert suggestion_key('دیجی‌کالا') == suggestion_key('ديجي كالا')
+    assert suggestion_key('  ') == ''
+
+
+def test_drifting_spellings_merge_under_the_most_used_one(app, client):
+    item_id = _item(client, name='Fridge', room='آشپزخانه')
+    _item(client, name='Oven', room='آشپز خانه')
+    _item(client, name='Kettle', room='آشپزخانه')
+    for store in ('Digikala', 'digikala', 'Digikala', 'DigiKala', 'Dey'):
+        _option(client, item_id, store=store)
+    _option(client, item_id, store='دیجی‌کالا')
+    _option(client, item_id, store='ديجي كالا')
+
+    assert _values('store', 'dig') == [('Digikala', 4)]
+    assert _values('store', 'D') == [('Digikala', 4), ('Dey', 1)]
+    assert _values('store', 'دیجی') == [('ديجي كالا', 2)]  # a tie goes to the first spelling in sort order
+    assert _values('room', 'اشپ') == []
+    assert _values('room', 'آشپزخ') == [('آشپزخانه', 3)]
+    assert _values('brand') == []
+
+    response = client.get('/api/autocomplete/store', query_string={'q': 'digi k', 'limit': 1})
+    assert response.get_json()['suggestions'] == [{'value': 'Digikala', 'count': 4}]
+    assert client.get('/api/autocomplete/model_name?q=a').status_code == 400
+    assert client.get('/api/autocomplete/store?limit=0').status_code == 400
+
+
+def test_writes_update_the_index_on_commit(app, client):
+    get_index()
+    item_id = _item(client, name='TV', room='Living room')
+    option_id = _option(client, item_id, brand='Samsung', store='Digikala')
+    assert _values('brand', 'sam') == [('Samsung', 1)]
+
+    client.put(f'/api/options/{option_id}', json={'brand': 'LG'})
+    assert (_values('brand', 'sam'), _values('brand', 'l')) == ([], [('LG', 1)])
+
+    # A failed batch is rolled back and leaves the index alone
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'create', 'type': 'option', 'data': {'item_id': item_id, 'brand': 'Sony'}},
+        {'op': 'delete', 'type': 'item', 'id': 999999},
+    ]})
+    assert response.status_code == 404
+    assert _values('brand', 'so') == []
+
+    client.delete(f'/api/items/{item_id}')
+    assert _values('brand') == _values('store') == _values('room') == []
+
+    client.post('/api/import?format=csv', data='item,room,brand,store\nLamp,Bedroom,Ikea,Ikea\n',
+                content_type='text/csv')
+    assert _values('store', 'ik') == [('Ikea', 1)] and _values('room', 'bed') == [('Bedroom', 1)]
+
+
+def test_other_processes_writes_are_seen_after_the_recheck(app):
+    app.config['AUTOCOMPLETE_RECHECK_SECONDS'] = 0
+    assert _values('brand') == []
+    # Written as another worker would: on its own connection, with no queued changes
+    with db.engine.begin() as connection:
+        item_id = connection.execute(insert(Item).returning(Item.id), [{'name': 'Desk'}]).scalar_one()
+        connection.execute(insert(Option), [{'item_id': item_id, 'brand': 'Ikea'}])
+    assert _values('brand') == []
+
+    with db.engine.begin() as connection:
+        connection.execute(insert(DataVersion), [{'scope': GLOBAL_SCOPE, 'version': 1}])
+    assert _values('brand') == [('Ikea', 1)]
+
+
+def test_own_writes_do_not_rebuild_the_index(app, client, monkeypatch):
+    app.config['AUTOCOMPLETE_RECHECK_SECONDS'] = 0
+    builds = []
+    monkeypatch.setattr(autocomplete, '_build_index',
+                        lambda version, build=autocomplete._build_index: builds.append(version) or build(version))
+    get_index()
+    item_id = _item(client, name='TV', room='Living room')
+    option_id = _option(client, item_id, brand='Samsung')
+    client.put(f'/api/options/{option_id}', json={'brand': 'LG'})
+    client.put(f'/api/options/{option_id}/select')
+    assert _values('brand') == [('LG', 1)] and _values('room') == [('Living room', 1)]
+    assert len(builds) == 1
+    assert get_index().version == current_versions(GLOBAL_SCOPE)[GLOBAL_SCOPE]
+
+    # Someone else's write in between means this process's patch is not the whole story
+    with db.engine.begin() as connection:
+        connection.execute(update(DataVersion).values(version=DataVersion.version + 1))
+    _option(client, item_id, brand='Sony')
+    assert _values('brand', 's') == [('Sony', 1)]
+    assert len(builds) == 2
+
+
+class _CountingKeys(tuple):
+    """Sorted keys that count single-key reads, i.e. bisect probes"""
+    reads = 0
+
+    def __getitem__(self, position):
+        if isinstance(position, int):
+            type(self).reads += 1
+        return super().__getitem__(position)
+
+
+def test_lookups_bisect_without_querying(app, monkeypatch):
+    item_ids = db.session.execute(
+        insert(Item).returning(Item.id), [{'name': f'Item {n}', 'room': f'Room {n % 50}'} for n in range(1000)]
+    ).scalars().all()
+    db.session.execute(insert(Option), [
+        {'item_id': item_ids[n % 1000], 'brand': f'Brand {n % 5000}', 'store': f'Store {n % 300}'}
+        for n in range(50_000)
+    ])
+    db.session.commit()
+    index = get_index()
+    brands = index.fields['brand']
+    assert len(brands.keys) == 5000
+    fields = dict(index.fields, brand=brands._replace(keys=_CountingKeys(brands.keys)))
+    app.extensions['autocomplete']['index'] = index._replace(fields=fields)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    prefixes = ['b', 'br', 'brand 1', 'brand 42', 'brand 4999', 'x']
+    try:
+        for prefix in prefixes:
+            suggest('brand', prefix)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert statements == []
+    # Two bisects per lookup, each at most log2(5000) + 1 probes
+    assert _CountingKeys.reads <= len(prefixes) * 2 * 14, _CountingKeys.reads
+    assert _values('brand', 'brand 4999') == [('Brand 4999', 10)]
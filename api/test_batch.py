@@ -0,0 +1,81 @@
+from sqlalchemy import event
+
+from api.app_factory import db
+from api.models import Item, Option, PriceHistory
+from api.utils.summary import check_summary
+from api.utils.versioning import current_versions, item_scope
+
+
+def _count_commits(app):
+    commits = []
+
+    def count(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', count)
+    return commits, lambda: event.remove(db.engine, 'commit', count)
+
+
+def test_batch_applies_everything_in_one_commit(app, client):
+    commits, stop = _count_commits(app)
+    try:
+        response = client.post('/api/batch', json={'operations': [
+            {'op': 'create', 'type': 'item', 'ref': 'kettle', 'data': {'name': 'Kettle', 'budget': 3000000}},
+            {'op': 'create', 'type': 'option', 'ref': 'bosch', 'data': {'item_id': '$kettle', 'brand': 'Bosch', 'price': 2450000}},
+            {'op': 'create', 'type': 'option', 'ref': 'philips', 'data': {'item_id': '$kettle', 'brand': 'Philips', 'price': 1990000}},
+            {'op': 'select', 'type': 'option', 'id': '$bosch'},
+            {'op': 'select', 'type': 'option', 'id': '$philips'},
+            {'op': 'update', 'type': 'option', 'id': '$philips', 'data': {'price': 1890000}},
+        ]})
+    finally:
+        stop()
+
+    assert response.status_code == 200
+    assert len(commits) == 1
+    results = response.get_json()['results']
+    assert [(r['op'], r['type']) for r in results][:2] == [('create', 'item'), ('create', 'option')]
+    item_id = results[0]['id']
+    assert db.session.get(Option, results[1]['id']).item_id == item_id
+    assert results[-1]['option']['price'] == 1890000
+    options = {o.brand: o for o in Option.query.filter_by(item_id=item_id)}
+    assert (options['Bosch'].selected, options['Philips'].selected) == (False, True)
+    assert [row.price for row in PriceHistory.query.filter_by(option_id=options['Philips'].id)] == [1990000, 1890000]
+    assert current_versions(item_scope(item_id))[item_scope(item_id)] == 1
+    assert check_summary() == []
+
+
+def test_failed_operation_rolls_back_the_batch(app, client):
+    item_id = client.post('/api/items', json={'name': 'Lamp'}).get_json()['item']['id']
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'update', 'type': 'item', 'id': item_id, 'data': {'name': 'Desk lamp'}},
+        {'op': 'create', 'type': 'option', 'data': {'item_id': item_id, 'price': 100}},
+        {'op': 'delete', 'type': 'option', 'id': 999},
+    ]})
+
+    assert response.status_code == 404
+    assert response.get_json()['failed_index'] == 2
+    db.session.expire_all()
+    assert (db.session.get(Item, item_id).name, Option.query.count()) == ('Lamp', 0)
+
+    bad = [
+        {'operations': [{'op': 'select', 'type': 'item', 'id': item_id}]},
+        {'operations': [{'op': 'create', 'type': 'option', 'data': {'item_id': '$missing'}}]},
+        {'operations': [{'op': 'update', 'type': 'option', 'id': 'x'}]},
+        {'operations': []},
+    ]
+    assert [client.post('/api/batch', json=body).status_code for body in bad] == [400, 400, 400, 400]
+
+
+def test_select_route_commits_once(app, client):
+    item_id = client.post('/api/items', json={'name': 'Rug'}).get_json()['item']['id']
+    first, second = (client.post('/api/options', json={'item_id': item_id, 'price': price}).get_json()['option']['id']
+                     for price in (10, 20))
+    client.put(f'/api/options/{first}/select')
+    commits, stop = _count_commits(app)
+    try:
+        assert client.put(f'/api/options/{second}/select').status_code == 200
+    finally:
+        stop()
+    assert len(commits) == 1
+    assert [o.selected for o in Option.query.order_by(Option.id)] == [False, True]
+    assert check_summary() == []
@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from api.app_factory import db
+from api.models import Option, PriceHistory
+from api.utils.autocomplete import get_index, suggest
+from api.utils.batch_parser import iter_parsed
+from api.utils.url_parser import url_domain
+
+FIXTURE_PAGES = {
+    '/kettle': '<html><head><title>Electric Kettle</title></head><body><h1>Electric Kettle</h1><p>Price: 1,250,000</p></body></html>',
+    '/lamp': '<html><head><title>Desk Lamp</title></head><body><h1>Desk Lamp</h1><p>Price: 480,000</p></body></html>',
+}
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_iter_parsed_respects_global_and_per_domain_limits():
+    lock = threading.Lock()
+    active = {}
+    peaks = {'total': 0}
+
+    def parse(url):
+        domain = url_domain(url)
+        with lock:
+            active[domain] = active.get(domain, 0) + 1
+            peaks[domain] = max(peaks.get(domain, 0), active[domain])
+            peaks['total'] = max(peaks['total'], sum(active.values()))
+        time.sleep(0.02)
+        with lock:
+            active[domain] -= 1
+        return {'link': url}, {}
+
+    urls = [f'https://{host}.example/p{n}' for n in range(4) for host in ('a', 'b', 'c')]
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        outcomes = list(iter_parsed(urls, lambda url: executor.submit(parse, url), url_domain,
+                                    concurrency=4, per_domain=1))
+
+    assert sorted(outcome.index for outcome in outcomes) == list(range(len(urls)))
+    assert all(outcome.error is None for outcome in outcomes)
+    assert peaks['total'] <= 3
+    assert all(peaks[f'{host}.example'] == 1 for host in ('a', 'b', 'c'))
+
+
+def test_iter_parsed_yields_in_completion_order_and_reports_errors():
+    delays = {'https://slow.example/': 0.2, 'https://fast.example/': 0.0}
+
+    def parse(url):
+        if url == 'https://broken.example/':
+            raise RuntimeError('navigation failed')
+        time.sleep(delays[url])
+        return {'link': url}, {'navigate_ms': 1.0}
+
+    urls = ['https://slow.example/', 'not a url', 'https://broken.example/', 'https://fast.example/']
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outcomes = list(iter_parsed(urls, lambda url: executor.submit(parse, url), url_domain))
+
+    assert outcomes[-1].url == 'https://slow.example/'
+    errors = {outcome.url: outcome.error for outcome in outcomes if outcome.error}
+    assert errors == {'not a url': 'Invalid URL format', 'https://broken.example/': 'navigation failed'}
+
+
+def test_iter_parsed_times_out_stuck_parses():
+    never = Future()
+    outcomes = list(iter_parsed(['https://stuck.example/'], lambda url: never, url_domain, timeout=0.05))
+    assert [outcome.error for outcome in outcomes] == ['Timed out']
+
+
+def test_batch_parse_validates_input(client):
+    assert client.post('/api/options/parse-urls', json={}).status_code == 400
+    assert client.post('/api/options/parse-urls', json=['https://a.example']).status_code == 400
+    assert client.post('/api/options/parse-urls', json={'urls': 'https://a.example'}).status_code == 400
+    assert client.post('/api/options/parse-urls', json={'urls': ['https://a.example'], 'concurrency': 'x'}).status_code == 400
+    too_many = ['https://a.example/%d' % n for n in range(51)]
+    assert client.post('/api/options/parse-urls', json={'urls': too_many}).status_code == 400
+    assert client.post('/api/options/parse-urls', json={'urls': ['https://a.example'], 'item_id': 999}).status_code == 404
+
+
+def test_batch_parse_streams_ndjson_and_bulk_inserts_options(app, client, monkeypatch):
+    from api.utils import url_parser
+
+    def fake_submit(url):
+        # Resolve immediately with what a product page parse would return
+        future = Future()
+        if url.endswith('/missing'):
+            future.set_exception(RuntimeError('404'))
+        else:
+            future.set_result(({'model_name': url.rsplit('/', 1)[-1], 'price': 100.0, 'store': 'Shop', 'link': url},
+                               {'total_ms': 1.0}))
+        return future
+
+    monkeypatch.setattr(url_parser, 'submit_product_url', fake_submit)
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    get_index()
+
+    response = client.post('/api/options/parse-urls', json={
+        'item_id': item_id,
+        'urls': ['https://shop.example/kettle', 'https://shop.example/missing', 'https://shop.example/jug'],
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = _lines(response)
+    assert {line['index']: line['success'] for line in lines[:-1]} == {0: True, 1: False, 2: True}
+
+    summary = lines[-1]
+    assert summary['done'] and summary['parsed'] == 2 and summary['failed'] == 1
+    assert [entry['index'] for entry in summary['options']] == [0, 2]
+    assert [entry['option']['model_name'] for entry in summary['options']] == ['kettle', 'jug']
+
+    options = db.session.execute(db.select(Option).where(Option.item_id == item_id).order_by(Option.id)).scalars().all()
+    assert [option.link for option in options] == ['https://shop.example/kettle', 'https://shop.example/jug']
+    assert [option.id for option in options] == [entry['option']['id'] for entry in summary['options']]
+    assert client.get(f'/api/items/{item_id}').get_json()['options'][0]['price'] == 100.0
+    # Created through mutations, so the write-side hooks ran too
+    assert suggest('store', 'sh') == [{'value': 'Shop', 'count': 2}]
+    assert PriceHistory.query.count() == 2
+
+
+def test_batch_parse_fixture_pages(app, client, page_server, chromium):
+    page_server.pages.update(FIXTURE_PAGES)
+    product_site = page_server.url
+    app.config.update(BROWSER_POOL_SIZE=2)
+    item_id = client.post('/api/items', json={'name': 'Desk'}).get_json()['item']['id']
+    response = client.post('/api/options/parse-urls', json={
+        'item_id': item_id,
+        'urls': [f'{product_site}/kettle', f'{product_site}/lamp'],
+    })
+    lines = _lines(response)
+    results = {line['url']: line for line in lines[:-1]}
+    assert results[f'{product_site}/kettle']['data']['model_name'] == 'Electric Kettle'
+    assert results[f'{product_site}/lamp']['data']['price'] == 480000
+    assert {'acquire_ms', 'navigate_ms', 'extract_ms'} <= set(results[f'{product_site}/lamp']['timings'])
+    assert lines[-1]['parsed'] == 2
+    assert Option.query.filter_by(item_id=item_id).count() == 2
+    app.extensions['browser_pool'].close()
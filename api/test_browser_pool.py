@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from api.utils.browser_pool import BrowserPool, BrowserPoolClosed, get_browser_pool
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    def new_page(self):
+        return {'browser': self.browser, 'context': self}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, number):
+        self.number = number
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    def new_context(self, user_agent=None):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    def close(self):
+        self.connected = False
+
+
+class FakeLauncher:
+    """Stands in for Playwright so the pool's bookkeeping can be tested without Chromium"""
+
+    def __init__(self):
+        self.browsers = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        return object()
+
+    def launch(self, driver):
+        with self.lock:
+            browser = FakeBrowser(len(self.browsers))
+            self.browsers.append(browser)
+            return browser
+
+    def stop(self, driver):
+        pass
+
+
+@pytest.fixture
+def launcher():
+    return FakeLauncher()
+
+
+def test_pool_warms_browsers_on_start(launcher):
+    pool = BrowserPool(size=3, launcher=launcher).start()
+    try:
+        assert len(launcher.browsers) == 3
+        assert pool.stats()['launches'] == 3
+    finally:
+        pool.close()
+
+
+def test_each_job_gets_a_fresh_context_and_timings(launcher):
+    pool = BrowserPool(size=1, launcher=launcher).start()
+    try:
+        pages = [pool.run(lambda page, timings: page, timeout=5)[0] for _ in range(3)]
+        assert len({id(page['context']) for page in pages}) == 3
+        assert all(page['context'].closed for page in pages)
+        assert len({page['browser'].number for page in pages}) == 1
+
+        _, timings = pool.run(lambda page, timings: timings.setdefault('extract_ms', 1.0), timeout=5)
+        assert {'acquire_ms', 'extract_ms', 'total_ms'} <= set(timings)
+    finally:
+        pool.close()
+
+
+def test_concurrent_pages_are_capped_at_pool_size(launcher):
+    pool = BrowserPool(size=2, launcher=launcher).start()
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def job(page, timings):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    try:
+        futures = [pool.submit(job) for _ in range(10)]
+        wait(futures, timeout=10)
+        assert all(future.exception() is None for future in futures)
+        assert max(peak) == 2
+    finally:
+        pool.close()
+
+
+def test_browser_is_recycled_after_max_pages(launcher):
+    pool = BrowserPool(size=1, max_pages=2, launcher=launcher).start()
+    try:
+        numbers = [pool.run(lambda page, timings: page['browser'].number, timeout=5)[0] for _ in range(5)]
+        assert numbers == [0, 0, 1, 1, 2]
+        assert launcher.browsers[0].connected is False
+        assert pool.stats()['recycles'] == 2
+    finally:
+        pool.close()
+
+
+def test_crashed_browser_is_replaced(launcher):
+    pool = BrowserPool(size=1, launcher=launcher).start()
+
+    def crash(page, timings):
+        page['browser'].connected = False
+        raise RuntimeError('Target page, context or browser has been closed')
+
+    try:
+        with pytest.raises(RuntimeError):
+            pool.run(crash, timeout=5)
+        number, _ = pool.run(lambda page, timings: page['browser'].number, timeout=5)
+        assert number == 1
+        stats = pool.stats()
+        assert stats['crashes'] == 1
+        assert stats['failures'] == 1
+    finally:
+        pool.close()
+
+
+def test_closed_pool_rejects_jobs(launcher):
+    pool = BrowserPool(size=1, launcher=launcher).start()
+    pool.close()
+    assert all(not browser.connected for browser in launcher.browsers)
+    with pytest.raises(BrowserPoolClosed):
+        pool.submit(lambda page, timings: None)
+
+
+def test_app_pool_is_created_lazily_from_config(app):
+    app.config.update(BROWSER_POOL_SIZE=3, BROWSER_MAX_PAGES=7)
+    assert 'browser_pool' not in app.extensions
+    pool = get_browser_pool(app)
+    assert get_browser_pool(app) is pool
+    assert (pool.size, pool.max_pages) == (3, 7)
+    # Nothing is launched until the pool is started or used
+    assert pool.stats()['launches'] == 0
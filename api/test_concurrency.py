@@ -0,0 +1,61 @@
+import threading
+
+from sqlalchemy import text
+
+from api.app_factory import db
+from api.utils.summary import check_summary
+
+WRITERS = 8
+READERS = 8
+ROUNDS = 15
+
+
+def test_sqlite_profile_pragmas(app):
+    with db.engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert connection.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert connection.execute(text('PRAGMA busy_timeout')).scalar() == app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert connection.execute(text('PRAGMA temp_store')).scalar() == 2  # MEMORY
+
+
+def test_concurrent_readers_and_writers(app):
+    failures = []
+    start = threading.Barrier(WRITERS + READERS)
+
+    def check(response, expected):
+        if response.status_code != expected:
+            failures.append((response.status_code, response.get_data(as_text=True)))
+
+    def writer(n):
+        client = app.test_client()
+        start.wait()
+        for i in range(ROUNDS):
+            response = client.post('/api/items', json={'name': f'writer {n} item {i}', 'budget': 10})
+            check(response, 201)
+            if response.status_code != 201:
+                continue
+            item_id = response.get_json()['item']['id']
+            option = client.post('/api/options', json={'item_id': item_id, 'price': 5})
+            check(option, 201)
+            if option.status_code == 201:
+                check(client.put(f"/api/options/{option.get_json()['option']['id']}/select"), 200)
+
+    def reader():
+        client = app.test_client()
+        start.wait()
+        for _ in range(ROUNDS):
+            check(client.get('/api/dashboard?limit=20'), 200)
+            check(client.get('/api/items?limit=20'), 200)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+    assert check_summary() == []
+    totals = app.test_client().get('/api/dashboard').get_json()
+    assert totals['total_items'] == WRITERS * ROUNDS
+    assert totals['items_with_choice'] == WRITERS * ROUNDS
@@ -0,0 +1,95 @@
+from sqlalchemy import event
+
+from api.app_factory import db
+from api.models import Category, Subcategory, Item, Option
+from api.utils.summary import rebuild_summary
+
+
+def _seed(count, kitchen, sub):
+    for i in range(count):
+        item = Item(name=f"item {i}", room=kitchen.name if i % 3 == 0 else "اتاق",
+                    budget=100, category_id=kitchen.id if i % 2 else None,
+                    subcategory_id=sub.id if i % 2 else None)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Option(item_id=item.id, brand="b", price=10, selected=True))
+        db.session.add(Option(item_id=item.id, brand="c", price=20))
+    rebuild_summary()
+    db.session.commit()
+
+
+def _count_queries(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_dashboard_query_count_is_constant(app, client):
+    kitchen = Category(name="آشپزخانه")
+    db.session.add(kitchen)
+    db.session.flush()
+    sub = Subcategory(name="اجاق گاز", category_id=kitchen.id)
+    db.session.add(sub)
+    db.session.commit()
+
+    _seed(5, kitchen, sub)
+    # Warm the in-process taxonomy snapshot so only per-request queries are counted
+    client.get('/api/dashboard')
+    small_count, small = _count_queries(client, '/api/dashboard')
+    _seed(200, kitchen, sub)
+    large_count, large = _count_queries(client, '/api/dashboard')
+
+    assert small_count == large_count
+    assert len(large['items']) == 205
+    filtered_count, _ = _count_queries(client, '/api/dashboard?category=آشپزخانه&subcategory=اجاق گاز')
+    assert filtered_count <= large_count + 1
+
+
+def test_dashboard_response_shape(app, client):
+    kitchen = Category(name="آشپزخانه")
+    living = Category(name="نشیمن")
+    db.session.add_all([kitchen, living])
+    db.session.flush()
+    in_kitchen = Item(name="یخچال", category_id=kitchen.id, room="نشیمن")
+    no_category = Item(name="گلدان", room="بالکن")
+    db.session.add_all([in_kitchen, no_category])
+    db.session.flush()
+    db.session.add(Option(item_id=in_kitchen.id, brand="LG", price=50, selected=True))
+    db.session.commit()
+
+    data = client.get('/api/dashboard').get_json()
+
+    assert data['total_items'] == 2
+    assert data['items_with_choice'] == 1
+    assert data['total_selected_cost'] == 50
+    fridge = next(item for item in data['items'] if item['id'] == in_kitchen.id)
+    assert fridge['category'] == "آشپزخانه"
+    assert fridge['options_count'] == 1
+    assert fridge['selected_option']['brand'] == "LG"
+    assert [i['id'] for i in data['items_by_category']["آشپزخانه"]] == [in_kitchen.id]
+    assert [i['id'] for i in data['items_by_category']["نشیمن"]] == [in_kitchen.id]
+    assert [i['id'] for i in data['items_by_category']["سایر"]] == [no_category.id]
+    assert 'category' not in data['items_by_category']["سایر"][0]
+
+
+def test_dashboard_pagination(app, client):
+    for i in range(12):
+        db.session.add(Item(name=f"item {i}", room="بالکن"))
+    db.session.commit()
+
+    first = client.get('/api/dashboard?limit=5').get_json()
+    assert len(first['items']) == 5
+    assert len(first['items_by_category']["سایر"]) == 5
+    second = client.get(f"/api/dashboard?limit=5&cursor={first['next_cursor']}").get_json()
+    last_id = first['items'][-1]['id']
+    assert [i['id'] for i in second['items']] == [last_id + n for n in range(1, 6)]
+    assert 'next_cursor' not in client.get('/api/dashboard').get_json()
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+
+from sqlalchemy import insert
+
+from api.app_factory import db
+from api.models import Category, Item, Option
+from api.utils.exporters import EXPORT_FORMATS, EXPORT_SCOPES, open_export
+
+SHEET_NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+def _sheet_rows(body):
+    with zipfile.ZipFile(io.BytesIO(body)) as package:
+        assert package.testzip() is None
+        sheet = ElementTree.fromstring(package.read('xl/worksheets/sheet1.xml'))
+    return [[''.join(cell.itertext()) for cell in row.findall('s:c', SHEET_NS)]
+            for row in sheet.findall('s:sheetData/s:row', SHEET_NS)]
+
+
+def _catalogue(client):
+    category = Category(name='Kitchen')
+    db.session.add(category)
+    db.session.commit()
+    category_id = category.id
+    kettle = client.post('/api/items', json={'name': 'Kettle', 'category_id': category_id, 'room': 'kitchen'}).get_json()['item']['id']
+    option_ids = [
+        client.post('/api/options', json={'item_id': kettle, 'brand': brand, 'price': price,
+                                          'notes': 'line one\nline two'}).get_json()['option']['id']
+        for brand, price in (('Bosch', 100), ('Philips, "Pro"', 80.5))
+    ]
+    client.put(f'/api/options/{option_ids[0]}/select')
+    client.post('/api/items', json={'name': 'Rug'})
+
+
+def test_selected_csv_keeps_its_columns(app, client):
+    _catalogue(client)
+    response = client.get('/api/export/selected.csv')
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment;filename=selected_options.csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows == [
+        ['Item', 'Brand', 'Model', 'Price', 'Store', 'Link', 'Rating', 'Notes'],
+        ['Kettle', 'Bosch', '', '100.0', '', '', '', 'line one\nline two'],
+    ]
+
+
+def test_catalogue_in_every_format(app, client):
+    _catalogue(client)
+    headers = [header for _, header, _ in EXPORT_SCOPES['catalogue'].columns]
+
+    rows = list(csv.DictReader(io.StringIO(client.get('/api/export/catalogue.csv').get_data(as_text=True))))
+    assert [(row['Item'], row['Category'], row['Brand'], row['Selected']) for row in rows] == [
+        ('Kettle', 'Kitchen', 'Bosch', 'True'), ('Kettle', 'Kitchen', 'Philips, "Pro"', 'False'), ('Rug', '', '', ''),
+    ]
+
+    lines = client.get('/api/export/catalogue.ndjson').get_data(as_text=True).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(r['item'], r['brand'], r['price']) for r in records] == [
+        ('Kettle', 'Bosch', 100), ('Kettle', 'Philips, "Pro"', 80.5), ('Rug', None, None),
+    ]
+
+    sheet = _sheet_rows(client.get('/api/export/catalogue.xlsx').data)
+    assert sheet[0] == headers
+    assert [(row[1], row[7], row[9]) for row in sheet[1:]] == [
+        ('Kettle', 'Bosch', '100.0'), ('Kettle', 'Philips, "Pro"', '80.5'), ('Rug', '', ''),
+    ]
+
+    assert client.get('/api/export/catalogue.pdf').status_code == 404
+    assert client.get('/api/export/everything.csv').status_code == 404
+
+
+def test_export_memory_stays_flat(app):
+    item_ids = db.session.execute(
+        insert(Item).returning(Item.id), [{'name': f'Item {n}'} for n in range(1000)]
+    ).scalars().all()
+    db.session.execute(insert(Option), [
+        {'item_id': item_ids[n % 1000], 'brand': f'Brand {n}', 'model_name': f'Model {n}', 'price': n * 1.5,
+         'store': 'Store', 'link': f'https://shop.example/p/{n}', 'notes': 'Matte finish, two-year warranty'}
+        for n in range(100_000)
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+    for fmt in ('csv', 'xlsx'):
+        writer, _ = EXPORT_FORMATS[fmt]
+        tracemalloc.start()
+        try:
+            rows = size = 0
+            for chunk in writer(open_export('catalogue', batch_size=1000), EXPORT_SCOPES['catalogue'].columns):
+                size += len(chunk)
+                rows += chunk.count('\n') if fmt == 'csv' else 0
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        if fmt == 'csv':
+            assert rows == 100_001
+        # The whole export is many times larger than anything held at once
+        assert size > (10_000_000 if fmt == 'csv' else 1_000_000)
+        assert peak < 4 * 1024 * 1024, f'{fmt}: peak {peak} bytes for {size} bytes of output'
@@ -0,0 +1,106 @@
+import io
+import json
+import time
+
+from api.app_factory import db
+from api.models import Category, Item, Option, PriceHistory, Subcategory
+from api.utils.importers import import_rows
+from api.utils.summary import check_summary
+from api.utils.versioning import bump_taxonomy_version
+
+CSV_ROWS = '''Item,Category,Subcategory,Room,Budget,Brand,Model,Price,Store,Selected
+Kettle,Kitchen,Small appliances,kitchen,"3,000,000",Bosch,TWK,"2,450,000",Digikala,yes
+Kettle,Kitchen,Small appliances,kitchen,,Philips,HD9350,1990000,Torob,
+Rug,,,living room,500,,,,,
+'''
+
+
+def _taxonomy():
+    kitchen = Category(name='Kitchen')
+    db.session.add(kitchen)
+    db.session.flush()
+    db.session.add(Subcategory(name='Small appliances', category_id=kitchen.id))
+    bump_taxonomy_version()
+    db.session.commit()
+    return kitchen.id
+
+
+def test_csv_rows_group_into_items(app, client):
+    kitchen = _taxonomy()
+    response = client.post('/api/import', data={'file': (io.BytesIO(CSV_ROWS.encode('utf-8')), 'list.csv')})
+
+    assert response.status_code == 201
+    report = response.get_json()['report']
+    assert (report['rows'], report['items'], report['options'], report['errors']) == (3, 2, 2, [])
+    kettle = Item.query.filter_by(name='Kettle').one()
+    assert (kettle.category_id, kettle.budget, kettle.room) == (kitchen, 3000000, 'kitchen')
+    assert sorted((o.brand, o.price, o.selected) for o in kettle.options) == [
+        ('Bosch', 2450000, True), ('Philips', 1990000, False)]
+    assert Item.query.filter_by(name='Rug').one().options == []
+    assert PriceHistory.query.count() == 2
+    assert check_summary() == []
+
+
+def test_invalid_rows_are_reported_and_nothing_is_written(app, client):
+    _taxonomy()
+    rows = CSV_ROWS + 'Lamp,Garden,,,,,,,,\nKettle,Kitchen,Small appliances,kitchen,,Tefal,,cheap,,true\n'
+    response = client.post('/api/import?format=csv', data=rows.encode('utf-8'), content_type='text/csv')
+
+    assert response.status_code == 400
+    report = response.get_json()['report']
+    assert report['imported'] is False
+    assert [(error['row'], error['message']) for error in report['errors']] == [
+        (5, "Unknown category 'Garden'"), (6, "'price' must be a number")]
+    assert (Item.query.count(), Option.query.count(), PriceHistory.query.count()) == (0, 0, 0)
+
+    twice = CSV_ROWS.replace('1990000,Torob,', '1990000,Torob,true')
+    assert client.post('/api/import?format=csv', data=twice).get_json()['report']['errors'] == [
+        {'row': 3, 'message': "Item 'Kettle' already has a selected option"}]
+
+
+def test_dry_run_and_jsonl(app, client):
+    _taxonomy()
+    lines = [
+        {'item': 'Lamp', 'room': 'bedroom', 'options': [{'brand': 'Ikea', 'price': 900}, {'brand': 'Pars', 'price': 700}]},
+        {'item': 'Lamp', 'room': 'bedroom', 'options': [{'brand': 'Ikea', 'price': 950, 'selected': True}]},
+        {'name': 'Chair', 'subcategory': 'Small appliances'},
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines).encode('utf-8')
+
+    dry = client.post('/api/import?format=jsonl&dry_run=1', data=body)
+    assert dry.status_code == 200
+    assert (dry.get_json()['report']['items'], dry.get_json()['report']['options']) == (3, 3)
+    assert Item.query.count() == 0
+
+    assert client.post('/api/import', data=body, content_type='application/x-ndjson').status_code == 201
+    # Each line's options stay with that line's item
+    assert sorted(len(item.options) for item in Item.query.filter_by(name='Lamp')) == [1, 2]
+    assert Item.query.filter_by(name='Chair').one().category_id is not None
+    assert check_summary() == []
+
+
+def test_catalogue_export_round_trips(app, client):
+    _taxonomy()
+    client.post('/api/import', data={'file': (io.BytesIO(CSV_ROWS.encode('utf-8')), 'list.csv')})
+    exported = client.get('/api/export/catalogue.csv').data
+    Option.query.delete()
+    Item.query.delete()
+    db.session.commit()
+
+    report = import_rows(io.BytesIO(exported), 'csv')
+    assert (report['imported'], report['items'], report['options']) == (True, 2, 2)
+    assert client.get('/api/export/catalogue.csv').data.count(b'\n') == exported.count(b'\n')
+
+
+def test_large_import_runs_in_batches(app):
+    _taxonomy()
+    lines = ['item,category,brand,price,selected']
+    lines.extend(f'Item {n // 5},Kitchen,Brand {n},{1000 + n},{n % 5 == 0}' for n in range(50_000))
+    started = time.perf_counter()
+
+    report = import_rows(io.BytesIO('\n'.join(lines).encode('utf-8')), 'csv', batch_size=5000)
+
+    assert (report['items'], report['options'], report['invalid_rows']) == (10_000, 50_000, 0)
+    assert time.perf_counter() - started < 30
+    assert Option.query.filter_by(selected=True).count() == 10_000
+    assert check_summary() == []
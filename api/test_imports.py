@@ -27,7 +27,7 @@ def test_imports():
         return False
     
     try:
-        from api.utils.helpers import ensure_one_selected
+        from api.utils.mutations import select_option
         print("SUCCESS: utils imported successfully")
     except Exception as e:
         print("ERROR: Failed to import utils: {}".format(e))
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from api.app_factory import db
+from api.models import Category, Item, Option
+
+
+def _walk(client, url):
+    ids, cursor = [], None
+    while True:
+        page = client.get(url + (f"&cursor={cursor}" if cursor else "")).get_json()
+        ids.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+
+def test_items_keyset_pagination(app, client):
+    start = datetime(2024, 1, 1)
+    for i in range(25):
+        # Pairs of items share a timestamp to exercise the id tie-breaker
+        db.session.add(Item(name=f"item {i}", created_at=start + timedelta(minutes=i // 2)))
+    db.session.commit()
+    all_ids = [item.id for item in Item.query.order_by(Item.id)]
+
+    assert _walk(client, '/api/items?limit=10') == all_ids
+    assert _walk(client, '/api/items?limit=7&sort=-id') == all_ids[::-1]
+    newest_first = _walk(client, '/api/items?limit=4&sort=-created_at')
+    assert sorted(newest_first) == all_ids
+    assert newest_first[0] == all_ids[-1]
+
+    first_page = client.get('/api/items?limit=10').get_json()
+    assert len(first_page['items']) == 10
+    mismatched = client.get(f"/api/items?limit=10&sort=-id&cursor={first_page['next_cursor']}")
+    assert mismatched.status_code == 400
+    assert client.get('/api/items?cursor=garbage').status_code == 400
+
+
+def test_items_filters(app, client):
+    kitchen = Category(name="آشپزخانه")
+    db.session.add(kitchen)
+    db.session.flush()
+    fridge = Item(name="یخچال", category_id=kitchen.id, budget=500, room="آشپزخانه")
+    lamp = Item(name="لامپ", budget=20, room="نشیمن")
+    db.session.add_all([fridge, lamp])
+    db.session.flush()
+    db.session.add(Option(item_id=fridge.id, price=400, selected=True))
+    db.session.add(Option(item_id=lamp.id, price=15))
+    db.session.commit()
+
+    def ids(query):
+        return [item['id'] for item in client.get(f'/api/items?{query}').get_json()['items']]
+
+    assert ids(f'category_id={kitchen.id}') == [fridge.id]
+    assert ids('room=نشیمن') == [lamp.id]
+    assert ids('has_selection=true') == [fridge.id]
+    assert ids('has_selection=false') == [lamp.id]
+    assert ids('min_budget=100') == [fridge.id]
+    assert ids('max_budget=100') == [lamp.id]
+    assert client.get('/api/items').get_json()['items'][0]['options_count'] == 1
@@ -0,0 +1,230 @@
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from api.app_factory import db
+from api.models import Job, Option
+from api.utils import jobs
+from api.utils.autocomplete import get_index, suggest
+from api.utils.jobs import claim_job, enqueue, run_next_job
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Register throwaway job kinds for the duration of a test"""
+    registered = dict(jobs.JOB_HANDLERS)
+    monkeypatch.setattr(jobs, 'JOB_HANDLERS', registered)
+    return registered
+
+
+def test_enqueue_returns_job_id_immediately(client):
+    response = client.post('/api/jobs', json={'kind': 'parse', 'payload': {'url': 'https://shop.example/p/1'}})
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert job['status'] == 'queued'
+    assert response.headers['Location'] == f"/api/jobs/{job['id']}"
+
+    status = client.get(f"/api/jobs/{job['id']}").get_json()['job']
+    assert (status['kind'], status['status'], status['attempts']) == ('parse', 'queued', 0)
+    assert [entry['id'] for entry in client.get('/api/jobs?status=queued').get_json()['jobs']] == [job['id']]
+
+
+def test_enqueue_rejects_unknown_kinds(client):
+    assert client.post('/api/jobs', json={'kind': 'mine-bitcoin'}).status_code == 400
+    assert client.post('/api/jobs', json={}).status_code == 400
+    assert client.get('/api/jobs/999').status_code == 404
+
+
+def test_each_job_is_claimed_exactly_once(app, handlers):
+    handlers['noop'] = lambda payload: None
+    for n in range(40):
+        enqueue('noop', {'n': n})
+    db.session.commit()
+
+    claimed = []
+    lock = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(index):
+        with app.app_context():
+            start.wait()
+            while True:
+                row = claim_job(f'test:{index}')
+                if row is None:
+                    break
+                with lock:
+                    claimed.append(row.id)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job.id for job in Job.query.all())
+    assert Job.query.filter_by(status='running').count() == 40
+
+
+def test_failed_jobs_are_retried_with_backoff(app, handlers):
+    app.config.update(JOB_RETRY_BASE_SECONDS=10, JOB_RETRY_MAX_SECONDS=15)
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        raise RuntimeError('store timed out')
+
+    handlers['flaky'] = flaky
+    job_id = enqueue('flaky', {'url': 'x'}, max_attempts=3).id
+    db.session.commit()
+
+    assert run_next_job('test') == (job_id, 'queued')
+    job = db.session.get(Job, job_id)
+    assert job.attempts == 1 and job.error == 'store timed out'
+    assert 9 <= (job.run_after - datetime.utcnow()).total_seconds() <= 10
+    # Not due yet
+    assert run_next_job('test') is None
+
+    for expected_delay, status in ((15, 'queued'), (None, 'failed')):
+        job.run_after = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert run_next_job('test') == (job_id, status)
+        db.session.expire_all()
+        job = db.session.get(Job, job_id)
+        if expected_delay:
+            # Doubled from 10 s, capped at JOB_RETRY_MAX_SECONDS
+            assert 14 <= (job.run_after - datetime.utcnow()).total_seconds() <= 15
+    assert job.attempts == 3 and job.finished_at is not None
+    assert len(calls) == 3
+
+
+def test_job_errors_are_not_retried(app):
+    job_id = enqueue('parse', {}).id
+    db.session.commit()
+    assert run_next_job('test') == (job_id, 'failed')
+    assert db.session.get(Job, job_id).attempts == 1
+
+
+def test_expired_leases_are_reclaimed(app, handlers):
+    handlers['noop'] = lambda payload: {'ok': True}
+    job_id = enqueue('noop').id
+    db.session.commit()
+    assert claim_job('crashed-worker').id == job_id
+    assert claim_job('other') is None
+
+    job = db.session.get(Job, job_id)
+    job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LEASE_SECONDS'] + 1)
+    db.session.commit()
+    assert run_next_job('other') == (job_id, 'done')
+    db.session.expire_all()
+    job = db.session.get(Job, job_id)
+    assert (job.attempts, job.result, job.locked_by) == (2, {'ok': True}, None)
+
+
+def test_leases_are_renewed_while_the_job_runs(app, handlers):
+    app.config['JOB_LEASE_SECONDS'] = 0.3
+    stolen = []
+
+    def slow(payload):
+        # Outlives its lease several times over; another worker must not take it
+        for _ in range(4):
+            time.sleep(0.25)
+            with app.app_context():
+                stolen.append(claim_job('other'))
+        return {'ok': True}
+
+    handlers['slow'] = slow
+    job_id = enqueue('slow').id
+    db.session.commit()
+    assert run_next_job('worker') == (job_id, 'done')
+    assert stolen == [None] * 4
+    db.session.expire_all()
+    assert db.session.get(Job, job_id).attempts == 1
+
+
+def test_abandoned_jobs_fail_once_out_of_attempts(app, handlers):
+    handlers['noop'] = lambda payload: None
+    job_id = enqueue('noop', max_attempts=2).id
+    db.session.commit()
+    for attempt in (1, 2):
+        assert claim_job(f'crashed-{attempt}').id == job_id
+        job = db.session.get(Job, job_id)
+        job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LEASE_SECONDS'] + 1)
+        db.session.commit()
+
+    assert claim_job('other') is None
+    db.session.expire_all()
+    job = db.session.get(Job, job_id)
+    assert (job.status, job.attempts, job.locked_by) == ('failed', 2, None)
+    assert job.error == 'Lease expired on the last attempt'
+
+
+def test_a_stale_worker_cannot_finish_a_reclaimed_job(app, handlers):
+    handlers['noop'] = lambda payload: None
+    job_id = enqueue('noop').id
+    db.session.commit()
+    claim_job('first')
+    db.session.get(Job, job_id).locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LEASE_SECONDS'] + 1)
+    db.session.commit()
+    assert claim_job('second').id == job_id
+
+    jobs.complete_job(job_id, {'by': 'first'}, 'first')
+    db.session.expire_all()
+    assert (db.session.get(Job, job_id).status, db.session.get(Job, job_id).locked_by) == ('running', 'second')
+
+
+def test_unique_keys_enqueue_once(app):
+    first = enqueue('parse', {'url': 'https://shop.example/p/1'}, unique_key='parse:1')
+    again = enqueue('parse', {'url': 'https://shop.example/p/1'}, unique_key='parse:1')
+    db.session.commit()
+    assert first.id == again.id
+    assert Job.query.count() == 1
+
+
+def test_parse_job_adds_option(app, client, monkeypatch):
+    from api.utils import url_parser
+
+    def parsed(url):
+        future = Future()
+        future.set_result(({'model_name': 'Kettle X', 'price': 120.0, 'store': 'Shop', 'link': url}, {'tier': 'static'}))
+        return future
+
+    monkeypatch.setattr(url_parser, 'submit_product_url', parsed)
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    get_index()
+    job_id = client.post('/api/jobs', json={
+        'kind': 'parse', 'payload': {'url': 'https://shop.example/kettle', 'item_id': item_id}
+    }).get_json()['job']['id']
+
+    assert run_next_job('test', kinds=['parse']) == (job_id, 'done')
+    job = client.get(f'/api/jobs/{job_id}').get_json()['job']
+    assert job['result']['data']['model_name'] == 'Kettle X'
+    assert job['result']['timings']['tier'] == 'static'
+    option = db.session.get(Option, job['result']['option']['id'])
+    assert (option.item_id, option.price, option.link) == (item_id, 120.0, 'https://shop.example/kettle')
+    assert suggest('store', 'sh') == [{'value': 'Shop', 'count': 1}]
+
+
+def test_worker_loop_survives_a_failed_iteration(app, monkeypatch):
+    from api.worker import run_loop
+
+    outcomes = [OperationalError('UPDATE job', {}, Exception('database is locked')), (7, 'done'), None]
+    calls = []
+
+    def next_job(worker_id, kinds):
+        calls.append(worker_id)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(jobs, 'run_next_job', next_job)
+    run_loop(app, 'worker', None, 0, True, [])
+    assert calls == ['worker'] * 3
+
+    # Only the stop flag ends a polling worker
+    run_loop(app, 'worker', None, 0, False, [True])
+    assert len(calls) == 3
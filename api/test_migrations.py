@@ -0,0 +1,60 @@
+from sqlalchemy import inspect, text
+
+from api.app_factory import db
+from api.models import Option, SchemaMigration
+from api.utils.migrations import MIGRATIONS, migrate
+from api.utils.search import LEGACY_TRIGGERS, search
+
+
+def test_migrate_adds_indexes_to_existing_database(app):
+    # Simulate a shopping.db created before the index set and the newer tables
+    with db.engine.begin() as connection:
+        for table in ('item', 'option', 'subcategory'):
+            for index in inspect(connection).get_indexes(table):
+                connection.execute(text(f'DROP INDEX {index["name"]}'))
+        connection.execute(text('DROP TABLE data_version'))
+
+    assert migrate() == [version for version, _, _ in MIGRATIONS]
+
+    inspector = inspect(db.engine)
+    option_indexes = {index['name'] for index in inspector.get_indexes('option')}
+    assert {'ix_option_item_id_selected', 'ix_option_selected_item_id', 'ux_option_item_id_selected'} <= option_indexes
+    assert 'ix_item_created_at_id' in {index['name'] for index in inspector.get_indexes('item')}
+    assert inspector.has_table('data_version')
+
+    # Already applied migrations are skipped
+    assert migrate() == []
+    assert SchemaMigration.query.count() == len(MIGRATIONS)
+
+
+def test_single_selection_migration_repairs_duplicates(app, client):
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    ids = [client.post('/api/options', json={'item_id': item_id, 'price': price}).get_json()['option']['id']
+           for price in (10, 20, 30)]
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ux_option_item_id_selected'))
+        connection.execute(text('UPDATE option SET selected = 1'))
+
+    assert 7 in migrate()
+
+    assert [row.selected for row in Option.query.order_by(Option.id)] == [True, False, False]
+    assert 'ux_option_item_id_selected' in {index['name'] for index in inspect(db.engine).get_indexes('option')}
+    assert client.get('/api/dashboard').get_json()['total_selected_cost'] == 10
+    assert ids[0] == Option.query.filter_by(selected=True).one().id
+
+
+def test_search_trigger_migration_drops_the_legacy_triggers(app, client):
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TRIGGER item_search_insert AFTER INSERT ON item BEGIN "
+            "INSERT INTO item_search (rowid, name) VALUES (new.id, search_normalize(new.name)); END"
+        ))
+    assert client.post('/api/items', json={'name': 'Kettle'}).status_code == 500
+    db.session.rollback()
+
+    assert 10 in migrate()
+
+    triggers = db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    assert not set(triggers) & set(LEGACY_TRIGGERS)
+    assert client.post('/api/items', json={'name': 'Kettle'}).status_code == 201
+    assert [hit['type'] for hit in search('kettle')] == ['item']
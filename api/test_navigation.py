@@ -0,0 +1,89 @@
+import pytest
+
+from api.utils import url_parser
+from api.utils.navigation import is_blocked, registrable_domain
+from api.utils.parse_stats import parse_stats, record_parse
+
+
+@pytest.mark.parametrize('resource_type, host, blocked', [
+    ('image', 'www.digikala.com', True),
+    ('font', 'fonts.gstatic.com', True),
+    ('media', 'cdn.example.com', True),
+    ('script', 'www.googletagmanager.com', True),
+    ('xhr', 'ua.yektanet.com', True),
+    ('script', 'widget.unlisted-chat.io', True),
+    ('stylesheet', 'cdn.example.com', True),
+    ('script', 'www.digikala.com', False),
+    ('fetch', 'api.digikala.com', False),
+    ('stylesheet', 'dkstatics-public.digikala.com', False),
+    ('script', 'cdn.jsdelivr.net', False),
+    ('script', 'notdigikala.com', True),
+])
+def test_is_blocked(resource_type, host, blocked):
+    assert is_blocked(resource_type, host, 'digikala.com') is blocked
+
+
+def test_configured_domains():
+    assert not is_blocked('script', 'static.partner.io', 'shop.example', allowed_domains=('partner.io',))
+    assert is_blocked('script', 'stats.shop.example', 'shop.example', blocked_domains=('stats.shop.example',))
+
+
+@pytest.mark.parametrize('host, domain', [
+    ('www.digikala.com', 'digikala.com'),
+    ('digikala.com', 'digikala.com'),
+    ('shop.example.co.ir', 'example.co.ir'),
+    ('m.media-amazon.com', 'media-amazon.com'),
+    ('127.0.0.1', '127.0.0.1'),
+    ('localhost', 'localhost'),
+])
+def test_registrable_domain(host, domain):
+    assert registrable_domain(host) == domain
+
+
+def test_site_profiles_wait_for_the_selectors_their_parser_reads():
+    parser, selectors = url_parser._site_profile('www.digikala.com')
+    assert parser is url_parser._parse_digikala
+    assert 'h1[data-testid="pdp-title"]' in selectors
+    assert url_parser._site_profile('shop.example')[0] is url_parser._parse_generic
+
+
+def test_parse_stats_average_per_domain_and_mode(app, client):
+    record_parse('shop.example', 'lean', {'total_ms': 100.0, 'navigate_ms': 60.0, 'bytes': 1000, 'blocked': 4})
+    record_parse('shop.example', 'lean', {'total_ms': 300.0, 'navigate_ms': 80.0, 'bytes': 3000, 'blocked': 6})
+    record_parse('shop.example', 'full', {'total_ms': 2000.0, 'bytes': 90000})
+
+    stats = {entry['mode']: entry for entry in parse_stats()}
+    assert stats['lean'] == {
+        'domain': 'shop.example', 'mode': 'lean', 'parses': 2,
+        'avg_total_ms': 200.0, 'avg_navigate_ms': 70.0, 'avg_bytes': 2000.0, 'avg_blocked': 5.0,
+    }
+    assert stats['full']['avg_bytes'] == 90000.0
+
+    response = client.get('/api/options/parse-stats')
+    assert [entry['mode'] for entry in response.get_json()['domains']] == ['full', 'lean']
+
+
+def test_static_parses_are_recorded(app, page_server):
+    url_parser.submit_product_url(f'{page_server.url}/jsonld_product.html').result(timeout=10)
+    [entry] = parse_stats()
+    assert (entry['domain'], entry['mode'], entry['parses']) == (page_server.url.split('://')[1], 'static', 1)
+    assert 'avg_fetch_ms' in entry
+
+
+def test_lean_navigation_blocks_images_and_third_parties(app, page_server, chromium):
+    # localhost is another site than the 127.0.0.1 the page is served from
+    third_party = page_server.url.replace('127.0.0.1', 'localhost')
+    page_server.pages['/gallery.html'] = (
+        '<html><head><title>Gallery</title>'
+        f'<script src="{third_party}/widget.js"></script></head><body>'
+        '<img src="/a.png"><img src="/b.png"><h1>Gallery Lamp</h1><p>Price: 1,000</p></body></html>'
+    )
+    app.config.update(STATIC_TIER_ENABLED=False, BROWSER_POOL_SIZE=1)
+    try:
+        result, timings = url_parser.submit_product_url(f'{page_server.url}/gallery.html').result(timeout=60)
+        assert timings['mode'] == 'lean'
+        assert timings['blocked'] == 3
+        assert 'wait_timed_out' not in timings
+        assert result['model_name'] == 'Gallery'
+    finally:
+        app.extensions['browser_pool'].close()
@@ -0,0 +1,142 @@
+import os
+from pathlib import Path
+
+from sqlalchemy import select
+
+from api.app_factory import db
+from api.models import Option, PageSnapshot, PriceHistory
+from api.utils import url_parser
+from api.utils.page_archive import PageArchive, archive_page, latest_snapshots
+from api.utils.parse_cache import canonical_url
+from api.utils.price_refresh import apply_parsed_prices
+from api.utils.reextract import reextract
+from api.utils.summary import check_summary
+
+FIXTURE_PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+
+
+def _blobs(root):
+    return [name for _, _, files in os.walk(os.path.join(root, 'objects')) for name in files]
+
+
+def _enable_archive(app, tmp_path):
+    app.config.update(PAGE_ARCHIVE_ENABLED=True, PAGE_ARCHIVE_DIR=str(tmp_path / 'archive'))
+    return str(tmp_path / 'archive')
+
+
+def test_archive_is_content_addressed(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    html = (FIXTURE_PAGES / 'jsonld_product.html').read_text(encoding='utf-8')
+    first = archive.put(html)
+    assert archive.put(html) == first
+    assert archive.put(html + '<!-- changed -->')[0] != first[0]
+    assert len(_blobs(tmp_path)) == 2
+    assert archive.get(first[0]) == html
+    assert 0 < archive.stored_bytes() < 2 * len(html.encode('utf-8'))
+
+
+def test_static_tier_archives_fetched_pages(app, page_server, tmp_path):
+    root = _enable_archive(app, tmp_path)
+    url = f'{page_server.url}/jsonld_product.html'
+    for _ in range(2):
+        url_parser._parse_static(url, url_parser.url_domain(url))
+
+    snapshots = PageSnapshot.query.order_by(PageSnapshot.id).all()
+    assert [(snapshot.source, snapshot.url_key) for snapshot in snapshots] == [('static', canonical_url(url))] * 2
+    assert len(_blobs(root)) == 1
+    assert [row.id for row in latest_snapshots()] == [snapshots[-1].id]
+
+    app.config['PAGE_ARCHIVE_ENABLED'] = False
+    url_parser._parse_static(url, url_parser.url_domain(url))
+    assert PageSnapshot.query.count() == 2
+
+
+def _archived_option(app, client, url, page, price, source='static'):
+    """An option saved from a parse of ``page`` that read ``price``, as an earlier parser did"""
+    # Parsed and archived first, then saved from the parse result, as the form does
+    archive_page(url, (FIXTURE_PAGES / page).read_text(encoding='utf-8'), source, {'price': price})
+    item_id = client.post('/api/items', json={'name': page}).get_json()['item']['id']
+    option_id = client.post('/api/options', json={'item_id': item_id, 'price': price, 'link': url}).get_json()['option']['id']
+    client.put(f'/api/options/{option_id}/select')
+    return option_id
+
+
+def test_reextract_updates_options_without_network(app, client, tmp_path):
+    _enable_archive(app, tmp_path)
+    kettle = _archived_option(app, client, 'https://shop.example/kettle', 'jsonld_product.html', 100)
+    lamp = _archived_option(app, client, 'https://lamps.example/desk?utm_campaign=x', 'opengraph_product.html', 200)
+    missing = _archived_option(app, client, 'https://shop.example/gone', 'jsonld_product.html', 300)
+    # Index row whose blob is not in the archive
+    PageSnapshot.query.filter_by(url='https://shop.example/gone').update({'sha256': '0' * 64})
+    db.session.commit()
+
+    stats = reextract(processes=0, batch_size=1, render=False)
+
+    assert (stats['snapshots'], stats['options'], stats['failed'], stats['items_changed']) == (3, 2, 1, 2)
+    db.session.expire_all()
+    assert db.session.get(Option, kettle).price == 2450000
+    assert (db.session.get(Option, lamp).price, db.session.get(Option, lamp).available) == (148000, False)
+    assert db.session.get(Option, missing).price == 300
+    history = PriceHistory.query.filter_by(option_id=kettle).order_by(PriceHistory.id).all()
+    assert [row.price for row in history] == [100, 2450000]
+    # Stamped when the page was fetched, not when it was re-read
+    assert history[-1].recorded_at == PageSnapshot.query.filter_by(url='https://shop.example/kettle').one().fetched_at
+    assert check_summary() == []
+
+
+def test_options_saved_from_an_archived_parse_are_reextracted(app, client, page_server, tmp_path, monkeypatch):
+    _enable_archive(app, tmp_path)
+    url = f'{page_server.url}/jsonld_product.html'
+    extract = url_parser.extract_structured
+    # The live parse ran an older parser that dropped a digit
+    monkeypatch.setattr(url_parser, 'extract_structured', lambda html: dict(extract(html), price=245000.0))
+    parsed, _ = url_parser._parse_static(url, url_parser.url_domain(url))
+    monkeypatch.setattr(url_parser, 'extract_structured', extract)
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    option_id = client.post('/api/options', json=dict(parsed, item_id=item_id, link=url)).get_json()['option']['id']
+
+    stats = reextract(processes=0, render=False)
+
+    assert (stats['options'], stats['outdated'], stats['items_changed']) == (1, 0, 1)
+    assert db.session.get(Option, option_id, populate_existing=True).price == 2450000
+    assert [row.price for row in PriceHistory.query.filter_by(option_id=option_id).order_by(PriceHistory.id)] == \
+        [245000, 2450000]
+
+
+def test_reextract_never_replays_an_older_snapshot(app, client, tmp_path):
+    _enable_archive(app, tmp_path)
+    edited = _archived_option(app, client, 'https://shop.example/kettle', 'jsonld_product.html', 100)
+    refreshed = _archived_option(app, client, 'https://shop.example/lamp', 'jsonld_product.html', 200)
+    # A newer price was entered, and another found by a refresh, after the pages were archived
+    client.put(f'/api/options/{edited}', json={'price': 2600000})
+    row = db.session.execute(
+        select(Option.id, Option.item_id, Option.price, Option.available).where(Option.id == refreshed)).one()
+    apply_parsed_prices([(row, {'price': 250})])
+
+    stats = reextract(processes=0, render=False)
+
+    assert (stats['options'], stats['outdated'], stats['items_changed']) == (0, 2, 0)
+    db.session.expire_all()
+    assert (db.session.get(Option, edited).price, db.session.get(Option, refreshed).price) == (2600000, 250)
+    assert [row.price for row in PriceHistory.query.filter_by(option_id=edited).order_by(PriceHistory.id)] == [100, 2600000]
+
+
+def test_reextract_in_process_pool(app, client, tmp_path):
+    _enable_archive(app, tmp_path)
+    ids = [_archived_option(app, client, f'https://shop{n}.example/kettle', 'jsonld_product.html', n + 1) for n in range(4)]
+
+    stats = reextract(processes=2, render=False)
+
+    assert (stats['snapshots'], stats['options'], stats['failed']) == (4, 4, 0)
+    db.session.expire_all()
+    assert {db.session.get(Option, option_id).price for option_id in ids} == {2450000}
+
+
+def test_reextract_renders_with_site_parsers_offline(app, client, tmp_path, chromium):
+    _enable_archive(app, tmp_path)
+    option_id = _archived_option(app, client, 'https://www.torob.com/p/6f1d2a/', 'torob_product.html', 1, source='browser')
+
+    stats = reextract(processes=0)
+
+    assert stats['failed'] == 0
+    assert db.session.get(Option, option_id, populate_existing=True).price == 94500000
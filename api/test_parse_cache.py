@@ -0,0 +1,147 @@
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.app_factory import db
+from api.models import Item, ParseCache
+from api.utils.parse_cache import canonical_url, flush_hits, submit_cached_parse, ttl_for
+
+
+@pytest.mark.parametrize('url, key', [
+    ('https://www.digikala.com/product/dkp-12345/%DA%A9%D8%AA%D8%B1%DB%8C/?utm_source=x', 'digikala.com:dkp-12345'),
+    ('https://digikala.com/product/DKP-12345/', 'digikala.com:dkp-12345'),
+    ('https://torob.com/p/0c5b1a2e-1111-4a2b-9c3d-123456789abc/some-slug/?ref=home', 'torob.com:0c5b1a2e-1111-4a2b-9c3d-123456789abc'),
+    ('https://www.amazon.com/Some-Product-Name/dp/b0abc12345/ref=sr_1_1?tag=aff-20', 'amazon.com:B0ABC12345'),
+    ('https://amazon.de/gp/product/B0ABC12345?psc=1', 'amazon.de:B0ABC12345'),
+    ('https://www.amazon.co.uk/dp/B0ABC12345', 'amazon.co.uk:B0ABC12345'),
+    # Look-alike hosts keep their full path rather than a store's product key
+    ('https://notdigikala.com/product/dkp-12345/', 'notdigikala.com/product/dkp-12345'),
+    ('https://digikala.com.evil.example/product/dkp-12345/', 'digikala.com.evil.example/product/dkp-12345'),
+    ('https://amazon.evil.example/dp/B0ABC12345', 'amazon.evil.example/dp/B0ABC12345'),
+    ('HTTPS://Shop.Example.com/items/42/?b=2&utm_campaign=spring&a=1&gclid=zz#reviews', 'shop.example.com/items/42?a=1&b=2'),
+])
+def test_canonical_url(url, key):
+    assert canonical_url(url) == key
+
+
+def test_canonical_url_rejects_relative_links():
+    with pytest.raises(ValueError):
+        canonical_url('/product/dkp-1')
+
+
+def test_ttl_for_uses_domain_overrides(app):
+    app.config.update(PARSE_CACHE_TTL=100, PARSE_CACHE_DOMAIN_TTLS={'digikala.com': 10})
+    assert ttl_for('digikala.com') == 10
+    assert ttl_for('api.digikala.com') == 10
+    assert ttl_for('notdigikala.com') == 100
+
+
+class FakeParser:
+    """Counts parses and resolves them immediately"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, url):
+        self.calls.append(url)
+        future = Future()
+        future.set_result(({'model_name': f'parse {len(self.calls)}', 'price': 10.0, 'link': url}, {'navigate_ms': 5.0}))
+        return future
+
+
+def _parse(url, parser, **kwargs):
+    return submit_cached_parse(url, submit=parser, **kwargs).result(timeout=5)
+
+
+def test_repeat_parses_are_served_from_cache(app):
+    parser = FakeParser()
+    data, timings = _parse('https://www.digikala.com/product/dkp-1/?utm_source=a', parser)
+    assert timings['cache'] == 'miss'
+
+    data, timings = _parse('https://digikala.com/product/dkp-1/slug', parser)
+    assert timings['cache'] == 'hit'
+    assert data == {'model_name': 'parse 1', 'price': 10.0, 'link': 'https://digikala.com/product/dkp-1/slug'}
+    assert len(parser.calls) == 1
+
+    entry = db.session.get(ParseCache, 'digikala.com:dkp-1')
+    assert 'link' not in entry.data
+    # Hits are written in batches, outside the caller's session
+    assert entry.hits == 0
+    flush_hits()
+    assert db.session.get(ParseCache, 'digikala.com:dkp-1', populate_existing=True).hits == 1
+
+
+def test_cache_hits_leave_the_callers_session_alone(app):
+    parser = FakeParser()
+    _parse('https://shop.example/p/4', parser)
+    db.session.add(Item(name='Unsaved'))
+    db.session.flush()
+    assert _parse('https://shop.example/p/4', parser)[1]['cache'] == 'hit'
+    db.session.rollback()
+    assert Item.query.count() == 0
+
+
+def test_force_refresh_parses_again(app):
+    parser = FakeParser()
+    _parse('https://torob.com/p/0c5b1a2e-1111-4a2b-9c3d-123456789abc/', parser)
+    data, timings = _parse('https://torob.com/p/0c5b1a2e-1111-4a2b-9c3d-123456789abc/', parser, force_refresh=True)
+    assert timings['cache'] == 'refresh'
+    assert data['model_name'] == 'parse 2'
+    assert db.session.get(ParseCache, 'torob.com:0c5b1a2e-1111-4a2b-9c3d-123456789abc').data['model_name'] == 'parse 2'
+
+
+def _age_entry(key, seconds):
+    db.session.get(ParseCache, key).fetched_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.session.commit()
+
+
+def test_stale_entries_are_served_while_revalidating(app):
+    app.config.update(PARSE_CACHE_TTL=60, PARSE_CACHE_DOMAIN_TTLS={}, PARSE_CACHE_STALE=600)
+    parser = FakeParser()
+    url = 'https://shop.example/p/1'
+    _parse(url, parser)
+    _age_entry('shop.example/p/1', 120)
+
+    data, timings = _parse(url, parser)
+    assert timings['cache'] == 'stale'
+    assert data['model_name'] == 'parse 1'
+    # The background parse replaced the entry
+    assert len(parser.calls) == 2
+    db.session.expire_all()
+    entry = db.session.get(ParseCache, 'shop.example/p/1')
+    assert entry.data['model_name'] == 'parse 2'
+    assert (datetime.utcnow() - entry.fetched_at).total_seconds() < 60
+
+    _age_entry('shop.example/p/1', 10_000)
+    assert _parse(url, parser)[1]['cache'] == 'miss'
+
+
+def test_incomplete_results_are_not_cached(app):
+    app.config.update(PARSE_CACHE_TTL=60, PARSE_CACHE_DOMAIN_TTLS={}, PARSE_CACHE_STALE=600)
+    results = iter([{'model_name': 'Lamp'}, {'model_name': 'Lamp', 'price': 10.0}, {'model_name': 'Lamp'}])
+
+    def parser(url):
+        future = Future()
+        future.set_result((dict(next(results), link=url), {}))
+        return future
+
+    url = 'https://shop.example/p/3'
+    assert _parse(url, parser)[1]['cache'] == 'miss'
+    assert db.session.get(ParseCache, 'shop.example/p/3') is None
+    assert _parse(url, parser) == ({'model_name': 'Lamp', 'price': 10.0, 'link': url}, {'cache': 'miss'})
+
+    # A refresh that comes back without a price keeps the complete entry
+    _age_entry('shop.example/p/3', 120)
+    assert _parse(url, parser)[1]['cache'] == 'stale'
+    db.session.expire_all()
+    assert db.session.get(ParseCache, 'shop.example/p/3').data['price'] == 10.0
+
+
+def test_parse_cache_stats_endpoint(app, client):
+    parser = FakeParser()
+    _parse('https://shop.example/p/2', parser)
+    _parse('https://shop.example/p/2?utm_medium=email', parser)
+
+    stats = client.get('/api/options/parse-cache').get_json()['stats']
+    assert (stats['miss'], stats['hit'], stats['entries']) == (1, 1, 1)
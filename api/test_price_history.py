@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from api.app_factory import db
+from api.models import Option, PriceHistory
+from api.utils.price_history import daily_series, record_prices
+
+
+def _history(option_id):
+    return [(row.price, row.available) for row in
+            PriceHistory.query.filter_by(option_id=option_id).order_by(PriceHistory.id)]
+
+
+def test_only_changes_are_recorded(app, client):
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    option_id = client.post('/api/options', json={'item_id': item_id, 'price': 100}).get_json()['option']['id']
+
+    client.put(f'/api/options/{option_id}', json={'notes': 'matte finish'})
+    client.put(f'/api/options/{option_id}', json={'price': 100})
+    client.put(f'/api/options/{option_id}', json={'price': 90})
+    client.put(f'/api/options/{option_id}', json={'available': False})
+    assert record_prices([option_id]) == 0
+    assert _history(option_id) == [(100, True), (90, True), (90, False)]
+
+    client.delete(f'/api/options/{option_id}')
+    assert _history(option_id) == []
+
+
+def test_daily_series_downsamples_in_sql(app, client):
+    item_id = client.post('/api/items', json={'name': 'Lamp'}).get_json()['item']['id']
+    first, second = (client.post('/api/options', json={'item_id': item_id, 'price': price}).get_json()['option']['id']
+                     for price in (50, 70))
+    PriceHistory.query.delete()
+    start = datetime(2026, 3, 1, 8)
+    changes = [
+        (first, start - timedelta(days=3), 55),          # before the window: opening value
+        (first, start, 50), (first, start + timedelta(hours=2), 40), (first, start + timedelta(hours=9), 45),
+        (first, start + timedelta(days=2), 60),
+        (second, start + timedelta(days=1), 70), (second, start + timedelta(days=1, hours=1), 75),
+    ]
+    db.session.add_all(PriceHistory(option_id=option_id, recorded_at=at, price=price, available=True)
+                       for option_id, at, price in changes)
+    db.session.commit()
+
+    statements = []
+
+    def count(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        series = daily_series([first, second], since=datetime(2026, 3, 1))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    by_option = {entry['option_id']: entry for entry in series}
+    assert by_option[first]['opening'] == {'price': 55, 'available': True}
+    assert [(p['date'], p['min'], p['max'], p['last'], p['changes']) for p in by_option[first]['points']] == [
+        ('2026-03-01', 40, 55, 45, 3),  # opened at 55 from before the window
+        ('2026-03-03', 45, 60, 60, 1),  # held 45 until the change
+    ]
+    assert by_option[second]['opening'] is None
+    assert [(p['date'], p['min'], p['max'], p['last']) for p in by_option[second]['points']] == [('2026-03-02', 70, 75, 75)]
+    # One query for the buckets and one for the opening values, however many rows
+    assert len(statements) == 2
+
+    response = client.get(f'/api/items/{item_id}/price-history?since=2026-03-02&until=2026-03-02').get_json()
+    assert [(entry['option_id'], len(entry['points'])) for entry in response['series']] == [(first, 0), (second, 1)]
+    assert response['series'][0]['opening']['price'] == 45
+
+    one = client.get(f'/api/options/{first}/price-history?since=2026-03-01').get_json()['series']
+    assert [point['last'] for point in one['points']] == [45, 60]
+
+
+def test_each_day_starts_at_the_price_carried_in(app, client):
+    item_id = client.post('/api/items', json={'name': 'Fan'}).get_json()['item']['id']
+    option_id = client.post('/api/options', json={'item_id': item_id, 'price': 100}).get_json()['option']['id']
+    PriceHistory.query.delete()
+    db.session.add_all(PriceHistory(option_id=option_id, recorded_at=at, price=price, available=True) for at, price in [
+        (datetime(2026, 4, 1, 9), 100),
+        (datetime(2026, 4, 2, 15), 120),
+        (datetime(2026, 4, 4, 10), 90), (datetime(2026, 4, 4, 12), 110),
+    ])
+    db.session.commit()
+
+    [series] = daily_series([option_id], since=datetime(2026, 4, 1))
+    assert [(p['date'], p['min'], p['max'], p['last']) for p in series['points']] == [
+        ('2026-04-01', 100, 100, 100),
+        ('2026-04-02', 100, 120, 120),
+        ('2026-04-04', 90, 120, 110),
+    ]
+    # The same day seen from a window that starts on it opens at the previous close
+    [series] = daily_series([option_id], since=datetime(2026, 4, 2))
+    assert (series['points'][0]['min'], series['points'][0]['max']) == (100, 120)
+
+
+def test_price_history_rejects_bad_ranges(app, client):
+    item_id = client.post('/api/items', json={'name': 'Fan'}).get_json()['item']['id']
+    option_id = client.post('/api/options', json={'item_id': item_id, 'price': 10}).get_json()['option']['id']
+    assert client.get(f'/api/options/{option_id}/price-history?days=0').status_code == 400
+    assert client.get(f'/api/options/{option_id}/price-history?since=yesterday').status_code == 400
+    assert client.get(f'/api/items/{item_id}/price-history?since=2026-03-05&until=2026-03-01').status_code == 400
+    assert client.get('/api/options/999/price-history').status_code == 404
+
+    points = client.get(f'/api/options/{option_id}/price-history').get_json()['series']['points']
+    assert [(point['last'], point['changes']) for point in points] == [(10, 1)]
+    assert Option.query.count() == 1
@@ -0,0 +1,198 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+
+from sqlalchemy import event, select
+
+from api.app_factory import db
+from api.models import Job, Option, PriceHistory
+from api.utils.batch_parser import iter_parsed
+from api.utils.jobs import run_next_job
+from api.utils.price_refresh import apply_parsed_prices, refresh_tick, schedule_refresh
+from api.utils.summary import check_summary
+from api.utils.url_parser import url_domain
+from api.utils.versioning import current_versions, item_scope
+
+
+def _add_option(client, item_id, link, price, checked_days_ago, selected=False):
+    option_id = client.post('/api/options', json={'item_id': item_id, 'price': price, 'link': link}).get_json()['option']['id']
+    if selected:
+        client.put(f'/api/options/{option_id}/select')
+    option = db.session.get(Option, option_id)
+    option.last_checked = None if checked_days_ago is None else date.today() - timedelta(days=checked_days_ago)
+    db.session.commit()
+    return option_id
+
+
+def _prices(prices, parsed):
+    def submit(url, force_refresh=False):
+        parsed.append(url)
+        future = Future()
+        if prices[url] is None:
+            future.set_exception(RuntimeError('store unavailable'))
+        else:
+            future.set_result(({'price': prices[url], 'available': True}, {}))
+        return future
+    return submit
+
+
+def test_refresh_updates_stale_options_in_one_pass(app, client):
+    item_id = client.post('/api/items', json={'name': 'Kettle', 'budget': 500}).get_json()['item']['id']
+    stale = _add_option(client, item_id, 'https://a.example/kettle', 100, 3, selected=True)
+    never = _add_option(client, item_id, 'https://b.example/kettle', 200, None)
+    fresh = _add_option(client, item_id, 'https://c.example/kettle', 300, 0)
+    broken = _add_option(client, item_id, 'https://d.example/kettle', 400, 5)
+    version = current_versions(item_scope(item_id))
+
+    parsed = []
+    prices = {'https://a.example/kettle': 120, 'https://b.example/kettle': 200, 'https://d.example/kettle': None}
+    stats = refresh_tick(submit=_prices(prices, parsed))
+
+    assert sorted(parsed) == sorted(prices)
+    assert (stats['checked'], stats['refreshed'], stats['failed'], stats['items_changed']) == (3, 2, 1, 1)
+    assert stats['next_after_id'] is None
+    db.session.expire_all()
+    options = {option_id: db.session.get(Option, option_id) for option_id in (stale, never, fresh, broken)}
+    assert options[stale].price == 120 and options[stale].last_checked == date.today()
+    assert options[never].price == 200 and options[never].last_checked == date.today()
+    assert options[fresh].price == 300
+    # A failed parse leaves the option due for the next run
+    assert options[broken].last_checked == date.today() - timedelta(days=5)
+
+    history = PriceHistory.query.filter_by(option_id=stale).order_by(PriceHistory.id)
+    assert [row.price for row in history] == [100, 120]
+    assert PriceHistory.query.filter_by(option_id=never).count() == 1
+
+    assert check_summary() == []
+    assert client.get('/api/dashboard').get_json()['total_selected_cost'] == 120
+    assert current_versions(item_scope(item_id)) != version
+
+
+def test_refresh_keeps_edits_made_while_parsing(app, client):
+    item_id = client.post('/api/items', json={'name': 'Kettle'}).get_json()['item']['id']
+    edited = _add_option(client, item_id, 'https://a.example/kettle', 100, 3, selected=True)
+    untouched = _add_option(client, item_id, 'https://b.example/kettle', 100, 3)
+
+    def submit(url, force_refresh=False):
+        if url == 'https://a.example/kettle':
+            # Someone saves a new price while the store page is being fetched
+            client.put(f'/api/options/{edited}', json={'price': 250})
+        future = Future()
+        future.set_result(({'price': 120, 'available': True}, {}))
+        return future
+
+    stats = refresh_tick(submit=submit)
+
+    assert stats['items_changed'] == 1
+    db.session.expire_all()
+    assert db.session.get(Option, edited).price == 250
+    assert db.session.get(Option, untouched).price == 120
+    assert db.session.get(Option, edited).last_checked == date.today()
+    assert [row.price for row in PriceHistory.query.filter_by(option_id=edited).order_by(PriceHistory.id)] == [100, 250]
+    assert check_summary() == []
+    assert client.get('/api/dashboard').get_json()['total_selected_cost'] == 250
+
+
+def test_parsed_prices_are_written_in_batched_updates(app, client):
+    item_id = client.post('/api/items', json={'name': 'Lamp'}).get_json()['item']['id']
+    ids = [_add_option(client, item_id, f'https://shop{n}.example/lamp', 100 + n, 3) for n in range(20)]
+    rows = db.session.execute(
+        select(Option.id, Option.item_id, Option.price, Option.available).where(Option.id.in_(ids))).all()
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE option'):
+            statements.append(executemany)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        apply_parsed_prices([(row, {'price': row.price * 2, 'available': row.id % 2 == 0}) for row in rows],
+                            checked_on=date.today())
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    # last_checked, then one executemany per set of changed columns (price, or price and availability)
+    assert statements == [True, True, True]
+    db.session.expire_all()
+    assert [db.session.get(Option, option_id).price for option_id in ids] == [2 * (100 + n) for n in range(20)]
+
+
+def test_refresh_ticks_resume_after_the_last_option(app, client):
+    item_id = client.post('/api/items', json={'name': 'Lamp'}).get_json()['item']['id']
+    links = [f'https://shop.example/lamp/{n}' for n in range(5)]
+    ids = [_add_option(client, item_id, link, 10, 7) for link in links]
+    app.config['PRICE_REFRESH_BATCH'] = 2
+    app.config['PRICE_REFRESH_DOMAIN_INTERVAL'] = 0
+    prices = {link: 11 for link in links}
+    parsed = []
+
+    after_id, ticks = 0, 0
+    while after_id is not None:
+        stats = refresh_tick(after_id=after_id, submit=_prices(prices, parsed))
+        assert stats['checked'] <= 2
+        after_id = stats['next_after_id']
+        ticks += 1
+    assert ticks == 3
+    assert parsed == links
+    assert {db.session.get(Option, option_id).price for option_id in ids} == {11}
+
+
+def test_refresh_runs_as_self_continuing_jobs(app, client, monkeypatch):
+    from api.utils import parse_cache
+
+    item_id = client.post('/api/items', json={'name': 'Fan'}).get_json()['item']['id']
+    links = [f'https://shop.example/fan/{n}' for n in range(3)]
+    for link in links:
+        _add_option(client, item_id, link, 50, 2)
+    app.config.update(PRICE_REFRESH_BATCH=2, PRICE_REFRESH_DOMAIN_INTERVAL=0)
+    monkeypatch.setattr(parse_cache, 'submit_cached_parse', _prices({link: 45 for link in links}, []))
+
+    first = schedule_refresh()
+    assert first is not None
+    assert schedule_refresh() is None
+
+    assert run_next_job('test', kinds=['refresh']) == (first, 'done')
+    assert run_next_job('test', kinds=['refresh'])[1] == 'done'
+    assert run_next_job('test', kinds=['refresh']) is None
+    results = [job.result for job in Job.query.filter_by(kind='refresh').order_by(Job.id)]
+    assert [result['refreshed'] for result in results] == [2, 1]
+    assert results[1]['next_after_id'] is None
+    assert Option.query.filter(Option.price == 45).count() == 3
+    # The run is finished, so the next schedule starts a new one
+    assert schedule_refresh() is not None
+
+
+def test_a_tick_run_twice_queues_one_continuation(app, client, monkeypatch):
+    from api.utils import parse_cache
+    from api.utils.price_refresh import refresh_job
+
+    item_id = client.post('/api/items', json={'name': 'Fan'}).get_json()['item']['id']
+    links = [f'https://shop.example/fan/{n}' for n in range(3)]
+    for link in links:
+        _add_option(client, item_id, link, 50, 2)
+    app.config.update(PRICE_REFRESH_BATCH=2, PRICE_REFRESH_DOMAIN_INTERVAL=0)
+    monkeypatch.setattr(parse_cache, 'submit_cached_parse', _prices({link: 45 for link in links}, []))
+
+    # A reclaimed tick runs again while its first copy is still going
+    refresh_job({'run': 'r1', 'after_id': 0})
+    Option.query.update({Option.last_checked: date.today() - timedelta(days=2)})
+    db.session.commit()
+    refresh_job({'run': 'r1', 'after_id': 0})
+    assert [job.payload for job in Job.query.filter_by(kind='refresh')] == [{'run': 'r1', 'after_id': 2}]
+
+
+def test_iter_parsed_spaces_starts_on_one_domain():
+    starts = {}
+
+    def parse(url):
+        starts.setdefault(url_domain(url), []).append(time.monotonic())
+        return {'link': url}, {}
+
+    urls = [f'https://{host}.example/p{n}' for n in range(3) for host in ('a', 'b')]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outcomes = list(iter_parsed(urls, lambda url: executor.submit(parse, url), url_domain,
+                                    concurrency=4, per_domain=2, min_interval=0.05))
+
+    assert len(outcomes) == len(urls) and all(outcome.error is None for outcome in outcomes)
+    for times in starts.values():
+        assert len(times) == 3
+        assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from api.app_factory import db
+from api.models import Category, Subcategory, Item, Option
+from api.utils.summary import rebuild_summary
+
+# A bare "SCAN <table>" (no "USING ... INDEX") is a full table scan
+TABLE_SCAN = re.compile(r'^SCAN (\w+)(?! USING)( |$)')
+
+
+@pytest.fixture
+def seeded(app):
+    kitchen = Category(name="آشپزخانه")
+    db.session.add(kitchen)
+    db.session.flush()
+    stove = Subcategory(name="اجاق گاز", category_id=kitchen.id)
+    db.session.add(stove)
+    db.session.flush()
+    for i in range(60):
+        item = Item(name=f"item {i}", room="آشپزخانه" if i % 2 else "نشیمن", budget=i * 10,
+                    category_id=kitchen.id if i % 3 else None,
+                    subcategory_id=stove.id if i % 3 else None)
+        db.session.add(item)
+        db.session.flush()
+        for j in range(3):
+            db.session.add(Option(item_id=item.id, price=j * 100, selected=(j == 0 and i % 4 == 0)))
+    rebuild_summary()
+    db.session.commit()
+    return {'item_id': item.id, 'option_id': Option.query.filter_by(item_id=item.id).first().id}
+
+
+def _plans(client, method, url, **kwargs):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = getattr(client, method)(url, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    plans = []
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+@pytest.mark.parametrize('method, url', [
+    ('get', '/api/items/{item_id}'),
+    ('get', '/api/items?category_id=1&limit=5'),
+    ('get', '/api/items?subcategory_id=1&limit=5'),
+    ('get', '/api/items?room=نشیمن&limit=5'),
+    ('get', '/api/items?has_selection=true&limit=5'),
+    ('get', '/api/items?sort=-created_at&limit=5'),
+    ('get', '/api/dashboard?category=آشپزخانه&subcategory=اجاق گاز&limit=5'),
+    ('put', '/api/options/{option_id}/select'),
+    ('put', '/api/options/{option_id}/unselect'),
+])
+def test_hot_paths_use_indexes(seeded, client, method, url):
+    url = url.format(**seeded)
+    # Warm the in-process caches so only per-request queries are checked
+    client.get('/api/dashboard')
+
+    for statement, plan in _plans(client, method, url):
+        scans = [line for line in plan if TABLE_SCAN.match(line)]
+        assert not scans, f"{url}: full table scan {scans} for\n{statement}"
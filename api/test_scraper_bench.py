@@ -0,0 +1,51 @@
+import copy
+import json
+from pathlib import Path
+
+from api.utils.scraper_bench import compare, field_matches, load_corpus, percentile, run_benchmark, score
+
+FIXTURE_PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+
+
+def test_scoring_normalizes_text_and_numbers():
+    assert field_matches(18900000, '18900000')
+    assert field_matches('Ninja  BN701 ', 'ninja bn701')
+    assert not field_matches(109, None)
+    assert not field_matches(109, 'n/a')
+    assert score({'price': 10, 'brand': 'Bosch'}, {'price': 10.0, 'brand': 'Siemens'}) == (1, 2, {'brand': 'Siemens'})
+    assert percentile([5, 1, 4, 2, 3], 0.5) == 3
+    assert percentile(list(range(1, 101)), 0.95) == 95
+
+
+def test_corpus_covers_every_parser():
+    cases = load_corpus(FIXTURE_PAGES)
+    assert {case.parser for case in cases} == {'digikala', 'torob', 'amazon', 'generic'}
+    assert all((FIXTURE_PAGES / case.page).exists() for case in cases)
+
+
+def test_static_tier_report_and_regressions(app, page_server):
+    report = run_benchmark(page_server.url, load_corpus(FIXTURE_PAGES), tiers=('static',), repeat=3, version='test')
+    json.dumps(report)
+    static = {parser: tiers['static'] for parser, tiers in report['parsers'].items()}
+    assert static['digikala']['accuracy'] == 1.0
+    # Everything but the client-rendered price
+    assert static['generic']['accuracy'] == 7 / 8
+    assert all(stats['errors'] == 0 and stats['p50_ms'] <= stats['p95_ms'] for stats in static.values())
+    assert all(len(case['latencies_ms']) == 3 and case['peak_kib'] > 0 for case in report['cases'])
+
+    assert compare(report, report) == []
+    worse = copy.deepcopy(report)
+    worse['parsers']['digikala']['static']['accuracy'] = 0.75
+    worse['parsers']['torob']['static']['p95_ms'] = report['parsers']['torob']['static']['p95_ms'] * 2 + 10
+    assert [line.split(':')[0] for line in compare(report, worse)] == ['digikala/static', 'torob/static']
+
+
+def test_site_parsers_extract_every_expected_field(app, page_server, chromium):
+    cases = [case for case in load_corpus(FIXTURE_PAGES) if case.parser != 'generic']
+    app.config['BROWSER_POOL_SIZE'] = 1
+    try:
+        report = run_benchmark(page_server.url, cases, tiers=('browser-lean', 'browser-full'), repeat=1)
+    finally:
+        app.extensions['browser_pool'].close()
+    for case in report['cases']:
+        assert (case['page'], case['tier'], case['missed'], case['error']) == (case['page'], case['tier'], {}, None)
@@ -0,0 +1,139 @@
+import re
+import sqlite3
+
+from sqlalchemy import event, insert, text
+
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.search import create_search_index, normalize_text, search
+
+# A bare "SCAN <table>" of a base table is a full table scan; FTS lookups show as VIRTUAL TABLE
+TABLE_SCAN = re.compile(r'^SCAN (\w+)(?! USING| VIRTUAL TABLE)( |$)')
+
+
+def _found(query, kind='all'):
+    return [(hit['type'], hit[hit['type']]['id']) for hit in search(query, kind)]
+
+
+def _item(client, **data):
+    return client.post('/api/items', json=data).get_json()['item']['id']
+
+
+def _option(client, item_id, **data):
+    return client.post('/api/options', json=dict(data, item_id=item_id)).get_json()['option']['id']
+
+
+def test_normalization_folds_persian_variants():
+    assert normalize_text('يخچال كوچك') == normalize_text('یخچال کوچک')
+    assert normalize_text('مُبِل') == 'مبل'
+    assert normalize_text('۵۵ اینچ') == normalize_text('٥٥ اینچ') == '55 اینچ'
+    assert normalize_text('کتاب‌ها').split() == ['کتاب', 'ها']
+    assert normalize_text('ＮＩＮＪＡ Bn701') == 'ninja bn701'
+
+
+def test_search_matches_persian_spellings(app, client):
+    fridge = _item(client, name='يخچال كوچك', room='آشپزخانه')
+    tv = _item(client, name='تلویزیون', notes='برای اتاق‌خواب')
+    samsung = _option(client, tv, brand='سامسونگ', model_name='QA55Q60', features='۵۵ اینچ، 4K')
+
+    assert _found('یخچال کوچک') == [('item', fridge)]
+    assert _found('یخچ') == [('item', fridge)]
+    assert _found('اتاق') == [('item', tv)]
+    assert _found('55 اینچ') == [('option', samsung)]
+    assert _found('qa55') == [('option', samsung)]
+    assert _found('تلویزیون سامسونگ') == []
+
+    response = client.get('/api/search', query_string={'q': 'سامسونگ', 'type': 'option'})
+    hit = response.get_json()['results'][0]
+    assert (hit['option']['item_id'], hit['option']['item_name']) == (tv, 'تلویزیون')
+    assert client.get('/api/search').status_code == 400
+    assert client.get('/api/search?q=x&type=room').status_code == 400
+
+
+def test_results_are_ranked(app, client):
+    in_notes = _item(client, name='Lamp', notes='goes next to the desk')
+    in_name = _item(client, name='Desk')
+    option = _option(client, in_notes, brand='Ikea', notes='desk clamp')
+
+    assert _found('desk')[0] == ('item', in_name)
+    assert set(_found('desk')) == {('item', in_name), ('item', in_notes), ('option', option)}
+    scores = [hit['score'] for hit in search('desk')]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_index_follows_every_write_path(app, client):
+    item_id = _item(client, name='Kettle')
+    option_id = _option(client, item_id, brand='Bosch')
+
+    client.put(f'/api/options/{option_id}', json={'brand': 'Philips', 'price': 10})
+    assert (_found('bosch'), _found('philips')) == ([], [('option', option_id)])
+    client.put(f'/api/items/{item_id}', json={'name': 'Toaster'})
+    assert (_found('kettle'), _found('toaster')) == ([], [('item', item_id)])
+
+    client.post('/api/batch', json={'operations': [
+        {'op': 'create', 'type': 'item', 'ref': 'rug', 'data': {'name': 'Rug'}},
+        {'op': 'create', 'type': 'option', 'data': {'item_id': '$rug', 'brand': 'Carpetland'}},
+    ]})
+    assert [hit_type for hit_type, _ in _found('carpet')] == ['option']
+
+    client.delete(f'/api/items/{item_id}')
+    assert _found('toaster') == _found('philips') == []
+
+    # A rebuild from the live rows gives the same answers
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    assert _found('carpet rug') == [] and len(_found('carpet')) == 1
+
+
+def test_other_sqlite_clients_can_still_write(app, client):
+    item_id = _item(client, name='Kettle')
+    db.session.remove()
+    # No app-registered SQL functions are needed to write the tables
+    connection = sqlite3.connect(db.engine.url.database)
+    with connection:
+        connection.execute("INSERT INTO option (item_id, brand, selected, available) VALUES (?, 'Bosch', 0, 1)", (item_id,))
+        connection.execute("UPDATE item SET name = 'Toaster' WHERE id = ?", (item_id,))
+    connection.close()
+    assert _found('bosch') == [] and _found('kettle') == [('item', item_id)]
+
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    assert [hit_type for hit_type, _ in _found('bosch')] == ['option'] and _found('toaster') == [('item', item_id)]
+
+
+def test_search_stays_fast_at_100k_options(app):
+    item_ids = db.session.execute(
+        insert(Item).returning(Item.id), [{'name': f'Item {n}', 'room': 'kitchen'} for n in range(1000)]
+    ).scalars().all()
+    brands = ['Bosch', 'Philips', 'سامسونگ', 'ال‌جی', 'Tefal']
+    db.session.execute(insert(Option), [
+        {'item_id': item_ids[n % 1000], 'brand': brands[n % 5], 'model_name': f'MX{n}',
+         'features': 'stainless steel, 2 year warranty', 'notes': 'compared in store'}
+        for n in range(100_000)
+    ])
+    db.session.commit()
+    # Core bulk inserts bypass the write paths; a rebuild indexes them
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+    assert db.session.execute(text("SELECT count(*) FROM option_search")).scalar() == 100_000
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        for query in ('mx4242', 'ال جی mx99', 'bosch mx1', 'سامسونگ'):
+            assert search(query, limit=20)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert search('mx4242', 'option')[0]['option']['model_name'] == 'MX4242'
+
+    # Two ranked index lookups plus one id fetch per kind found, however many rows there are
+    assert len(statements) <= 4 * 4, statements
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            scans = [line for line in plan if TABLE_SCAN.match(line)]
+            assert not scans, f"full table scan {scans} for\n{statement}"
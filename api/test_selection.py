@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from api.app_factory import db
+from api.models import Option
+from api.utils.summary import check_summary
+
+
+def _options(client, prices):
+    item_id = client.post('/api/items', json={'name': 'Kettle', 'budget': 100}).get_json()['item']['id']
+    return item_id, [client.post('/api/options', json={'item_id': item_id, 'price': price}).get_json()['option']['id']
+                     for price in prices]
+
+
+def test_select_returns_selection_and_totals(app, client):
+    item_id, (first, second) = _options(client, (40, 60))
+    client.put(f'/api/options/{first}/select')
+
+    body = client.put(f'/api/options/{second}/select').get_json()
+
+    assert body['selection'] == {'item_id': item_id, 'selected_option_id': second,
+                                 'unselected_option_ids': [first], 'status': 'selected'}
+    assert body['totals'] == {'total_items': 1, 'items_with_choice': 1, 'completion': 100,
+                              'total_selected_cost': 60, 'total_budget': 100}
+    assert [o.selected for o in Option.query.order_by(Option.id)] == [False, True]
+
+    body = client.put(f'/api/options/{second}/unselect').get_json()
+    assert body['selection']['status'] == 'not_selected'
+    assert (body['totals']['items_with_choice'], body['totals']['total_selected_cost']) == (0, 0)
+    assert check_summary() == []
+
+
+def test_database_allows_one_selected_option_per_item(app, client):
+    item_id, (first, second) = _options(client, (40, 60))
+    client.put(f'/api/options/{first}/select')
+
+    with pytest.raises(IntegrityError):
+        db.session.execute(update(Option).where(Option.id == second).values(selected=True))
+        db.session.flush()
+    db.session.rollback()
+
+    # Unselected options of the item are unaffected by the index
+    assert client.put(f'/api/options/{first}/unselect').status_code == 200
+    assert client.put(f'/api/options/{second}/select').status_code == 200
+    assert Option.query.filter_by(item_id=item_id, selected=True).one().id == second
@@ -0,0 +1,111 @@
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from api.utils import url_parser
+from api.utils.structured_data import extract_structured, is_complete, parse_price
+
+FIXTURE_PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+
+
+def _fixture(name):
+    return (FIXTURE_PAGES / name).read_text(encoding='utf-8')
+
+
+def test_json_ld_product_and_offer():
+    result = extract_structured(_fixture('jsonld_product.html'))
+    assert result == {
+        'model_name': 'کتری برقی فیلیپس مدل HD9350',
+        'brand': 'Philips',
+        'price': 2450000.0,
+        'currency': 'IRT',
+        'available': True,
+        'store': 'فروشگاه نمونه',
+        'rating': 4.4,
+    }
+    assert is_complete(result)
+
+
+def test_opengraph_product_meta():
+    result = extract_structured(_fixture('opengraph_product.html'))
+    assert result['model_name'] == 'Desk Lamp LED 12W'
+    assert result['brand'] == 'Lumina'
+    # Quoted in rial, returned in toman
+    assert result['price'] == 148000.0
+    assert result['currency'] == 'IRT'
+    assert result['available'] is False
+    assert is_complete(result)
+
+
+def test_rial_offers_are_converted_to_toman():
+    page = _fixture('digikala_product.html')
+    assert extract_structured(page)['price'] == 18900000.0
+    result = extract_structured(page.replace('"IRT"', '"IRR"'))
+    assert (result['price'], result['currency']) == (1890000.0, 'IRT')
+    assert is_complete(result)
+
+
+def test_unknown_currencies_leave_the_price_to_the_browser():
+    result = extract_structured(_fixture('digikala_product.html').replace('"IRT"', '"USD"'))
+    assert 'price' not in result and 'currency' not in result
+    assert result['model_name'] == 'جاروبرقی بوش مدل BGS41POW'
+    assert not is_complete(result)
+
+
+def test_page_without_structured_data_is_incomplete():
+    result = extract_structured(_fixture('rendered_only.html'))
+    assert result == {'model_name': 'یخچال ساید بای ساید'}
+    assert not is_complete(result)
+
+
+@pytest.mark.parametrize('value, price', [
+    ('1,250,000', 1250000.0),
+    ('۱۲۵۰۰۰۰ تومان', 1250000.0),
+    (99.5, 99.5),
+    ('call us', None),
+    (None, None),
+])
+def test_parse_price(value, price):
+    assert parse_price(value) == price
+
+
+def test_static_tier_satisfies_structured_pages(app, page_server, monkeypatch):
+    monkeypatch.setattr(url_parser, '_submit_browser', lambda url, domain: pytest.fail('browser tier used'))
+    result, timings = url_parser.submit_product_url(f'{page_server.url}/jsonld_product.html').result(timeout=10)
+    assert timings['tier'] == 'static'
+    assert {'fetch_ms', 'extract_ms', 'total_ms'} <= set(timings)
+    assert result['price'] == 2450000.0
+    assert result['link'] == f'{page_server.url}/jsonld_product.html'
+
+
+def test_missing_fields_fall_back_to_browser(app, page_server, monkeypatch):
+    rendered = []
+
+    def browser(url, domain):
+        rendered.append(url)
+        future = Future()
+        future.set_result(({'model_name': None, 'price': 98500000.0, 'link': url}, {'navigate_ms': 900.0}))
+        return future
+
+    monkeypatch.setattr(url_parser, '_submit_browser', browser)
+    result, timings = url_parser.submit_product_url(f'{page_server.url}/rendered_only.html').result(timeout=10)
+    assert rendered == [f'{page_server.url}/rendered_only.html']
+    assert timings['tier'] == 'browser'
+    assert timings['static_ms'] is not None
+    # The static tier's title fills the field the rendered parse missed
+    assert result['model_name'] == 'یخچال ساید بای ساید'
+    assert result['price'] == 98500000.0
+
+
+def test_unreachable_static_tier_falls_back_to_browser(app, page_server, monkeypatch):
+    monkeypatch.setattr(url_parser, '_submit_browser', lambda url, domain: _resolved({'price': 1.0, 'model_name': 'x'}))
+    result, timings = url_parser.submit_product_url(f'{page_server.url}/missing.html').result(timeout=10)
+    assert timings['tier'] == 'browser'
+    assert result['model_name'] == 'x'
+
+
+def _resolved(result):
+    future = Future()
+    future.set_result((result, {}))
+    return future
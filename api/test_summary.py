@@ -0,0 +1,49 @@
+from api.app_factory import db
+from api.models import Category, DashboardSummary
+from api.utils.summary import check_summary, rebuild_summary
+
+
+def test_write_paths_keep_summary_in_sync(app, client):
+    kitchen = Category(name="آشپزخانه")
+    db.session.add(kitchen)
+    db.session.commit()
+
+    fridge = client.post('/api/items', json={'name': "یخچال", 'budget': 100,
+                                             'category_id': kitchen.id}).get_json()['item']
+    lamp = client.post('/api/items', json={'name': "لامپ", 'budget': 20}).get_json()['item']
+    first = client.post('/api/options', json={'item_id': fridge['id'], 'price': 80}).get_json()['option']
+    second = client.post('/api/options', json={'item_id': fridge['id'], 'price': 90}).get_json()['option']
+    client.post('/api/options', json={'item_id': lamp['id'], 'price': 15})
+
+    client.put(f"/api/options/{first['id']}/select")
+    client.put(f"/api/options/{second['id']}/select")
+    client.put(f"/api/options/{second['id']}", json={'price': 95})
+    client.put(f"/api/items/{lamp['id']}", json={'category_id': kitchen.id, 'budget': 25})
+    assert check_summary() == []
+
+    data = client.get('/api/dashboard').get_json()
+    assert data['total_items'] == 2
+    assert data['items_with_choice'] == 1
+    assert data['total_selected_cost'] == 95
+    assert data['total_budget'] == 125
+
+    client.put(f"/api/options/{second['id']}/unselect")
+    client.delete(f"/api/items/{fridge['id']}")
+    assert check_summary() == []
+    category_row = db.session.get(DashboardSummary, DashboardSummary.category_key(kitchen.id),
+                                  populate_existing=True)
+    assert category_row.total_items == 1
+    assert category_row.total_budget == 25
+
+
+def test_rebuild_repairs_drift(app):
+    rebuild_summary()
+    db.session.commit()
+    total = db.session.get(DashboardSummary, DashboardSummary.TOTAL_KEY)
+    total.total_items = 42
+    db.session.commit()
+    assert check_summary() == [(DashboardSummary.TOTAL_KEY, 'total_items', 42, 0)]
+
+    rebuild_summary()
+    db.session.commit()
+    assert check_summary() == []
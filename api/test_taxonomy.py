@@ -0,0 +1,49 @@
+from api.app_factory import db
+from api.models import Category, Subcategory, Item
+
+
+def _seed():
+    ids = {}
+    for name in ("حمام و سرویس", "نظافت"):
+        category = Category(name=name)
+        db.session.add(category)
+        db.session.flush()
+        # "مواد شوینده" is seeded under both categories
+        detergent = Subcategory(name="مواد شوینده", category_id=category.id)
+        db.session.add(detergent)
+        db.session.flush()
+        db.session.add(Item(name=f"شوینده {name}", category_id=category.id, subcategory_id=detergent.id))
+        ids[name] = (category.id, detergent.id)
+    db.session.commit()
+    return ids
+
+
+def test_taxonomy_counts_and_cache_headers(app, client):
+    ids = _seed()
+    response = client.get('/api/taxonomy')
+    assert response.status_code == 200
+    # Item counts change with every write, so the body is revalidated rather than kept
+    assert response.headers['Cache-Control'] == 'no-cache'
+    data = response.get_json()
+    cleaning = next(cat for cat in data['categories'] if cat['name'] == "نظافت")
+    assert cleaning['item_count'] == 1
+    assert cleaning['subcategories'] == [{'id': ids["نظافت"][1], 'name': "مواد شوینده", 'item_count': 1}]
+
+    etag = response.headers['ETag']
+    assert client.get('/api/taxonomy', headers={'If-None-Match': etag}).status_code == 304
+    client.post('/api/items', json={'name': "جارو", 'category_id': ids["نظافت"][0]})
+    refreshed = client.get('/api/taxonomy', headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    cleaning = next(cat for cat in refreshed.get_json()['categories'] if cat['name'] == "نظافت")
+    assert cleaning['item_count'] == 2
+
+
+def test_dashboard_subcategory_filter_is_scoped_to_category(app, client):
+    ids = _seed()
+    data = client.get('/api/dashboard', query_string={
+        'category': "نظافت", 'subcategory': "مواد شوینده"}).get_json()
+    assert [item['subcategory_id'] for item in data['items']] == [ids["نظافت"][1]]
+
+    # Without a category both same-named subcategories match
+    data = client.get('/api/dashboard', query_string={'subcategory': "مواد شوینده"}).get_json()
+    assert len(data['items']) == 2
@@ -0,0 +1,39 @@
+from sqlalchemy import event
+
+from api.app_factory import db
+
+
+def test_conditional_get_item_detail(app, client):
+    item_id = client.post('/api/items', json={'name': "یخچال"}).get_json()['item']['id']
+
+    first = client.get(f'/api/items/{item_id}')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        cached = client.get(f'/api/items/{item_id}', headers={'If-None-Match': etag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert len(statements) == 1
+
+    client.post('/api/options', json={'item_id': item_id, 'price': 10})
+    changed = client.get(f'/api/items/{item_id}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_item_versions_are_independent(app, client):
+    first_id = client.post('/api/items', json={'name': "یخچال"}).get_json()['item']['id']
+    second_id = client.post('/api/items', json={'name': "لامپ"}).get_json()['item']['id']
+    first_etag = client.get(f'/api/items/{first_id}').headers['ETag']
+    dashboard_etag = client.get('/api/dashboard').headers['ETag']
+
+    client.put(f'/api/items/{second_id}', json={'notes': "LED"})
+
+    assert client.get(f'/api/items/{first_id}', headers={'If-None-Match': first_etag}).status_code == 304
+    assert client.get('/api/dashboard', headers={'If-None-Match': dashboard_etag}).status_code == 200
@@ -0,0 +1,232 @@
+"""
+In-memory prefix index for the free-text brand, store and room fields.
+
+Each field keeps a sorted list of distinct keys plus, per key, the counts of
+the spellings stored under it. A key is the value in search form
+(``normalize_text``) with spaces and punctuation dropped, so "Digi Kala",
+"digikala" and "DIGIKALA" (or "دیجی‌کالا" and "ديجي كالا") are one
+suggestion, shown in its most used spelling. Lookups bisect to the prefix
+and never touch the database.
+
+Writes queue their value changes on the session; they are applied to this
+process's index once the transaction commits and dropped on rollback. The
+index then takes on the global data version the write bumped to, as long as
+it was current before the write. Writes from other processes (and paths that
+do not queue changes) are picked up by comparing the global data version at
+most every AUTOCOMPLETE_RECHECK_SECONDS, which rebuilds the index only when
+it moved past this process's own writes.
+"""
+
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from itertools import islice
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.search import normalize_text
+from api.utils.versioning import GLOBAL_SCOPE, current_versions
+
+AUTOCOMPLETE_FIELDS = {
+    'brand': Option.brand,
+    'store': Option.store,
+    'room': Item.room,
+}
+
+FieldIndex = namedtuple('FieldIndex', [
+    'keys',       # sorted tuple of keys
+    'spellings',  # {key: {spelling: count}}
+    'best',       # {key: (most used spelling, total count)}
+    'popular',    # keys ordered by total count, most used first
+])
+AutocompleteIndex = namedtuple('AutocompleteIndex', ['version', 'fields'])
+
+_EMPTY_FIELD = FieldIndex((), {}, {}, ())
+_SEPARATORS = re.compile(r'[\W_]+')
+# Prefixes matching more keys than this are answered from the popularity order
+_SCAN_LIMIT = 256
+
+
+def _state():
+    # Kept per application so separate apps (and databases) never share an index
+    return current_app.extensions.setdefault('autocomplete', {
+        'lock': threading.Lock(),
+        'index': None,
+        'checked_at': 0.0,
+    })
+
+
+def suggestion_key(value):
+    """Matching form of ``value``: search-normalized with spaces and punctuation removed"""
+    return _SEPARATORS.sub('', normalize_text(value) or '')
+
+
+def _field_index(counts):
+    spellings = {}
+    for value, count in counts:
+        key = suggestion_key(value)
+        if key:
+            forms = spellings.setdefault(key, {})
+            forms[value] = forms.get(value, 0) + count
+    return _field(sorted(spellings), spellings)
+
+
+def _best(forms):
+    # The most used spelling stands for the key; ties go to the first in sort order
+    return min(forms, key=lambda form: (-forms[form], form)), sum(forms.values())
+
+
+def _field(keys, spellings, best=None):
+    if best is None:
+        best = {key: _best(forms) for key, forms in spellings.items()}
+    popular = sorted(best, key=lambda key: (-best[key][1], best[key][0]))
+    return FieldIndex(tuple(keys), spellings, best, tuple(popular))
+
+
+def _build_index(version):
+    fields = {}
+    for field, column in AUTOCOMPLETE_FIELDS.items():
+        fields[field] = _field_index(db.session.execute(
+            select(column, func.count()).where(column.is_not(None)).group_by(column)
+        ).all())
+    return AutocompleteIndex(version, fields)
+
+
+def get_index():
+    """
+    The current AutocompleteIndex, rebuilt when it is missing or the global
+    version has moved since it was built (checked at most every
+    AUTOCOMPLETE_RECHECK_SECONDS).
+    """
+    state = _state()
+    index = state['index']
+    if index is not None and time.monotonic() - state['checked_at'] < current_app.config['AUTOCOMPLETE_RECHECK_SECONDS']:
+        return index
+    version = current_versions(GLOBAL_SCOPE)[GLOBAL_SCOPE]
+    with state['lock']:
+        if state['index'] is None or state['index'].version != version:
+            state['index'] = _build_index(version)
+        state['checked_at'] = time.monotonic()
+        return state['index']
+
+
+def warm_autocomplete(app):
+    """Build the index now instead of on the first keystroke"""
+    if app.config['AUTOCOMPLETE_WARM']:
+        with app.app_context():
+            get_index()
+            db.session.remove()
+
+
+def suggest(field, prefix='', limit=8):
+    """
+    Up to ``limit`` {"value", "count"} suggestions for ``field`` whose key
+    starts with the key of ``prefix``, most used first. An empty prefix
+    lists the most used values.
+    """
+    if field not in AUTOCOMPLETE_FIELDS:
+        raise ValueError(f"Unknown autocomplete field: {field}")
+    index = get_index().fields.get(field, _EMPTY_FIELD)
+    prefix = suggestion_key(prefix)
+    start = bisect_left(index.keys, prefix)
+    end = bisect_left(index.keys, prefix + '\U0010ffff', start)
+
+    if end - start > _SCAN_LIMIT:
+        # Short prefixes match most keys: walk them by popularity and stop at ``limit``
+        matches = (key for key in index.popular if key.startswith(prefix))
+        found = [index.best[key] for key in islice(matches, limit)]
+    else:
+        found = heapq.nsmallest(limit, (index.best[key] for key in index.keys[start:end]),
+                                key=lambda best: (-best[1], best[0]))
+    return [{'value': value, 'count': count} for value, count in found]
+
+
+def note_change(field, before, after):
+    """Queue one value change of ``field`` (None = no value) for when the session commits"""
+    if before == after:
+        return
+    pending = db.session.info.setdefault('autocomplete', Counter())
+    if before is not None:
+        pending[(field, before)] -= 1
+    if after is not None:
+        pending[(field, after)] += 1
+
+
+def note_values(field, values, sign=1):
+    """Queue ``values`` of ``field`` as added (or removed with ``sign=-1``) on commit"""
+    pending = db.session.info.setdefault('autocomplete', Counter())
+    for value in values:
+        if value is not None:
+            pending[(field, value)] += sign
+
+
+def _apply(index, pending):
+    # Copy on write: readers keep using the key lists and dicts they already hold
+    fields = dict(index.fields)
+    copied = {}
+    for (field, value), delta in pending.items():
+        key = suggestion_key(value)
+        if not delta or not key:
+            continue
+        if field not in copied:
+            current = fields.get(field, _EMPTY_FIELD)
+            copied[field] = (list(current.keys), dict(current.spellings), dict(current.best))
+        keys, spellings, best = copied[field]
+        forms = dict(spellings.get(key, {}))
+        count = forms.get(value, 0) + delta
+        if count > 0:
+            forms[value] = count
+        else:
+            forms.pop(value, None)
+        if forms:
+            if key not in spellings:
+                insort(keys, key)
+            spellings[key] = forms
+            best[key] = _best(forms)
+        elif key in spellings:
+            del keys[bisect_left(keys, key)]
+            del spellings[key]
+            del best[key]
+    for field, (keys, spellings, best) in copied.items():
+        fields[field] = _field(keys, spellings, best)
+    return index._replace(fields=fields)
+
+
+@event.listens_for(Session, 'before_commit')
+def _keep_version(session):
+    # versioning forgets the bumped range when the commit ends, before our after_commit runs
+    session.info['autocomplete_version'] = session.info.get('global_version')
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    pending = session.info.pop('autocomplete', None)
+    moved = session.info.pop('autocomplete_version', None)
+    if not (pending or moved) or not has_app_context():
+        return
+    state = _state()
+    with state['lock']:
+        index = state['index']
+        # Without an index there is nothing to patch; the first lookup builds it
+        if index is None:
+            return
+        if moved is not None and index.version >= moved[1]:
+            # Rebuilt after this commit landed: the write is already counted
+            return
+        if pending:
+            index = _apply(index, pending)
+        if moved is not None and index.version == moved[0]:
+            # Nobody else wrote in between, so the index is current again
+            index = index._replace(version=moved[1])
+        state['index'] = index
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session):
+    session.info.pop('autocomplete', None)
+    session.info.pop('autocomplete_version', None)
@@ -0,0 +1,93 @@
+"""
+Concurrent parsing of many product URLs.
+
+``iter_parsed`` keeps at most ``concurrency`` parses in flight overall and
+``per_domain`` per host, optionally spaces parse starts on one host by
+``min_interval`` seconds, and yields each outcome as soon as it finishes, so a
+slow store never holds back results from the others.
+"""
+
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+ParseOutcome = namedtuple('ParseOutcome', ['index', 'url', 'data', 'error', 'timings'])
+
+
+def iter_parsed(urls, submit, domain_of, concurrency=4, per_domain=2, timeout=None, min_interval=0):
+    """
+    Parse ``urls`` through ``submit(url) -> Future[(data, timings)]`` and yield
+    a ParseOutcome per URL in completion order.
+
+    ``domain_of(url)`` groups URLs for the per-domain limit and raises
+    ValueError for URLs that cannot be parsed at all. ``timeout`` bounds the
+    whole batch in seconds; parses still running then are reported as errors.
+    ``min_interval`` is the least time between two parse starts on one domain.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    pending = deque()
+    for index, url in enumerate(urls):
+        try:
+            pending.append((index, url, domain_of(url)))
+        except ValueError as e:
+            yield ParseOutcome(index, url, None, str(e), {})
+
+    running = {}      # future -> (index, url, domain)
+    per_host = {}     # domain -> parses in flight
+    last_start = {}   # domain -> monotonic time of the latest parse started
+    while pending or running:
+        # Start whatever the limits allow, keeping submission order within each domain
+        skipped = deque()
+        next_start = None
+        while pending and len(running) < concurrency:
+            index, url, domain = pending.popleft()
+            if per_host.get(domain, 0) >= per_domain:
+                skipped.append((index, url, domain))
+                continue
+            if min_interval and domain in last_start:
+                ready_at = last_start[domain] + min_interval
+                if ready_at > time.monotonic():
+                    next_start = ready_at if next_start is None else min(next_start, ready_at)
+                    skipped.append((index, url, domain))
+                    continue
+            try:
+                future = submit(url)
+            except Exception as e:
+                yield ParseOutcome(index, url, None, str(e), {})
+                continue
+            running[future] = (index, url, domain)
+            per_host[domain] = per_host.get(domain, 0) + 1
+            last_start[domain] = time.monotonic()
+        skipped.extend(pending)
+        pending = skipped
+
+        if not running and next_start is None:
+            continue
+        # Sleep until a parse finishes, the next rate-limited start or the deadline
+        wake = next_start if deadline is None else min(deadline, next_start or deadline)
+        remaining = None if wake is None else max(0, wake - time.monotonic())
+        if running:
+            done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(remaining)
+            done = ()
+        if not done:
+            if deadline is None or time.monotonic() < deadline:
+                continue
+            # Batch deadline passed; give up on everything left
+            for future, (index, url, domain) in running.items():
+                future.cancel()
+                yield ParseOutcome(index, url, None, "Timed out", {})
+            for index, url, domain in pending:
+                yield ParseOutcome(index, url, None, "Timed out", {})
+            return
+
+        for future in done:
+            index, url, domain = running.pop(future)
+            per_host[domain] -= 1
+            try:
+                data, timings = future.result()
+            except Exception as e:
+                yield ParseOutcome(index, url, None, str(e), {})
+            else:
+                yield ParseOutcome(index, url, data, None, timings)
@@ -0,0 +1,259 @@
+"""
+Long-lived headless browser pool for the URL parser.
+
+Playwright's sync API binds every object to the thread that created it, so
+each slot of the pool is a worker thread that owns one Chromium process for
+its whole life. Parse jobs go through a shared queue; a slot runs each job in
+a fresh, isolated browser context and relaunches its browser after
+``max_pages`` pages or as soon as it finds it disconnected (crashed).
+
+The pool lives in ``app.extensions['browser_pool']`` and is created on first
+use. ``warm_browser_pool`` starts it ahead of the first request; gunicorn
+calls it after forking because threads do not survive ``fork``.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+
+_STOP = object()
+_create_lock = threading.Lock()
+
+
+class BrowserPoolClosed(RuntimeError):
+    """Raised when a job is submitted to (or pending in) a closed pool"""
+
+
+class ChromiumLauncher:
+    """Starts the Playwright driver and headless Chromium inside a slot thread"""
+
+    def __init__(self, **launch_options):
+        self.launch_options = {'headless': True, **launch_options}
+
+    def start(self):
+        from playwright.sync_api import sync_playwright
+        return sync_playwright().start()
+
+    def launch(self, driver):
+        return driver.chromium.launch(**self.launch_options)
+
+    def stop(self, driver):
+        driver.stop()
+
+
+class _Job:
+    __slots__ = ('fn', 'future', 'timings', 'queued_at')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+        self.timings = {}
+        self.queued_at = time.perf_counter()
+
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+class BrowserPool:
+    def __init__(self, size=2, max_pages=100, user_agent=DEFAULT_USER_AGENT, launcher=None, app=None):
+        if size < 1:
+            raise ValueError("Browser pool size must be positive")
+        self.size = size
+        self.max_pages = max_pages
+        self.user_agent = user_agent
+        self.launcher = launcher or ChromiumLauncher()
+        self.app = app
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {'pages': 0, 'launches': 0, 'recycles': 0, 'crashes': 0, 'failures': 0}
+
+    def start(self, wait=True, timeout=60):
+        """Start the slot threads; with ``wait`` block until every browser has launched"""
+        with self._lock:
+            if self._closed:
+                raise BrowserPoolClosed("Browser pool is closed")
+            if self._threads:
+                return self
+            ready = [threading.Event() for _ in range(self.size)]
+            for slot, event in enumerate(ready):
+                thread = threading.Thread(
+                    target=self._run_slot, args=(event,),
+                    name=f'browser-pool-{slot}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        if wait:
+            deadline = time.monotonic() + timeout
+            for event in ready:
+                event.wait(max(0, deadline - time.monotonic()))
+        return self
+
+    def submit(self, fn):
+        """
+        Queue ``fn(page, timings)`` to run on a fresh page.
+
+        Returns a Future resolving to ``(result, timings)``; timings holds the
+        milliseconds spent waiting for a slot and opening the context
+        (``acquire_ms``) plus whatever ``fn`` records, and ``total_ms``.
+        """
+        if self._closed:
+            raise BrowserPoolClosed("Browser pool is closed")
+        if not self._threads:
+            self.start(wait=False)
+        job = _Job(fn)
+        self._jobs.put(job)
+        return job.future
+
+    def run(self, fn, timeout=None):
+        return self.submit(fn).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=self.size, queued=self._jobs.qsize())
+
+    def close(self, timeout=10):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+        # Fail anything still queued (e.g. submitted while closing)
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(BrowserPoolClosed("Browser pool is closed"))
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _run_slot(self, ready):
+        if self.app is not None:
+            # Site parsers log through current_app
+            with self.app.app_context():
+                self._slot_loop(ready)
+        else:
+            self._slot_loop(ready)
+
+    def _slot_loop(self, ready):
+        driver = None
+        browser = None
+        pages = 0
+        try:
+            try:
+                driver = self.launcher.start()
+                browser = self.launcher.launch(driver)
+                self._count('launches')
+            except Exception as ex:
+                # Jobs will retry the launch and report the error
+                _log_warning(f"Browser pool warm-up failed: {ex}")
+            finally:
+                ready.set()
+
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if driver is None:
+                        driver = self.launcher.start()
+                    if browser is not None and not browser.is_connected():
+                        self._count('crashes')
+                        browser = _close_quietly(browser)
+                    elif browser is not None and pages >= self.max_pages:
+                        self._count('recycles')
+                        browser = _close_quietly(browser)
+                    if browser is None:
+                        browser = self.launcher.launch(driver)
+                        self._count('launches')
+                        pages = 0
+                    result = self._run_job(browser, job)
+                except Exception as ex:
+                    self._count('failures')
+                    if browser is not None and not browser.is_connected():
+                        self._count('crashes')
+                        browser = _close_quietly(browser)
+                    job.future.set_exception(ex)
+                else:
+                    job.future.set_result((result, job.timings))
+                finally:
+                    pages += 1
+                    self._count('pages')
+        finally:
+            if browser is not None:
+                _close_quietly(browser)
+            if driver is not None:
+                try:
+                    self.launcher.stop(driver)
+                except Exception:
+                    pass
+
+    def _run_job(self, browser, job):
+        context = browser.new_context(user_agent=self.user_agent)
+        try:
+            page = context.new_page()
+            job.timings['acquire_ms'] = _ms(job.queued_at)
+            return job.fn(page, job.timings)
+        finally:
+            job.timings['total_ms'] = _ms(job.queued_at)
+            try:
+                context.close()
+            except Exception:
+                pass
+
+
+def _close_quietly(browser):
+    try:
+        browser.close()
+    except Exception:
+        pass
+    return None
+
+
+def _log_warning(message):
+    try:
+        current_app.logger.warning(message)
+    except RuntimeError:
+        pass
+
+
+def get_browser_pool(app=None):
+    """Return the app's browser pool, creating it (unstarted) on first use"""
+    app = app or current_app._get_current_object()
+    pool = app.extensions.get('browser_pool')
+    if pool is None:
+        with _create_lock:
+            pool = app.extensions.get('browser_pool')
+            if pool is None:
+                pool = BrowserPool(
+                    size=app.config['BROWSER_POOL_SIZE'],
+                    max_pages=app.config['BROWSER_MAX_PAGES'],
+                    app=app
+                )
+                app.extensions['browser_pool'] = pool
+                atexit.register(pool.close)
+    return pool
+
+
+def warm_browser_pool(app):
+    """Launch the pool's browsers now instead of on the first parse request"""
+    if app.config['BROWSER_POOL_WARM']:
+        get_browser_pool(app).start(wait=True)
+
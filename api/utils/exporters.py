@@ -0,0 +1,215 @@
+"""
+Streaming exports of options and the full catalogue.
+
+Rows come from a server-side cursor in batches of ``EXPORT_BATCH`` with the
+item (and for the catalogue its category and subcategory) joined in, and each
+format writer turns a batch into bytes before the next one is fetched, so
+memory stays flat however many rows are exported. CSV uses the csv module,
+NDJSON the app's JSON provider, and XLSX is written as a zip stream with
+inline strings, so no spreadsheet library or temporary file is needed.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from collections import namedtuple
+from xml.sax.saxutils import escape
+from flask import current_app
+from sqlalchemy import select
+from api.app_factory import db
+from api.models import Category, Item, Option, Subcategory
+
+ExportScope = namedtuple('ExportScope', ['filename', 'columns', 'query'])
+
+# (key, header, column) per scope; the query selects the columns in this order
+SELECTED_COLUMNS = (
+    ('item', 'Item', Item.name),
+    ('brand', 'Brand', Option.brand),
+    ('model_name', 'Model', Option.model_name),
+    ('price', 'Price', Option.price),
+    ('store', 'Store', Option.store),
+    ('link', 'Link', Option.link),
+    ('rating', 'Rating', Option.rating),
+    ('notes', 'Notes', Option.notes),
+)
+
+CATALOGUE_COLUMNS = (
+    ('item_id', 'Item ID', Item.id),
+    ('item', 'Item', Item.name),
+    ('category', 'Category', Category.name),
+    ('subcategory', 'Subcategory', Subcategory.name),
+    ('room', 'Room', Item.room),
+    ('budget', 'Budget', Item.budget),
+    ('option_id', 'Option ID', Option.id),
+    ('brand', 'Brand', Option.brand),
+    ('model_name', 'Model', Option.model_name),
+    ('price', 'Price', Option.price),
+    ('store', 'Store', Option.store),
+    ('link', 'Link', Option.link),
+    ('rating', 'Rating', Option.rating),
+    ('warranty_months', 'Warranty (months)', Option.warranty_months),
+    ('available', 'Available', Option.available),
+    ('selected', 'Selected', Option.selected),
+    ('last_checked', 'Last checked', Option.last_checked),
+    ('notes', 'Notes', Option.notes),
+)
+
+
+def _selected_query():
+    return (
+        select(*(column.label(key) for key, _, column in SELECTED_COLUMNS))
+        .join(Item, Item.id == Option.item_id)
+        .where(Option.selected == True)
+        .order_by(Item.id, Option.id)
+    )
+
+
+def _catalogue_query():
+    # Every item, with one row per option (or one empty option row when it has none)
+    return (
+        select(*(column.label(key) for key, _, column in CATALOGUE_COLUMNS))
+        .select_from(Item)
+        .outerjoin(Category, Category.id == Item.category_id)
+        .outerjoin(Subcategory, Subcategory.id == Item.subcategory_id)
+        .outerjoin(Option, Option.item_id == Item.id)
+        .order_by(Item.id, Option.id)
+    )
+
+
+EXPORT_SCOPES = {
+    'selected': ExportScope('selected_options', SELECTED_COLUMNS, _selected_query),
+    'catalogue': ExportScope('catalogue', CATALOGUE_COLUMNS, _catalogue_query),
+}
+
+
+def open_export(scope, batch_size=None):
+    """Run the scope's query on a server-side cursor; returns an iterator of row batches"""
+    batch_size = batch_size or current_app.config['EXPORT_BATCH']
+    result = db.session.execute(
+        EXPORT_SCOPES[scope].query().execution_options(stream_results=True, yield_per=batch_size)
+    )
+    return result.partitions()
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(batches, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    writer.writerow([header for _, header, _ in columns])
+    for batch in batches:
+        writer.writerows([_text(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_stream(batches, columns):
+    keys = [key for key, _, _ in columns]
+    dumps = current_app.json.dumps
+    for batch in batches:
+        yield ''.join(dumps(dict(zip(keys, row))) + '\n' for row in batch)
+
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+_XLSX_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="xl/workbook.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+     '</Relationships>'),
+)
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value!r}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', str(_text(value))))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+class _Chunks:
+    """Write-only, unseekable file object whose bytes are taken as they are produced"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def xlsx_stream(batches, columns):
+    sink = _Chunks()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as package:
+        for name, body in _XLSX_PARTS:
+            package.writestr(name, body)
+        # Size unknown up front, so the sheet may need zip64
+        with package.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row([header for _, header, _ in columns]).encode('utf-8'))
+            for batch in batches:
+                sheet.write(''.join(_xlsx_row(row) for row in batch).encode('utf-8'))
+                yield sink.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.take()
+
+
+# format -> (writer, mimetype)
+EXPORT_FORMATS = {
+    'csv': (csv_stream, 'text/csv'),
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+    'xlsx': (xlsx_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
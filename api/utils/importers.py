@@ -0,0 +1,309 @@
+"""
+Bulk import of items and options from CSV or JSONL.
+
+Rows are read and validated one at a time: each row is an item, optionally
+with one option, and rows naming the same item (or sharing an ``item_id``,
+as in a catalogue export) add options to it. JSONL lines may instead carry
+their options in an ``options`` list. Category and subcategory names resolve
+through the taxonomy index. Valid rows are inserted in executemany batches of
+``IMPORT_BATCH`` inside one transaction, which is rolled back if any row is
+invalid, so an import lands completely or not at all.
+"""
+
+import csv
+import io
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.autocomplete import note_values
+from api.utils.exporters import CATALOGUE_COLUMNS
+from api.utils.price_history import record_prices
+from api.utils.search import reindex_items, reindex_options
+from api.utils.summary import SUMMARY_FIELDS, apply_summary_deltas
+from api.utils.taxonomy import get_index
+from api.utils.versioning import bump_versions
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+OPTION_FIELDS = ('brand', 'model_name', 'price', 'store', 'link', 'features', 'rating',
+                 'warranty_months', 'available', 'selected', 'notes')
+
+# Column name (as exported, or the field key itself) -> field key, compared case-insensitively
+FIELD_ALIASES = {
+    **{key: key for key, _, _ in CATALOGUE_COLUMNS},
+    **{header.lower(): key for key, header, _ in CATALOGUE_COLUMNS},
+    'name': 'item',
+    'features': 'features',
+    'item_notes': 'item_notes',
+    'item notes': 'item_notes',
+}
+
+_TRUE = {'1', 'true', 'yes', 'y'}
+_FALSE = {'0', 'false', 'no', 'n'}
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported; the message is reported with its row number"""
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(value):
+    return None if _blank(value) else str(value).strip()
+
+
+def _number(value, field, cast=float):
+    if _blank(value):
+        return None
+    if isinstance(value, bool):
+        raise ImportRowError(f"'{field}' must be a number")
+    if isinstance(value, str):
+        # Spreadsheets often group digits: "1,250,000"
+        value = value.strip().replace(',', '').replace('_', '')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"'{field}' must be a number") from None
+    if cast is int:
+        if not number.is_integer():
+            raise ImportRowError(f"'{field}' must be a whole number")
+        return int(number)
+    return number
+
+
+def _flag(value, field, default):
+    if _blank(value):
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ImportRowError(f"'{field}' must be true or false")
+
+
+def _normalize(record):
+    """Map a raw record's column names to field keys; unknown columns are ignored"""
+    values = {}
+    for column, value in record.items():
+        key = FIELD_ALIASES.get(str(column).strip().lower()) if column is not None else None
+        if key is not None:
+            values[key] = value
+    return values
+
+
+def read_csv(stream):
+    """Yield (row number, values) from a binary CSV stream with a header row"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    for record in reader:
+        yield reader.line_num, _normalize(record)
+
+
+def read_jsonl(stream):
+    """Yield (line number, values) from a binary JSONL stream, one row per option"""
+    loads = current_app.json.loads
+    for line_no, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            yield line_no, ImportRowError("Invalid JSON")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ImportRowError("Each line must be a JSON object")
+            continue
+        options = record.pop('options', None)
+        values = _normalize(record)
+        if options is None:
+            yield line_no, values
+            continue
+        if not isinstance(options, list) or not all(isinstance(option, dict) for option in options):
+            yield line_no, ImportRowError("'options' must be a list of objects")
+            continue
+        # The options of one line belong to that line's item only
+        values.setdefault('item_id', f'line:{line_no}')
+        if not options:
+            yield line_no, values
+        for option in options:
+            yield line_no, dict(values, **_normalize(option))
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class BulkImport:
+    """
+    Validate and insert rows fed to ``add``; ``finish`` commits (or, after
+    a dry run or any invalid row, rolls back) and returns the report.
+    """
+
+    def __init__(self, dry_run=False, batch_size=None, max_errors=None):
+        config = current_app.config
+        self.dry_run = dry_run
+        self.batch_size = batch_size or config['IMPORT_BATCH']
+        self.max_errors = config['IMPORT_MAX_ERRORS'] if max_errors is None else max_errors
+        self.index = get_index()
+        self.subcategory_parents = {sub_id: category_id
+                                    for category_id, _, children in self.index.categories
+                                    for sub_id, _ in children}
+        self.items = {}          # group key -> category id, for every item seen
+        self.item_ids = {}       # group key -> id, once inserted
+        self.with_choice = set()
+        self.pending_items = []
+        self.pending_options = []
+        self.deltas = {}         # category id -> summary field deltas
+        self.today = datetime.utcnow().date()
+        self.stats = {'rows': 0, 'items': 0, 'options': 0, 'invalid_rows': 0}
+        self.errors = []
+
+    def _resolve_taxonomy(self, values):
+        category = _text(values.get('category'))
+        subcategory = _text(values.get('subcategory'))
+        category_id = subcategory_id = None
+        if category:
+            category_id = self.index.category_ids.get(category)
+            if category_id is None:
+                raise ImportRowError(f"Unknown category '{category}'")
+        if subcategory:
+            if category_id is not None:
+                subcategory_id = self.index.subcategory_ids.get((category_id, subcategory))
+            else:
+                matches = self.index.subcategory_ids_by_name.get(subcategory, ())
+                if len(matches) > 1:
+                    raise ImportRowError(f"Subcategory '{subcategory}' exists in several categories; give the category")
+                subcategory_id = matches[0] if matches else None
+                category_id = self.subcategory_parents.get(subcategory_id)
+            if subcategory_id is None:
+                raise ImportRowError(f"Unknown subcategory '{subcategory}'")
+        return category_id, subcategory_id
+
+    def _delta(self, category_id, **values):
+        deltas = self.deltas.setdefault(category_id, dict.fromkeys(SUMMARY_FIELDS, 0))
+        for field, value in values.items():
+            deltas[field] += value
+
+    def _parse(self, values):
+        """(group key, item params or None if already seen, option params or None)"""
+        name = _text(values.get('item'))
+        if not name:
+            raise ImportRowError("'item' (the item name) is required")
+        if len(name) > 200:
+            raise ImportRowError("'item' is longer than 200 characters")
+        category_id, subcategory_id = self._resolve_taxonomy(values)
+        room = _text(values.get('room'))
+        budget = _number(values.get('budget'), 'budget')
+        if _blank(values.get('item_id')):
+            key = ('name', name, category_id, subcategory_id, room)
+        else:
+            key = ('id', str(values['item_id']).strip())
+
+        item = None
+        if key not in self.items:
+            item = {'name': name, 'room': room, 'notes': _text(values.get('item_notes')), 'budget': budget,
+                    'category_id': category_id, 'subcategory_id': subcategory_id, 'created_at': datetime.utcnow()}
+
+        option = None
+        if any(not _blank(values.get(field)) for field in OPTION_FIELDS):
+            option = {
+                'brand': _text(values.get('brand')),
+                'model_name': _text(values.get('model_name')),
+                'price': _number(values.get('price'), 'price'),
+                'store': _text(values.get('store')),
+                'link': _text(values.get('link')),
+                'features': _text(values.get('features')),
+                'rating': _number(values.get('rating'), 'rating'),
+                'warranty_months': _number(values.get('warranty_months'), 'warranty_months', int),
+                'available': _flag(values.get('available'), 'available', True),
+                'notes': _text(values.get('notes')),
+                'selected': _flag(values.get('selected'), 'selected', False),
+                'last_checked': self.today,
+            }
+            if option['selected'] and key in self.with_choice:
+                raise ImportRowError(f"Item '{name}' already has a selected option")
+        return key, item, option
+
+    def add(self, row_no, values):
+        self.stats['rows'] += 1
+        try:
+            if isinstance(values, ImportRowError):
+                raise values
+            key, item, option = self._parse(values)
+        except ImportRowError as ex:
+            self.stats['invalid_rows'] += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append({'row': row_no, 'message': str(ex)})
+            return
+
+        if item is not None:
+            self.items[key] = item['category_id']
+            self.pending_items.append((key, item))
+            self.stats['items'] += 1
+            self._delta(item['category_id'], total_items=1, total_budget=item['budget'] or 0)
+        if option is not None:
+            if option['selected']:
+                self.with_choice.add(key)
+                self._delta(self.items[key], items_with_choice=1, total_selected_cost=option['price'] or 0)
+            self.pending_options.append((key, option))
+            self.stats['options'] += 1
+        if len(self.pending_items) + len(self.pending_options) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        # Nothing is written once the import is known to fail, or in a dry run
+        if not self.dry_run and not self.stats['invalid_rows']:
+            if self.pending_items:
+                ids = db.session.execute(
+                    insert(Item).returning(Item.id, sort_by_parameter_order=True),
+                    [item for _, item in self.pending_items]
+                ).scalars().all()
+                self.item_ids.update(zip((key for key, _ in self.pending_items), ids))
+                reindex_items(ids)
+                note_values('room', (item['room'] for _, item in self.pending_items))
+            if self.pending_options:
+                ids = db.session.execute(
+                    insert(Option).returning(Option.id, sort_by_parameter_order=True),
+                    [dict(option, item_id=self.item_ids[key]) for key, option in self.pending_options]
+                ).scalars().all()
+                record_prices(ids)
+                reindex_options(ids)
+                note_values('brand', (option['brand'] for _, option in self.pending_options))
+                note_values('store', (option['store'] for _, option in self.pending_options))
+        self.pending_items = []
+        self.pending_options = []
+
+    def finish(self):
+        self._flush()
+        committed = not self.dry_run and not self.stats['invalid_rows']
+        if committed:
+            apply_summary_deltas(self.deltas)
+            if self.stats['items']:
+                bump_versions()
+            db.session.commit()
+        else:
+            db.session.rollback()
+        return dict(self.stats, imported=committed, dry_run=self.dry_run, errors=self.errors)
+
+
+def import_rows(stream, fmt, dry_run=False, batch_size=None):
+    """Import a CSV or JSONL stream; returns the report (counts, ``imported`` and row errors)"""
+    if fmt not in READERS:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    importer = BulkImport(dry_run=dry_run, batch_size=batch_size)
+    try:
+        for row_no, values in READERS[fmt](stream):
+            importer.add(row_no, values)
+    except (UnicodeDecodeError, csv.Error) as ex:
+        db.session.rollback()
+        raise ValueError(f"Unreadable {fmt} input: {ex}") from None
+    except Exception:
+        db.session.rollback()
+        raise
+    return importer.finish()
@@ -0,0 +1,242 @@
+"""
+Durable job queue stored in the application database.
+
+The API enqueues work and returns a job id straight away; worker processes
+(``python worker.py``) claim due jobs one at a time with a single
+``UPDATE ... RETURNING`` statement, so two workers can never claim the same
+job. Failed jobs are retried with exponential backoff until ``max_attempts``.
+A running job's lease is renewed by its worker while the handler runs; a job
+whose worker died mid-run is reclaimed once its lease expires, as a new
+attempt, and fails once it is out of attempts.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, exists, insert, literal, or_, select, update
+from api.app_factory import db
+from api.models import Job
+
+# kind -> handler(payload) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register the function that runs jobs of ``kind``"""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+class JobError(ValueError):
+    """Raised for jobs that cannot be enqueued or can never succeed (unknown kind, bad payload); not retried"""
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'payload': job.payload,
+        'result': job.result,
+        'error': job.error,
+        'run_after': job.run_after.isoformat() if job.run_after else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def enqueue(kind, payload=None, max_attempts=None, delay=0, unique_key=None):
+    """
+    Add a job to the current transaction and return it (flushed, so it has an
+    id). With ``unique_key``, a job already enqueued under that key is
+    returned instead of adding another one.
+    """
+    if kind not in JOB_HANDLERS:
+        raise JobError(f"Unknown job kind '{kind}'")
+    now = datetime.utcnow()
+    values = {
+        'kind': kind,
+        'payload': payload or {},
+        'status': Job.QUEUED,
+        'attempts': 0,
+        'max_attempts': max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        'run_after': now + timedelta(seconds=delay),
+        'created_at': now
+    }
+    if unique_key is None:
+        job = Job(**values)
+        db.session.add(job)
+        db.session.flush()
+        return job
+
+    # The check and the insert are one statement, so callers racing on the
+    # same key add a single job; the unique index backs it up
+    values['unique_key'] = unique_key
+    db.session.execute(
+        insert(Job)
+        .from_select(list(values), select(*(literal(value, getattr(Job, field).type)
+                                            for field, value in values.items()))
+                     .where(~exists(select(Job.id).where(Job.unique_key == unique_key))))
+    )
+    return db.session.execute(select(Job).where(Job.unique_key == unique_key)).scalar_one()
+
+
+def claim_job(worker_id, kinds=None):
+    """
+    Atomically mark the next due job as running for ``worker_id``.
+
+    Returns (id, kind, payload, attempts) or None when nothing is due. A
+    running job whose lease expired is claimed again as its next attempt, or
+    marked failed when it has none left.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=current_app.config['JOB_LEASE_SECONDS'])
+    abandoned = and_(Job.status == Job.RUNNING, Job.locked_at < lease_expired)
+    db.session.execute(
+        update(Job)
+        .where(abandoned, Job.attempts >= Job.max_attempts)
+        .values(status=Job.FAILED, error='Lease expired on the last attempt', locked_by=None, locked_at=None,
+                finished_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    due = or_(
+        and_(Job.status == Job.QUEUED, Job.run_after <= now),
+        and_(abandoned, Job.attempts < Job.max_attempts)
+    )
+    candidate = select(Job.id).where(due)
+    if kinds:
+        candidate = candidate.where(Job.kind.in_(kinds))
+    candidate = candidate.order_by(Job.run_after, Job.id).limit(1).scalar_subquery()
+
+    # The due condition is repeated so a job claimed between the subquery and
+    # the update (on databases without SQLite's single writer) is left alone
+    row = db.session.execute(
+        update(Job)
+        .where(Job.id == candidate, due)
+        .values(status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.session.commit()
+    return row
+
+
+def _held(job_id, worker_id):
+    # A worker that lost its lease must not overwrite the new holder's state
+    held = Job.id == job_id
+    if worker_id is not None:
+        held = and_(held, Job.locked_by == worker_id)
+    return held
+
+
+def complete_job(job_id, result, worker_id=None):
+    db.session.execute(
+        update(Job).where(_held(job_id, worker_id))
+        .values(status=Job.DONE, result=result, error=None, locked_by=None, locked_at=None,
+                finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def retry_delay(attempts):
+    config = current_app.config
+    return min(config['JOB_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1), config['JOB_RETRY_MAX_SECONDS'])
+
+
+def fail_job(job_id, attempts, error, retry=True, worker_id=None):
+    """Requeue with backoff, or mark failed once the job is out of attempts"""
+    max_attempts = db.session.execute(select(Job.max_attempts).where(Job.id == job_id)).scalar()
+    now = datetime.utcnow()
+    if retry and max_attempts is not None and attempts < max_attempts:
+        values = {'status': Job.QUEUED, 'run_after': now + timedelta(seconds=retry_delay(attempts))}
+    else:
+        values = {'status': Job.FAILED, 'finished_at': now}
+    db.session.execute(
+        update(Job).where(_held(job_id, worker_id))
+        .values(error=str(error)[:2000], locked_by=None, locked_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return values['status']
+
+
+def _renew_lease(engine, job_id, worker_id, interval, stop, logger):
+    """Push the job's lease forward every ``interval`` seconds until ``stop`` is set"""
+    while not stop.wait(interval):
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    update(Job.__table__)
+                    .where(Job.id == job_id, Job.status == Job.RUNNING, Job.locked_by == worker_id)
+                    .values(locked_at=datetime.utcnow())
+                )
+        except Exception as ex:
+            logger.warning(f"Renewing the lease of job {job_id} failed: {ex}")
+
+
+def run_next_job(worker_id, kinds=None):
+    """Claim and run one job; returns (job id, final status) or None when the queue is idle"""
+    claimed = claim_job(worker_id, kinds)
+    if claimed is None:
+        return None
+    job_id, kind, payload, attempts = claimed
+    handler = JOB_HANDLERS.get(kind)
+    # Renewed well inside the lease, so a long job is never reclaimed while it runs
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_renew_lease, daemon=True, name=f'job-{job_id}-lease',
+        args=(db.engine, job_id, worker_id, current_app.config['JOB_LEASE_SECONDS'] / 3, stop, current_app.logger)
+    )
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise JobError(f"No handler for job kind '{kind}'")
+        result = handler(payload)
+    except Exception as ex:
+        db.session.rollback()
+        current_app.logger.warning(f"Job {job_id} ({kind}) attempt {attempts} failed: {ex}")
+        return job_id, fail_job(job_id, attempts, ex, retry=not isinstance(ex, JobError), worker_id=worker_id)
+    finally:
+        stop.set()
+        heartbeat.join()
+    complete_job(job_id, result, worker_id)
+    return job_id, Job.DONE
+
+
+@job_handler('parse')
+def parse_job(payload):
+    """Parse a product URL; with item_id, also add it to the item as an option"""
+    from api.models import Item
+    from api.utils import mutations
+    from api.utils.serializers import OPTION_SHAPE
+    from api.utils.url_parser import parse_product_url
+    from api.utils.versioning import bump_item_version
+
+    url = payload.get('url')
+    if not url:
+        raise JobError("'url' is required")
+    timings = {}
+    data = parse_product_url(url, timings, force_refresh=bool(payload.get('force_refresh')))
+    result = {'data': data, 'timings': timings}
+
+    item_id = payload.get('item_id')
+    if item_id is not None:
+        item = db.session.get(Item, item_id)
+        if item is None:
+            raise JobError(f"Item {item_id} does not exist")
+        fields = ('brand', 'model_name', 'price', 'store', 'link', 'features', 'rating', 'warranty_months')
+        option = mutations.create_option(item, dict({field: data.get(field) for field in fields},
+                                                    available=data.get('available') is not False))
+        bump_item_version(item_id)
+        db.session.commit()
+        result['option'] = OPTION_SHAPE.from_object(option)
+    return result
+
+
+# Job kinds defined in other modules register themselves on import
+from api.utils import price_refresh  # noqa: E402,F401
@@ -0,0 +1,133 @@
+"""
+Versioned, in-place schema migrations.
+
+``db.create_all()`` only creates missing tables, so indexes added to models
+after a database was created never reach existing ``shopping.db`` files.
+Each migration below is idempotent and recorded in ``schema_migration`` once
+applied; ``migrate()`` runs the pending ones in order.
+"""
+
+from datetime import datetime
+from sqlalchemy import delete, func, insert, inspect, literal, select, text, update
+from api.app_factory import db
+from api.models import (Category, Subcategory, Item, Option, SchemaMigration, ParseCache, Job, PriceHistory, PageSnapshot,
+                        DashboardSummary, DataVersion)
+
+SELECTION_INDEX = 'ux_option_item_id_selected'
+
+
+def _create_missing_tables(connection):
+    db.metadata.create_all(bind=connection, checkfirst=True)
+
+
+def _create_hot_path_indexes(connection):
+    for model in (Category, Subcategory, Item, Option):
+        for index in model.__table__.indexes:
+            # Needs duplicate selections cleared first; see _enforce_single_selection
+            if index.name != SELECTION_INDEX:
+                index.create(bind=connection, checkfirst=True)
+
+
+def _create_parse_cache(connection):
+    ParseCache.__table__.create(bind=connection, checkfirst=True)
+
+
+def _create_job_queue(connection):
+    Job.__table__.create(bind=connection, checkfirst=True)
+
+
+def _create_price_history(connection):
+    PriceHistory.__table__.create(bind=connection, checkfirst=True)
+    # Start every existing option's series at its current value
+    connection.execute(
+        insert(PriceHistory).from_select(
+            ['option_id', 'recorded_at', 'price', 'available'],
+            select(Option.id, literal(datetime.utcnow(), PriceHistory.recorded_at.type), Option.price, Option.available)
+            .where(~select(PriceHistory.id).where(PriceHistory.option_id == Option.id).exists())
+        )
+    )
+
+
+def _create_page_snapshots(connection):
+    PageSnapshot.__table__.create(bind=connection, checkfirst=True)
+
+
+def _enforce_single_selection(connection):
+    # Older writes could leave several selected options per item; keep the
+    # lowest id, the one the dashboard already showed as the choice
+    keep = select(func.min(Option.id)).where(Option.selected == True).group_by(Option.item_id)
+    repaired = connection.execute(
+        update(Option).where(Option.selected == True, Option.id.not_in(keep)).values(selected=False)
+    ).rowcount
+    if repaired:
+        # Totals and cached responses included the extra selections
+        connection.execute(delete(DashboardSummary))
+        connection.execute(update(DataVersion).values(version=DataVersion.version + 1))
+    index = next(index for index in Option.__table__.indexes if index.name == SELECTION_INDEX)
+    index.create(bind=connection, checkfirst=True)
+
+
+def _create_search_index(connection):
+    if connection.dialect.name == 'sqlite':
+        from api.utils.search import create_search_index
+        create_search_index(connection)
+
+
+def _add_job_unique_key(connection):
+    if 'unique_key' not in {column['name'] for column in inspect(connection).get_columns('job')}:
+        connection.execute(text('ALTER TABLE job ADD COLUMN unique_key VARCHAR(200)'))
+    for index in Job.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+def _drop_search_triggers(connection):
+    # The triggers called a SQL function only the app registers, which broke
+    # writes from any other SQLite client; the write paths index rows now
+    if connection.dialect.name == 'sqlite':
+        from api.utils.search import create_search_index
+        create_search_index(connection)
+
+
+def _add_snapshot_values(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns('page_snapshot')}
+    if 'price' not in columns:
+        connection.execute(text('ALTER TABLE page_snapshot ADD COLUMN price FLOAT'))
+    if 'available' not in columns:
+        connection.execute(text('ALTER TABLE page_snapshot ADD COLUMN available BOOLEAN'))
+
+
+# (version, description, step) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Create tables added after the initial schema', _create_missing_tables),
+    (2, 'Add indexes for the hot query paths', _create_hot_path_indexes),
+    (3, 'Add the URL parse cache', _create_parse_cache),
+    (4, 'Add the background job queue', _create_job_queue),
+    (5, 'Add the option price history', _create_price_history),
+    (6, 'Add the raw page archive index', _create_page_snapshots),
+    (7, 'Allow one selected option per item', _enforce_single_selection),
+    (8, 'Add the full-text search index', _create_search_index),
+    (9, 'Enqueue follow-up jobs once', _add_job_unique_key),
+    (10, 'Index search text from the app instead of triggers', _drop_search_triggers),
+    (11, 'Keep the parsed values of archived pages', _add_snapshot_values),
+]
+
+
+def applied_versions():
+    with db.engine.begin() as connection:
+        SchemaMigration.__table__.create(bind=connection, checkfirst=True)
+        return set(connection.execute(select(SchemaMigration.version)).scalars())
+
+
+def migrate():
+    """Apply every pending migration, each in its own transaction; returns the versions applied"""
+    done = applied_versions()
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version in done:
+            continue
+        with db.engine.begin() as connection:
+            step(connection)
+            connection.execute(SchemaMigration.__table__.insert().values(
+                version=version, description=description))
+        applied.append(version)
+    return applied
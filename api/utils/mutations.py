@@ -0,0 +1,265 @@
+"""
+Item and option writes shared by the single-object routes, /api/batch and
+the parse paths.
+
+Each function keeps the dashboard summary, price history and search index
+in step with the change and queues it for autocomplete, but neither bumps
+data versions nor commits: the caller bumps the versions of the items it
+touched and owns the transaction, so several writes can land in one commit.
+"""
+
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.autocomplete import note_change, note_values
+from api.utils.price_history import forget_prices, record_prices
+from api.utils.search import reindex_items, reindex_options
+from api.utils.serializers import ITEM_SHAPE, OPTION_SHAPE
+from api.utils.summary import apply_item_change, snapshot_item, track_item
+from api.utils.versioning import bump_versions, item_scope
+
+
+class MutationError(ValueError):
+    """A write that cannot be applied; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, index=None):
+        super().__init__(message)
+        self.status = status
+        self.index = index
+
+
+def _float(value):
+    return float(value) if value else None
+
+
+def _int(value):
+    return int(value) if value else None
+
+
+ITEM_FIELDS = {
+    'name': lambda value: value,
+    'room': lambda value: value,
+    'notes': lambda value: value,
+    'budget': _float,
+    'category_id': _int,
+    'subcategory_id': _int,
+}
+
+OPTION_FIELDS = {
+    'brand': lambda value: value,
+    'model_name': lambda value: value,
+    'price': _float,
+    'store': lambda value: value,
+    'link': lambda value: value,
+    'features': lambda value: value,
+    'rating': _float,
+    'warranty_months': _int,
+    'available': lambda value: value,
+    'notes': lambda value: value,
+}
+
+
+def create_item(data):
+    if not data.get('name'):
+        raise MutationError("Item name is required")
+    item = Item(**{field: convert(data.get(field)) for field, convert in ITEM_FIELDS.items()})
+    db.session.add(item)
+    db.session.flush()
+    apply_item_change(None, snapshot_item(item.id))
+    reindex_items([item.id])
+    note_change('room', None, item.room)
+    return item
+
+
+def update_item(item, data):
+    room = item.room
+    with track_item(item.id):
+        for field, convert in ITEM_FIELDS.items():
+            if field in data:
+                setattr(item, field, convert(data[field]))
+    reindex_items([item.id])
+    note_change('room', room, item.room)
+
+
+def delete_item(item):
+    before = snapshot_item(item.id)
+    options = db.session.execute(select(Option.id, Option.brand, Option.store).where(Option.item_id == item.id)).all()
+    note_values('brand', (option.brand for option in options), sign=-1)
+    note_values('store', (option.store for option in options), sign=-1)
+    note_change('room', item.room, None)
+    forget_prices([option.id for option in options])
+    item_id = item.id
+    db.session.delete(item)
+    db.session.flush()
+    apply_item_change(before, None)
+    reindex_items([item_id])
+    reindex_options([option.id for option in options])
+
+
+def create_option(item, data):
+    values = {field: convert(data.get(field)) for field, convert in OPTION_FIELDS.items()}
+    values['available'] = data.get('available', True)
+    option = Option(item_id=item.id, last_checked=datetime.utcnow().date(), **values)
+    with track_item(item.id):
+        db.session.add(option)
+    record_prices([option.id])
+    reindex_options([option.id])
+    note_change('brand', None, option.brand)
+    note_change('store', None, option.store)
+    return option
+
+
+def create_options(item, records):
+    """
+    Add one option per dict in ``records`` to ``item`` with a single
+    multi-row INSERT; returns the new options as OPTION_SHAPE dicts, in order.
+    """
+    today = datetime.utcnow().date()
+    rows = []
+    for data in records:
+        values = {field: convert(data.get(field)) for field, convert in OPTION_FIELDS.items()}
+        values['available'] = data.get('available', True)
+        rows.append(dict(values, item_id=item.id, selected=False, last_checked=today))
+    with track_item(item.id):
+        result = db.session.execute(
+            insert(Option).returning(*OPTION_SHAPE.columns, sort_by_parameter_order=True), rows)
+        created = OPTION_SHAPE.many(result.all())
+    record_prices([option['id'] for option in created])
+    reindex_options([option['id'] for option in created])
+    note_values('brand', (row['brand'] for row in rows))
+    note_values('store', (row['store'] for row in rows))
+    return created
+
+
+def update_option(option, data):
+    brand, store = option.brand, option.store
+    with track_item(option.item_id):
+        for field, convert in OPTION_FIELDS.items():
+            if field in data:
+                setattr(option, field, convert(data[field]))
+    record_prices([option.id])
+    reindex_options([option.id])
+    note_change('brand', brand, option.brand)
+    note_change('store', store, option.store)
+
+
+def delete_option(option):
+    option_id = option.id
+    forget_prices([option_id])
+    note_change('brand', option.brand, None)
+    note_change('store', option.store, None)
+    with track_item(option.item_id):
+        db.session.delete(option)
+    reindex_options([option_id])
+
+
+def select_option(option):
+    """
+    Make ``option`` its item's only selected option, as one summary change;
+    returns the ids of the options it unselected. The others are cleared
+    first, so the one-selected-per-item unique index holds after each statement.
+    """
+    with track_item(option.item_id):
+        unselected = db.session.execute(
+            update(Option)
+            .where(Option.item_id == option.item_id, Option.selected == True, Option.id != option.id)
+            .values(selected=False)
+            .returning(Option.id)
+        ).scalars().all()
+        db.session.execute(update(Option).where(Option.id == option.id).values(selected=True))
+    return unselected
+
+
+def unselect_option(option):
+    with track_item(option.item_id):
+        option.selected = False
+
+
+BATCH_OPERATIONS = {
+    ('create', 'item'), ('update', 'item'), ('delete', 'item'),
+    ('create', 'option'), ('update', 'option'), ('delete', 'option'),
+    ('select', 'option'), ('unselect', 'option'),
+}
+
+
+def _resolve(value, refs):
+    """Replace a "$name" placeholder with the id created under that ref earlier in the batch"""
+    if isinstance(value, str) and value.startswith('$'):
+        if value[1:] not in refs:
+            raise MutationError(f"Unknown reference '{value}'")
+        return refs[value[1:]]
+    return value
+
+
+def _get(model, object_id):
+    try:
+        instance = db.session.get(model, int(object_id))
+    except (TypeError, ValueError):
+        raise MutationError(f"Invalid {model.__tablename__} id {object_id!r}") from None
+    if instance is None:
+        raise MutationError(f"{model.__name__} {object_id} not found", status=404)
+    return instance
+
+
+def _apply(operation, refs, touched):
+    op, kind = operation.get('op'), operation.get('type')
+    if (op, kind) not in BATCH_OPERATIONS:
+        raise MutationError(f"Unsupported operation {op!r} on {kind!r}")
+    data = operation.get('data') or {}
+    if not isinstance(data, dict):
+        raise MutationError("'data' must be an object")
+
+    if op == 'create':
+        if kind == 'item':
+            instance = create_item(data)
+            touched.add(instance.id)
+        else:
+            item = _get(Item, _resolve(data.get('item_id'), refs))
+            instance = create_option(item, data)
+            touched.add(item.id)
+        if operation.get('ref'):
+            refs[str(operation['ref'])] = instance.id
+    else:
+        instance = _get(Item if kind == 'item' else Option, _resolve(operation.get('id'), refs))
+        touched.add(instance.id if kind == 'item' else instance.item_id)
+        instance_id = instance.id
+        if op == 'delete':
+            (delete_item if kind == 'item' else delete_option)(instance)
+            return {'op': op, 'type': kind, 'id': instance_id}
+        if op == 'update':
+            (update_item if kind == 'item' else update_option)(instance, data)
+        elif op == 'select':
+            select_option(instance)
+        else:
+            unselect_option(instance)
+        db.session.flush()
+
+    shape = ITEM_SHAPE if kind == 'item' else OPTION_SHAPE
+    return {'op': op, 'type': kind, 'id': instance.id, kind: shape.from_object(instance)}
+
+
+def apply_batch(operations):
+    """
+    Apply ``operations`` in order within the current transaction; returns one
+    result per operation. A "ref" on a create names the new id, and later
+    operations refer to it as "$ref" in "id" or "data.item_id". Raises
+    MutationError (with the failing ``index``) on the first bad operation;
+    the caller rolls back then, or commits everything once.
+    """
+    refs = {}
+    touched = set()
+    results = []
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise MutationError("Each operation must be an object")
+            results.append(_apply(operation, refs, touched))
+        except MutationError as ex:
+            ex.index = index
+            raise
+        except (TypeError, ValueError) as ex:
+            raise MutationError(str(ex), index=index) from ex
+    if touched:
+        bump_versions(*(item_scope(item_id) for item_id in touched))
+    return results
@@ -0,0 +1,152 @@
+"""
+Page loading for the browser parse tier.
+
+The lean mode aborts requests the extractors never look at (images, media,
+fonts, and any host outside the page's own site and a short CDN allowlist),
+waits for the selectors the site parser reads instead of network idle, and
+gives navigation and waiting hard time budgets. The full mode keeps the
+original domcontentloaded + networkidle behavior for comparison.
+"""
+
+import re
+import time
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+BLOCKED_RESOURCE_TYPES = frozenset({
+    'image', 'media', 'font', 'manifest', 'texttrack', 'eventsource', 'websocket', 'ping'
+})
+
+# Third-party hosts the supported stores load page code or data from; every
+# other host outside the page's own site (analytics, ads, chat widgets) is aborted
+CDN_DOMAINS = (
+    'media-amazon.com', 'ssl-images-amazon.com', 'cdnjs.cloudflare.com', 'cdn.jsdelivr.net',
+)
+
+# Second-level labels under country TLDs that are public suffixes themselves (digikala.co.ir)
+_SHARED_SECOND_LEVEL = frozenset({'ac', 'co', 'com', 'edu', 'gov', 'net', 'org', 'id', 'sch'})
+_IPV4 = re.compile(r'^\d+(\.\d+){3}$')
+
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _host(url):
+    rest = url.split('://', 1)[-1]
+    return rest.split('/', 1)[0].split('?', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0].lower()
+
+
+def registrable_domain(host):
+    """
+    The part of ``host`` a site registers: "www.digikala.com" -> "digikala.com",
+    "shop.example.co.ir" -> "example.co.ir". IP addresses and single-label
+    hosts are returned as they are.
+    """
+    host = host.lower().rstrip('.')
+    labels = host.split('.')
+    if len(labels) < 3 or _IPV4.match(host):
+        return host
+    if len(labels[-1]) == 2 and labels[-2] in _SHARED_SECOND_LEVEL:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def _within(host, domain):
+    return host == domain or host.endswith('.' + domain)
+
+
+def is_blocked(resource_type, host, site, allowed_domains=CDN_DOMAINS, blocked_domains=()):
+    """
+    True for requests the extractors do not need: blocked resource types,
+    ``blocked_domains``, and hosts outside the page's registrable domain
+    ``site`` that are not in ``allowed_domains``.
+    """
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    if any(_within(host, domain) for domain in blocked_domains):
+        return True
+    if _within(host, site):
+        return False
+    return not any(_within(host, domain) for domain in allowed_domains)
+
+
+def load_lean(page, url, selectors, config, timings):
+    """
+    Navigate with request interception and wait for ``selectors``.
+
+    Records navigate_ms, wait_ms, requests, blocked and bytes (sum of the
+    Content-Length of the responses let through) in ``timings``; a selector
+    that does not appear within the wait budget sets ``wait_timed_out`` and
+    extraction goes ahead with whatever has rendered.
+    """
+    allowed_domains = CDN_DOMAINS + tuple(config['BROWSER_ALLOWED_DOMAINS'])
+    blocked_domains = tuple(config['BROWSER_BLOCKED_DOMAINS'])
+    site = {'domain': registrable_domain(_host(url))}
+    counts = {'requests': 0, 'blocked': 0, 'bytes': 0}
+
+    def intercept(route):
+        request = route.request
+        counts['requests'] += 1
+        host = _host(request.url)
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            # The page itself, including redirects to another site, which then becomes first-party
+            site['domain'] = registrable_domain(host)
+            route.continue_()
+        elif is_blocked(request.resource_type, host, site['domain'], allowed_domains, blocked_domains):
+            counts['blocked'] += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    def on_response(response):
+        try:
+            counts['bytes'] += int(response.headers.get('content-length') or 0)
+        except ValueError:
+            pass
+
+    page.route('**/*', intercept)
+    page.on('response', on_response)
+    try:
+        started = time.perf_counter()
+        page.goto(url, wait_until='domcontentloaded', timeout=config['BROWSER_NAVIGATE_TIMEOUT_MS'])
+        timings['navigate_ms'] = _ms(started)
+
+        started = time.perf_counter()
+        budget = config['BROWSER_WAIT_TIMEOUT_MS']
+        for selector in selectors:
+            remaining = budget - (time.perf_counter() - started) * 1000
+            try:
+                if remaining <= 0:
+                    raise PlaywrightTimeoutError("Wait budget exhausted")
+                page.wait_for_selector(selector, state='attached', timeout=remaining)
+            except PlaywrightTimeoutError:
+                timings['wait_timed_out'] = True
+                break
+        timings['wait_ms'] = _ms(started)
+    finally:
+        timings.update(counts)
+
+
+def load_full(page, url, timings):
+    """Original navigation: every resource, then up to 15 s of network idle"""
+    bytes_seen = [0]
+
+    def on_response(response):
+        try:
+            bytes_seen[0] += int(response.headers.get('content-length') or 0)
+        except ValueError:
+            pass
+
+    page.on('response', on_response)
+    try:
+        started = time.perf_counter()
+        page.goto(url, wait_until='domcontentloaded', timeout=15000)
+        timings['navigate_ms'] = _ms(started)
+        started = time.perf_counter()
+        try:
+            page.wait_for_load_state('networkidle', timeout=15000)
+        except PlaywrightTimeoutError:
+            pass
+        timings['wait_ms'] = _ms(started)
+    finally:
+        timings['bytes'] = bytes_seen[0]
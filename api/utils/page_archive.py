@@ -0,0 +1,150 @@
+"""
+Content-addressed archive of fetched product pages.
+
+Page HTML is stored once per SHA-256 digest under ``objects/ab/<digest>``,
+compressed with zstd when ``zstandard`` is installed and gzip otherwise; the
+``page_snapshot`` table records every fetch (canonical URL, time, source,
+digest), so a page fetched again unchanged costs one index row. Archiving is
+off unless ``PAGE_ARCHIVE_ENABLED`` and never fails the parse that fed it.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func, select
+from api.app_factory import db
+from api.models import PageSnapshot
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+CODECS = ('.zst', '.gz')
+
+_create_lock = threading.Lock()
+
+
+class PageArchive:
+    """Compressed blobs on disk, keyed by the SHA-256 of the HTML"""
+
+    def __init__(self, root):
+        self.root = root
+        self.codec = '.zst' if zstandard is not None else '.gz'
+
+    def _path(self, digest, codec):
+        return os.path.join(self.root, 'objects', digest[:2], digest + codec)
+
+    def _find(self, digest):
+        for codec in CODECS:
+            path = self._path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def put(self, html):
+        """Store ``html`` unless an identical page is already archived; returns (digest, size)"""
+        raw = html.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        if self._find(digest)[0] is None:
+            if self.codec == '.zst':
+                blob = zstandard.ZstdCompressor(level=10).compress(raw)
+            else:
+                blob = gzip.compress(raw, compresslevel=9, mtime=0)
+            path = self._path(digest, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        return digest, len(raw)
+
+    def get(self, digest):
+        """The archived HTML for ``digest``; KeyError if it is not archived"""
+        path, codec = self._find(digest)
+        if path is None:
+            raise KeyError(digest)
+        with open(path, 'rb') as f:
+            blob = f.read()
+        if codec == '.zst':
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst pages")
+            raw = zstandard.ZstdDecompressor().decompress(blob)
+        else:
+            raw = gzip.decompress(blob)
+        return raw.decode('utf-8')
+
+    def stored_bytes(self):
+        total = 0
+        for directory, _, files in os.walk(os.path.join(self.root, 'objects')):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+
+def archive_root(app):
+    return app.config['PAGE_ARCHIVE_DIR'] or os.path.join(app.instance_path, 'page_archive')
+
+
+def get_page_archive(app=None):
+    """Return the app's page archive, creating it on first use"""
+    app = app or current_app._get_current_object()
+    archive = app.extensions.get('page_archive')
+    if archive is None:
+        with _create_lock:
+            archive = app.extensions.get('page_archive')
+            if archive is None:
+                archive = app.extensions['page_archive'] = PageArchive(archive_root(app))
+    return archive
+
+
+def archive_page(url, html, source, result=None):
+    """
+    Archive a fetched page when the archive is enabled, with the price and
+    availability its parse ``result`` read; returns the snapshot id or None.
+    """
+    if not current_app.config['PAGE_ARCHIVE_ENABLED'] or not html:
+        return None
+    from api.utils.parse_cache import canonical_url
+    from api.utils.url_parser import url_domain
+    app = current_app._get_current_object()
+    # A context (and session) of its own: this runs inside parse threads
+    with app.app_context():
+        try:
+            digest, size = get_page_archive(app).put(html)
+            result = result or {}
+            snapshot = PageSnapshot(url_key=canonical_url(url), url=url, domain=url_domain(url), source=source,
+                                    sha256=digest, size=size, fetched_at=datetime.utcnow(),
+                                    price=result.get('price'), available=result.get('available'))
+            db.session.add(snapshot)
+            db.session.commit()
+            return snapshot.id
+        except Exception as ex:
+            db.session.rollback()
+            app.logger.warning(f"Could not archive {url}: {ex}")
+            return None
+
+
+def latest_snapshots(url_keys=None):
+    """The newest snapshot of each canonical URL (optionally only ``url_keys``), by url_key"""
+    ranked = select(
+        PageSnapshot.id, PageSnapshot.url_key, PageSnapshot.url, PageSnapshot.domain, PageSnapshot.source,
+        PageSnapshot.sha256, PageSnapshot.fetched_at, PageSnapshot.price, PageSnapshot.available,
+        func.row_number().over(
+            partition_by=PageSnapshot.url_key,
+            order_by=(PageSnapshot.fetched_at.desc(), PageSnapshot.id.desc())
+        ).label('rank')
+    )
+    if url_keys is not None:
+        ranked = ranked.where(PageSnapshot.url_key.in_(url_keys))
+    ranked = ranked.subquery()
+    return db.session.execute(
+        select(ranked.c.id, ranked.c.url_key, ranked.c.url, ranked.c.domain, ranked.c.source,
+               ranked.c.sha256, ranked.c.fetched_at, ranked.c.price, ranked.c.available)
+        .where(ranked.c.rank == 1)
+        .order_by(ranked.c.url_key)
+    ).all()
@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from api.models import Item, Option
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Sort name -> column; every sort is paired with Item.id as a tie-breaker so the
+# keyset (column, id) is unique and served by the matching (column, id) index
+SORT_COLUMNS = {
+    'id': Item.id,
+    'created_at': Item.created_at,
+}
+DEFAULT_SORT = 'id'
+
+
+class PaginationError(ValueError):
+    """Raised for malformed limit/cursor/sort/filter arguments"""
+
+
+def encode_cursor(sort, value, item_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'v': value, 'id': item_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, item_id = payload['v'], int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if payload.get('s') != sort:
+        raise PaginationError("Cursor was issued for a different sort order")
+    if sort.lstrip('-') == 'created_at' and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, item_id
+
+
+def _parse_number(args, name, cast):
+    raw = args.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return cast(raw)
+    except ValueError:
+        raise PaginationError(f"Invalid value for '{name}'")
+
+
+def parse_limit(args, default=DEFAULT_LIMIT):
+    limit = _parse_number(args, 'limit', int)
+    if limit is None:
+        return default
+    if limit < 1:
+        raise PaginationError("'limit' must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_sort(args):
+    sort = args.get('sort') or DEFAULT_SORT
+    if sort.lstrip('-') not in SORT_COLUMNS:
+        raise PaginationError(f"Unsupported sort '{sort}'")
+    return sort
+
+
+def apply_item_filters(query, args):
+    """Apply the server-side item filters from the request arguments"""
+    category_id = _parse_number(args, 'category_id', int)
+    if category_id is not None:
+        query = query.filter(Item.category_id == category_id)
+    subcategory_id = _parse_number(args, 'subcategory_id', int)
+    if subcategory_id is not None:
+        query = query.filter(Item.subcategory_id == subcategory_id)
+    room = args.get('room')
+    if room:
+        query = query.filter(Item.room == room)
+    has_selection = args.get('has_selection')
+    if has_selection not in (None, ''):
+        # Driven by the partial index over selected options
+        selected_item_ids = select(Option.item_id).where(Option.selected == True)
+        if has_selection.lower() in ('1', 'true', 'yes'):
+            query = query.filter(Item.id.in_(selected_item_ids))
+        elif has_selection.lower() in ('0', 'false', 'no'):
+            query = query.filter(Item.id.notin_(selected_item_ids))
+        else:
+            raise PaginationError("Invalid value for 'has_selection'")
+    min_budget = _parse_number(args, 'min_budget', float)
+    if min_budget is not None:
+        query = query.filter(Item.budget >= min_budget)
+    max_budget = _parse_number(args, 'max_budget', float)
+    if max_budget is not None:
+        query = query.filter(Item.budget <= max_budget)
+    return query
+
+
+def apply_keyset(query, args, default_limit=DEFAULT_LIMIT):
+    """
+    Order and limit an item query for keyset pagination.
+
+    Returns (query, limit, sort). The query fetches one extra row so
+    ``finish_page`` can tell whether another page exists.
+    """
+    limit = parse_limit(args, default_limit)
+    sort = parse_sort(args)
+    descending = sort.startswith('-')
+    column = SORT_COLUMNS[sort.lstrip('-')]
+
+    cursor = args.get('cursor')
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        if column is Item.id:
+            query = query.filter(Item.id < last_id if descending else Item.id > last_id)
+        elif descending:
+            query = query.filter(or_(column < value, and_(column == value, Item.id < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, Item.id > last_id)))
+
+    if column is Item.id:
+        order_by = [Item.id.desc() if descending else Item.id.asc()]
+    elif descending:
+        order_by = [column.desc(), Item.id.desc()]
+    else:
+        order_by = [column.asc(), Item.id.asc()]
+    return query.order_by(*order_by).limit(limit + 1), limit, sort
+
+
+def finish_page(rows, limit, sort, item_of=lambda row: row):
+    """Trim the look-ahead row and build the cursor for the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = item_of(rows[-1])
+    return rows, encode_cursor(sort, getattr(last, sort.lstrip('-')), last.id)
@@ -0,0 +1,240 @@
+"""
+Persistent cache of URL parse results.
+
+Entries are keyed by ``canonical_url`` so the same product reached through
+different links (tracking parameters, mobile hosts, slugs) is parsed once.
+An entry is fresh for its domain's TTL; after that it is still served for
+``PARSE_CACHE_STALE`` seconds while a background parse refreshes it
+(stale-while-revalidate). Older entries, and ``force_refresh``, parse again.
+Hits are counted in memory and written to ``hits`` in batches, so a cached
+read never opens a write transaction. Results missing a required field (a
+blocked or half-rendered page) are returned but never cached, so the next
+request parses again instead of serving the gap for a whole TTL.
+"""
+
+import re
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlparse
+from flask import current_app
+from sqlalchemy import bindparam, update
+from api.app_factory import db
+from api.models import ParseCache
+from api.utils.structured_data import is_complete
+
+# Cache hits counted in memory before they are written to parse_cache.hits
+HIT_FLUSH_EVERY = 100
+
+# Query parameters that never change which product a link points to
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'yclid', 'ref', 'ref_', 'tag', 'spm', 'srsltid', 'psc', 'th'}
+TRACKING_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_')
+
+# (site, host pattern, product id pattern over the path) -> key "<host>:<id>"; hosts
+# must be the store's domain or a subdomain of it, never a name that merely contains it
+PRODUCT_ID_PATTERNS = [
+    ('digikala', re.compile(r'(?:^|\.)digikala\.com$'),
+     re.compile(r'/product/(dkp-\d+)', re.IGNORECASE)),
+    ('torob', re.compile(r'(?:^|\.)torob\.com$'),
+     re.compile(r'/p/([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})', re.IGNORECASE)),
+    ('amazon', re.compile(r'(?:^|\.)amazon\.(?:com|co\.[a-z]{2}|com\.[a-z]{2}|[a-z]{2})$'),
+     re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/asin)/([A-Z0-9]{10})(?:[/?]|$)', re.IGNORECASE)),
+]
+
+
+def _host(netloc):
+    host = netloc.lower().rsplit('@', 1)[-1].split(':', 1)[0]
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def canonical_url(url):
+    """
+    Return the cache key for a product URL.
+
+    Known stores collapse to "<host>:<product id>" (e.g. "digikala.com:dkp-123");
+    other links keep scheme-less host + path with tracking parameters removed
+    and the remaining query sorted.
+    """
+    parsed = urlparse(url.strip())
+    if not parsed.scheme or not parsed.netloc:
+        raise ValueError("Invalid URL format")
+    host = _host(parsed.netloc)
+    for site, host_pattern, pattern in PRODUCT_ID_PATTERNS:
+        if host_pattern.search(host):
+            match = pattern.search(parsed.path)
+            if match:
+                product_id = match.group(1)
+                # ASINs are upper case; the other ids are case-insensitive too
+                return f"{host}:{product_id.upper() if site == 'amazon' else product_id.lower()}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parsed.path.rstrip('/') or '/'
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else '')
+
+
+def ttl_for(domain, config=None):
+    """Freshness lifetime in seconds for a domain (PARSE_CACHE_DOMAIN_TTLS, else PARSE_CACHE_TTL)"""
+    config = config or current_app.config
+    for suffix, ttl in config['PARSE_CACHE_DOMAIN_TTLS'].items():
+        if domain == suffix or domain.endswith('.' + suffix):
+            return ttl
+    return config['PARSE_CACHE_TTL']
+
+
+def _state():
+    return current_app.extensions.setdefault('parse_cache', {
+        'lock': threading.Lock(),
+        'counters': Counter(),
+        'refreshing': set(),
+        'hits': Counter()
+    })
+
+
+def _count(state, key):
+    with state['lock']:
+        state['counters'][key] += 1
+
+
+def flush_hits(app=None):
+    """Add the hits counted in memory to parse_cache.hits in one batched UPDATE, in a session of its own"""
+    app = app or current_app._get_current_object()
+    state = app.extensions.get('parse_cache')
+    if state is None:
+        return
+    with state['lock']:
+        hits, state['hits'] = state['hits'], Counter()
+    if not hits:
+        return
+    with app.app_context():
+        try:
+            table = ParseCache.__table__
+            db.session.execute(
+                update(table).where(table.c.url_key == bindparam('key'))
+                .values(hits=table.c.hits + bindparam('count')),
+                [{'key': key, 'count': count} for key, count in hits.items()]
+            )
+            db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            app.logger.warning(f"Parse cache hit counts were not saved: {ex}")
+
+
+def _count_hit(state, key):
+    with state['lock']:
+        state['hits'][key] += 1
+        due = sum(state['hits'].values()) >= HIT_FLUSH_EVERY
+    if due:
+        flush_hits()
+
+
+def cache_stats():
+    flush_hits()
+    state = _state()
+    with state['lock']:
+        counters = dict(state['counters'])
+    stats = {key: counters.get(key, 0) for key in ('hit', 'stale', 'miss', 'refresh', 'revalidated', 'error')}
+    stats['entries'] = db.session.query(ParseCache).count()
+    return stats
+
+
+def _resolved(data, timings):
+    future = Future()
+    future.set_result((data, timings))
+    return future
+
+
+def _store(app, key, domain, url, data):
+    # Runs in whichever thread finished the parse; use a context (and session) of its own
+    with app.app_context():
+        try:
+            entry = db.session.get(ParseCache, key)
+            if entry is None:
+                entry = ParseCache(url_key=key, hits=0)
+                db.session.add(entry)
+            entry.domain = domain
+            entry.url = url
+            entry.data = {field: value for field, value in data.items() if field != 'link'}
+            entry.fetched_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as ex:
+            db.session.rollback()
+            app.logger.warning(f"Parse cache write failed for {key}: {ex}")
+
+
+def _parse_and_store(url, key, domain, submit, status=None):
+    """Submit a parse and return a Future that resolves once its result is cached"""
+    app = current_app._get_current_object()
+    outer = Future()
+    outer.set_running_or_notify_cancel()
+
+    def finished(inner):
+        try:
+            data, timings = inner.result()
+        except Exception as ex:
+            outer.set_exception(ex)
+            return
+        if is_complete(data):
+            _store(app, key, domain, url, data)
+        if status is not None:
+            timings['cache'] = status
+        outer.set_result((data, timings))
+
+    submit(url).add_done_callback(finished)
+    return outer
+
+
+def _revalidate(url, key, domain, submit):
+    state = _state()
+    with state['lock']:
+        if key in state['refreshing']:
+            return
+        state['refreshing'].add(key)
+
+    def done(future):
+        with state['lock']:
+            state['refreshing'].discard(key)
+            state['counters']['revalidated' if future.exception() is None else 'error'] += 1
+
+    try:
+        _parse_and_store(url, key, domain, submit).add_done_callback(done)
+    except Exception:
+        with state['lock']:
+            state['refreshing'].discard(key)
+        raise
+
+
+def submit_cached_parse(url, force_refresh=False, submit=None):
+    """
+    Cached counterpart of ``submit_product_url``.
+
+    Returns a Future of (data, timings); timings['cache'] is one of 'hit',
+    'stale' (served while a refresh runs), 'miss' or 'refresh' (forced).
+    """
+    if submit is None:
+        from api.utils.url_parser import submit_product_url as submit
+    state = _state()
+    key = canonical_url(url)
+    domain = _host(urlparse(url.strip()).netloc)
+
+    entry = None if force_refresh else db.session.get(ParseCache, key)
+    if entry is not None:
+        age = (datetime.utcnow() - entry.fetched_at).total_seconds()
+        ttl = ttl_for(domain)
+        if age <= ttl + current_app.config['PARSE_CACHE_STALE']:
+            status = 'hit' if age <= ttl else 'stale'
+            _count(state, status)
+            data = dict(entry.data, link=url)
+            _count_hit(state, key)
+            if status == 'stale':
+                _revalidate(url, key, domain, submit)
+            return _resolved(data, {'cache': status, 'age_s': round(age)})
+
+    status = 'refresh' if force_refresh else 'miss'
+    _count(state, status)
+    return _parse_and_store(url, key, domain, submit, status)
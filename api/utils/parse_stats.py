@@ -0,0 +1,48 @@
+"""
+Per-domain parse statistics for this process.
+
+Every finished parse is recorded under (domain, mode), where mode is
+'static', 'lean' or 'full', so the tiers and navigation modes can be compared
+on real traffic.
+"""
+
+import threading
+from flask import current_app
+
+# Timing fields averaged per (domain, mode)
+STAT_FIELDS = ('total_ms', 'fetch_ms', 'navigate_ms', 'wait_ms', 'extract_ms', 'bytes', 'blocked')
+
+
+def _state():
+    return current_app.extensions.setdefault('parse_stats', {
+        'lock': threading.Lock(),
+        'totals': {}
+    })
+
+
+def record_parse(domain, mode, timings):
+    state = _state()
+    with state['lock']:
+        totals = state['totals'].setdefault((domain, mode), {'parses': 0})
+        totals['parses'] += 1
+        for field in STAT_FIELDS:
+            value = timings.get(field)
+            if value is not None:
+                totals[field] = totals.get(field, 0) + value
+                totals[f'{field}_count'] = totals.get(f'{field}_count', 0) + 1
+
+
+def parse_stats():
+    """[{domain, mode, parses, avg_<field>...}] ordered by domain and mode"""
+    state = _state()
+    with state['lock']:
+        items = sorted((key, dict(totals)) for key, totals in state['totals'].items())
+    stats = []
+    for (domain, mode), totals in items:
+        entry = {'domain': domain, 'mode': mode, 'parses': totals['parses']}
+        for field in STAT_FIELDS:
+            count = totals.get(f'{field}_count')
+            if count:
+                entry[f'avg_{field}'] = round(totals[field] / count, 1)
+        stats.append(entry)
+    return stats
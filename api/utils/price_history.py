@@ -0,0 +1,165 @@
+"""
+Option price history.
+
+``record_prices`` appends the current price/availability of some options to
+``price_history`` with one INSERT ... SELECT that skips options whose latest
+history row already holds the same values, so only real changes are stored.
+``daily_series`` downsamples the changes to per-day min/max/last in SQL with
+window functions, seeding each day with the price carried in from the day
+before; Python only folds that price into the aggregated rows.
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import aliased
+from api.app_factory import db
+from api.models import Option, PriceHistory
+
+
+def record_prices(option_ids, recorded_at=None):
+    """Log the options in ``option_ids`` (ids or a SELECT of ids) whose price or availability changed; returns rows added"""
+    previous = aliased(PriceHistory)
+    latest = (
+        select(previous.id)
+        .where(previous.option_id == Option.id)
+        .order_by(previous.recorded_at.desc(), previous.id.desc())
+        .limit(1)
+        .correlate(Option)
+        .scalar_subquery()
+    )
+    unchanged = (
+        select(PriceHistory.id)
+        .where(
+            PriceHistory.id == latest,
+            PriceHistory.price.is_not_distinct_from(Option.price),
+            PriceHistory.available.is_not_distinct_from(Option.available)
+        )
+        .exists()
+    )
+    result = db.session.execute(
+        insert(PriceHistory).from_select(
+            ['option_id', 'recorded_at', 'price', 'available'],
+            select(
+                Option.id,
+                literal(recorded_at or datetime.utcnow(), PriceHistory.recorded_at.type),
+                Option.price,
+                Option.available
+            ).where(Option.id.in_(option_ids), ~unchanged)
+        )
+    )
+    return result.rowcount
+
+
+def forget_prices(option_ids):
+    """Drop the history of deleted options"""
+    db.session.execute(delete(PriceHistory).where(PriceHistory.option_id.in_(option_ids)))
+
+
+def history_window(args, default_days, max_days):
+    """
+    (since, until) datetimes from ``?days=N`` (counted back from now or from
+    ``until``) or ``?since=YYYY-MM-DD``; ``until`` is an inclusive date.
+    Raises ValueError for malformed values.
+    """
+    until = None
+    if args.get('until'):
+        until = datetime.combine(date.fromisoformat(args['until']) + timedelta(days=1), datetime.min.time())
+    if args.get('since'):
+        since = datetime.combine(date.fromisoformat(args['since']), datetime.min.time())
+    else:
+        days = int(args.get('days', default_days))
+        if days < 1:
+            raise ValueError("days must be positive")
+        since = (until or datetime.utcnow()) - timedelta(days=min(days, max_days))
+    if until is not None and since >= until:
+        raise ValueError("since must be before until")
+    return since, until
+
+
+def _day(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _bound(pick, value, carried):
+    present = [price for price in (value, carried) if price is not None]
+    return pick(present) if present else None
+
+
+def daily_series(option_ids, since, until=None):
+    """
+    Per-day min, max and last price of each option between ``since`` and
+    ``until`` (datetimes), plus its ``opening`` value from before ``since``.
+
+    A day starts at the price carried in from the previous change (or the
+    opening value), so its min and max cover that price as well as the
+    day's changes.
+
+    Returns [{option_id, opening, points: [{date, min, max, last, available,
+    changes}]}] ordered by option id. Days without a change are omitted; the
+    price held on such a day is the previous point's ``last``.
+    """
+    in_range = [PriceHistory.option_id.in_(option_ids), PriceHistory.recorded_at >= since]
+    if until is not None:
+        in_range.append(PriceHistory.recorded_at < until)
+    day = func.date(PriceHistory.recorded_at)
+    newest_first = (PriceHistory.recorded_at.desc(), PriceHistory.id.desc())
+    oldest_first = (PriceHistory.recorded_at, PriceHistory.id)
+
+    changes = select(
+        PriceHistory.option_id,
+        day.label('day'),
+        PriceHistory.recorded_at,
+        PriceHistory.id,
+        PriceHistory.price,
+        PriceHistory.available,
+        # The price each change replaced; None for the first change in the window
+        func.lag(PriceHistory.price).over(partition_by=PriceHistory.option_id, order_by=oldest_first).label('previous')
+    ).where(*in_range).subquery()
+    bucket = (changes.c.option_id, changes.c.day)
+    ranked = select(
+        changes.c.option_id,
+        changes.c.day,
+        func.min(changes.c.price).over(partition_by=bucket).label('low'),
+        func.max(changes.c.price).over(partition_by=bucket).label('high'),
+        func.count().over(partition_by=bucket).label('changes'),
+        func.first_value(changes.c.previous).over(
+            partition_by=bucket, order_by=(changes.c.recorded_at, changes.c.id)).label('carried'),
+        changes.c.price,
+        changes.c.available,
+        func.row_number().over(
+            partition_by=bucket, order_by=(changes.c.recorded_at.desc(), changes.c.id.desc())).label('rank')
+    ).subquery()
+    points = db.session.execute(
+        select(ranked.c.option_id, ranked.c.day, ranked.c.low, ranked.c.high, ranked.c.price,
+               ranked.c.available, ranked.c.changes, ranked.c.carried)
+        .where(ranked.c.rank == 1)
+        .order_by(ranked.c.option_id, ranked.c.day)
+    ).all()
+
+    before = select(
+        PriceHistory.option_id,
+        PriceHistory.price,
+        PriceHistory.available,
+        func.row_number().over(partition_by=PriceHistory.option_id, order_by=newest_first).label('rank')
+    ).where(PriceHistory.option_id.in_(option_ids), PriceHistory.recorded_at < since).subquery()
+    openings = db.session.execute(
+        select(before.c.option_id, before.c.price, before.c.available).where(before.c.rank == 1)
+    ).all()
+
+    series = {}
+    for option_id, price, available in openings:
+        series[option_id] = {'option_id': option_id, 'opening': {'price': price, 'available': available}, 'points': []}
+    for option_id, day_value, low, high, last, available, count, carried in points:
+        entry = series.setdefault(option_id, {'option_id': option_id, 'opening': None, 'points': []})
+        if carried is None and not entry['points'] and entry['opening'] is not None:
+            # The window's first change replaced the price held before ``since``
+            carried = entry['opening']['price']
+        entry['points'].append({
+            'date': _day(day_value),
+            'min': _bound(min, low, carried),
+            'max': _bound(max, high, carried),
+            'last': last,
+            'available': available,
+            'changes': count
+        })
+    return [series[option_id] for option_id in sorted(series)]
@@ -0,0 +1,202 @@
+"""
+Incremental price refresh for tracked options.
+
+Each tick takes a bounded batch of options whose ``last_checked`` is older
+than ``PRICE_REFRESH_MAX_AGE_DAYS``, re-parses their links with per-domain
+concurrency and rate limits, and writes price, availability and
+``last_checked`` back; parsed values only land on options nobody edited
+while the tick was parsing. Ticks walk the options by id and run as
+``refresh`` jobs that enqueue their own continuation, so a run is resumable
+and never holds a worker for long.
+"""
+
+import time
+import uuid
+from functools import partial
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import bindparam, exists, insert, literal, or_, select, update
+from api.app_factory import db
+from api.models import Job, Option
+from api.utils.batch_parser import iter_parsed
+from api.utils.jobs import enqueue, job_handler
+from api.utils.price_history import record_prices
+from api.utils.summary import apply_item_change, snapshot_item
+from api.utils.url_parser import url_domain
+from api.utils.versioning import bump_versions, item_scope
+
+
+def stale_options(after_id, limit, max_age_days):
+    """(id, item_id, link, price, available) of options due for a refresh, by id"""
+    cutoff = date.today() - timedelta(days=max_age_days)
+    return db.session.execute(
+        select(Option.id, Option.item_id, Option.link, Option.price, Option.available)
+        .where(
+            Option.id > after_id,
+            Option.link.is_not(None),
+            Option.link != '',
+            or_(Option.last_checked.is_(None), Option.last_checked <= cutoff)
+        )
+        .order_by(Option.id)
+        .limit(limit)
+    ).all()
+
+
+def apply_parsed_prices(outcomes, checked_on=None, observed_at=None):
+    """
+    Write parsed price and availability to options, keeping the summary,
+    price history and item versions in step.
+
+    ``outcomes`` are (row, data) pairs, each row an option's (id, item_id,
+    price, available) as read before parsing. Only the parsed columns that
+    differ are written, and only while the option still holds the values read
+    then: an edit committed during the parse wins and the parsed values are
+    dropped. ``last_checked`` is set to ``checked_on`` unless it is None.
+    History rows are stamped now, or with ``observed_at[option id]`` when
+    the values were seen earlier (an archived page). Returns the number of
+    items whose options changed.
+    """
+    changes = []
+    for row, data in outcomes:
+        values = {}
+        if data.get('price') is not None and data['price'] != row.price:
+            values['price'] = data['price']
+        if data.get('available') is not None and data['available'] != row.available:
+            values['available'] = data['available']
+        if values:
+            changes.append((row, values))
+
+    if checked_on is not None and outcomes:
+        db.session.execute(update(Option), [{'id': row.id, 'last_checked': checked_on} for row, _ in outcomes])
+    # Selection may have changed since the rows were read, so every touched item is tracked
+    before = {row.item_id: snapshot_item(row.item_id) for row, _ in changes}
+    # One executemany per set of changed columns; the WHERE clause drops rows edited since they were read
+    table = Option.__table__
+    by_columns = {}
+    for row, values in changes:
+        by_columns.setdefault(tuple(sorted(values)), []).append(dict(
+            {f'new_{column}': value for column, value in values.items()},
+            option_id=row.id, read_price=row.price, read_available=row.available
+        ))
+    for columns, params in by_columns.items():
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam('option_id'),
+                   table.c.price.is_not_distinct_from(bindparam('read_price')),
+                   table.c.available.is_not_distinct_from(bindparam('read_available')))
+            .values({column: bindparam(f'new_{column}') for column in columns}),
+            params
+        )
+    # executemany reports no per-row counts, so the rows now holding the parsed values are the applied ones
+    current = {row.id: row for row in db.session.execute(
+        select(Option.id, Option.price, Option.available).where(Option.id.in_([row.id for row, _ in changes]))
+    )} if changes else {}
+    changed_options = []
+    changed_items = set()
+    for row, values in changes:
+        now = current.get(row.id)
+        if now is not None and all(getattr(now, column) == value for column, value in values.items()):
+            changed_options.append(row.id)
+            changed_items.add(row.item_id)
+    for item_id in changed_items:
+        apply_item_change(before[item_id], snapshot_item(item_id))
+    by_time = {}
+    for option_id in changed_options:
+        by_time.setdefault((observed_at or {}).get(option_id), []).append(option_id)
+    for recorded_at, option_ids in by_time.items():
+        record_prices(option_ids, recorded_at)
+    if changed_items:
+        bump_versions(*(item_scope(item_id) for item_id in changed_items))
+    db.session.commit()
+    return len(changed_items)
+
+
+def refresh_tick(after_id=0, limit=None, submit=None):
+    """
+    Refresh one batch of stale options with ids above ``after_id``.
+
+    Returns stats including ``next_after_id``, the cursor for the following
+    tick, or None once the run has reached the last stale option.
+    """
+    from api.utils.parse_cache import submit_cached_parse
+
+    config = current_app.config
+    limit = limit or config['PRICE_REFRESH_BATCH']
+    # Always fetch: a stale cache entry would write yesterday's price back as
+    # today's. The fresh results still land in the cache for the API.
+    submit = submit or partial(submit_cached_parse, force_refresh=True)
+    started = time.perf_counter()
+    rows = stale_options(after_id, limit, config['PRICE_REFRESH_MAX_AGE_DAYS'])
+
+    parsed = []
+    failed = 0
+    domains = {}
+    for outcome in iter_parsed([row.link for row in rows], submit, url_domain,
+                               concurrency=config['PRICE_REFRESH_CONCURRENCY'],
+                               per_domain=config['PRICE_REFRESH_PER_DOMAIN'],
+                               min_interval=config['PRICE_REFRESH_DOMAIN_INTERVAL'],
+                               timeout=config['PRICE_REFRESH_TICK_TIMEOUT']):
+        if outcome.error is None:
+            parsed.append((rows[outcome.index], outcome.data))
+            domain = url_domain(outcome.url)
+            domains[domain] = domains.get(domain, 0) + 1
+        else:
+            failed += 1
+            current_app.logger.info(f"Price refresh failed for option {rows[outcome.index].id}: {outcome.error}")
+
+    items_changed = apply_parsed_prices(parsed, checked_on=date.today())
+    elapsed = time.perf_counter() - started
+    return {
+        'checked': len(rows),
+        'refreshed': len(parsed),
+        'failed': failed,
+        'items_changed': items_changed,
+        'domains': domains,
+        'elapsed_s': round(elapsed, 2),
+        'per_minute': round(len(parsed) / elapsed * 60, 1) if elapsed > 0 else None,
+        'next_after_id': rows[-1].id if len(rows) == limit else None
+    }
+
+
+@job_handler('refresh')
+def refresh_job(payload):
+    """One tick of a refresh run; queues the next tick until the run is complete"""
+    stats = refresh_tick(after_id=payload.get('after_id', 0))
+    if stats['next_after_id'] is not None:
+        # Keyed by run and cursor: a tick that ran twice still queues one continuation
+        run = payload.get('run')
+        enqueue('refresh', {'run': run, 'after_id': stats['next_after_id']},
+                unique_key=f"refresh:{run}:{stats['next_after_id']}" if run else None)
+        db.session.commit()
+    current_app.logger.info(
+        f"Price refresh tick after {payload.get('after_id', 0)}: {stats['refreshed']}/{stats['checked']} "
+        f"refreshed, {stats['per_minute']} options/min"
+    )
+    return stats
+
+
+def schedule_refresh():
+    """
+    Start a refresh run unless one is already queued or running.
+
+    The check and the insert are one INSERT ... SELECT WHERE NOT EXISTS, so
+    every worker can call this on its timer without starting duplicate runs.
+    Returns the new job id, or None.
+    """
+    now = datetime.utcnow()
+    active = select(Job.id).where(Job.kind == 'refresh', Job.status.in_((Job.QUEUED, Job.RUNNING)))
+    row = db.session.execute(
+        insert(Job)
+        .from_select(
+            ['kind', 'payload', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at'],
+            select(
+                literal('refresh'), literal({'run': uuid.uuid4().hex, 'after_id': 0}, Job.payload.type),
+                literal(Job.QUEUED),
+                literal(0), literal(current_app.config['JOB_MAX_ATTEMPTS']), literal(now, Job.run_after.type),
+                literal(now, Job.created_at.type)
+            ).where(~exists(active))
+        )
+        .returning(Job.id)
+    ).first()
+    db.session.commit()
+    return row.id if row else None
@@ -0,0 +1,183 @@
+"""
+Offline re-extraction of archived product pages.
+
+After a parser fix, ``reextract`` runs the current parsers over the newest
+archived snapshot of every option's link in a process pool and writes price
+and availability back in batches; nothing is fetched. An option whose price
+or availability changed after the snapshot was fetched, to values other than
+the ones that fetch's parse read, is skipped, so an old page never replaces a
+newer edit or refresh; history rows carry the snapshot's time. Raw (static)
+snapshots go through the structured-data extractor; rendered snapshots, and
+raw ones it leaves incomplete, are loaded into an offline Chromium page
+(JavaScript off, every request aborted) for the store's browser parser.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from flask import current_app
+from sqlalchemy import func, select
+from api.app_factory import db
+from api.models import Option, PriceHistory
+from api.utils.page_archive import archive_root, get_page_archive, latest_snapshots
+from api.utils.parse_cache import canonical_url
+from api.utils.price_refresh import apply_parsed_prices
+from api.utils.structured_data import extract_structured, is_complete
+from api.utils.url_parser import _site_profile, _store_name
+
+# Per process: the app context of pool workers and the offline browser
+_worker = {}
+
+
+def _init_worker(config):
+    from api.app_factory import create_app
+    app = create_app(config)
+    app.app_context().push()
+    _worker['app'] = app
+
+
+def _stop_browser():
+    browser = _worker.pop('browser', None)
+    driver = _worker.pop('driver', None)
+    try:
+        if browser is not None:
+            browser.close()
+        if driver is not None:
+            driver.stop()
+    except Exception:
+        pass
+
+
+def _render(html, parser):
+    """Run a browser parser over archived HTML without touching the network"""
+    if 'browser' not in _worker:
+        from playwright.sync_api import sync_playwright
+        _worker['driver'] = sync_playwright().start()
+        _worker['browser'] = _worker['driver'].chromium.launch(headless=True)
+        # Pool processes exit through multiprocessing, which skips atexit
+        Finalize(None, _stop_browser, exitpriority=10)
+    context = _worker['browser'].new_context(java_script_enabled=False)
+    try:
+        page = context.new_page()
+        page.route('**/*', lambda route: route.abort())
+        page.set_content(html, wait_until='domcontentloaded')
+        return parser(page)
+    finally:
+        context.close()
+
+
+def extract_snapshot(task):
+    """(snapshot id, parsed data, error) for one archived page; runs in a pool process"""
+    snapshot_id, url, domain, source, digest, render = task
+    try:
+        html = get_page_archive().get(digest)
+        result = extract_structured(html)
+        store = _store_name(domain)
+        if store:
+            result['store'] = store
+        if render and (source == 'browser' or not is_complete(result)):
+            parser, _ = _site_profile(domain)
+            rendered = _render(html, parser)
+            # As in the live parse: the browser parser wins, structured data fills the gaps
+            for field, value in result.items():
+                if rendered.get(field) in (None, ''):
+                    rendered[field] = value
+            result = rendered
+        result['link'] = url
+        return snapshot_id, result, None
+    except Exception as ex:
+        return snapshot_id, None, f'{type(ex).__name__}: {ex}'
+
+
+def _extract_all(tasks, processes):
+    if processes < 1:
+        try:
+            yield from map(extract_snapshot, tasks)
+        finally:
+            _stop_browser()
+        return
+    app = current_app._get_current_object()
+    config = {
+        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+        'PAGE_ARCHIVE_DIR': archive_root(app),
+        'BROWSER_SELECTOR_TIMEOUT_MS': app.config['BROWSER_SELECTOR_TIMEOUT_MS'],
+    }
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(config,)) as executor:
+        yield from executor.map(extract_snapshot, tasks, chunksize=4)
+
+
+def _outdated(snapshot, row):
+    """
+    Whether the option holds values recorded after ``snapshot`` was fetched
+    that its parse did not read: an edit or a later refresh. Saving the
+    parse of this same fetch records its own values and does not count.
+    Availability is only compared when the parse read it, since options
+    default to available.
+    """
+    if row.last_recorded is None or row.last_recorded <= snapshot.fetched_at:
+        return False
+    if row.price != snapshot.price:
+        return True
+    return snapshot.available is not None and row.available != snapshot.available
+
+
+def reextract(processes=None, batch_size=None, render=True, domain=None):
+    """
+    Re-parse the newest snapshot of every archived option link and update the
+    options in batches of ``batch_size``. ``processes=0`` parses in this
+    process; ``render=False`` skips the browser parsers entirely.
+    """
+    config = current_app.config
+    processes = config['REEXTRACT_PROCESSES'] if processes is None else processes
+    batch_size = batch_size or config['REEXTRACT_BATCH']
+    started = time.perf_counter()
+
+    options_by_key = {}
+    last_recorded = (
+        select(func.max(PriceHistory.recorded_at))
+        .where(PriceHistory.option_id == Option.id)
+        .correlate(Option)
+        .scalar_subquery()
+    )
+    rows = db.session.execute(
+        select(Option.id, Option.item_id, Option.link, Option.price, Option.available,
+               last_recorded.label('last_recorded'))
+        .where(Option.link.is_not(None), Option.link != '')
+    ).all()
+    for row in rows:
+        try:
+            options_by_key.setdefault(canonical_url(row.link), []).append(row)
+        except ValueError:
+            continue
+    snapshots = [snapshot for snapshot in latest_snapshots()
+                 if snapshot.url_key in options_by_key and (domain is None or domain in snapshot.domain)]
+    snapshot_of = {snapshot.id: snapshot for snapshot in snapshots}
+    tasks = [(snapshot.id, snapshot.url, snapshot.domain, snapshot.source, snapshot.sha256, render)
+             for snapshot in snapshots]
+
+    stats = {'snapshots': len(tasks), 'options': 0, 'outdated': 0, 'failed': 0, 'items_changed': 0}
+    batch = []
+    observed_at = {}
+    for snapshot_id, data, error in _extract_all(tasks, processes):
+        if error is not None:
+            stats['failed'] += 1
+            current_app.logger.warning(f"Re-extracting snapshot {snapshot_id} failed: {error}")
+            continue
+        snapshot = snapshot_of[snapshot_id]
+        for row in options_by_key[snapshot.url_key]:
+            if _outdated(snapshot, row):
+                stats['outdated'] += 1
+                continue
+            batch.append((row, data))
+            observed_at[row.id] = snapshot.fetched_at
+        if len(batch) >= batch_size:
+            stats['items_changed'] += apply_parsed_prices(batch, observed_at=observed_at)
+            stats['options'] += len(batch)
+            batch, observed_at = [], {}
+    if batch:
+        stats['items_changed'] += apply_parsed_prices(batch, observed_at=observed_at)
+        stats['options'] += len(batch)
+    stats['elapsed_s'] = round(time.perf_counter() - started, 2)
+    return stats
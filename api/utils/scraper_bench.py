@@ -0,0 +1,165 @@
+"""
+Offline accuracy and speed benchmark for the URL parsers.
+
+The corpus is a directory of saved product pages plus an ``expected.json``
+manifest naming, for each page, the browser-tier parser of its store and the
+field values a correct parse yields. ``run_benchmark`` replays the pages from
+a local URL through the static tier and through each page's browser parser in
+lean and full navigation, and reports per parser and tier the share of
+expected fields extracted, p50/p95 latency and peak Python memory. Reports
+are plain JSON; ``compare`` lists the regressions between two of them.
+"""
+
+import json
+import math
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from flask import current_app
+from api.utils import url_parser
+
+TIERS = ('static', 'browser-lean', 'browser-full')
+
+Case = namedtuple('Case', ['page', 'parser', 'expected'])
+
+
+def load_corpus(directory):
+    """Cases from ``directory/expected.json``, ordered by page name"""
+    manifest = json.loads((Path(directory) / 'expected.json').read_text(encoding='utf-8'))
+    return [Case(page, entry['parser'], entry['expected']) for page, entry in sorted(manifest.items())]
+
+
+def field_matches(expected, actual):
+    """Numbers compare by value, strings ignoring case and runs of whitespace"""
+    if actual is None:
+        return False
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        try:
+            return math.isclose(float(actual), float(expected), rel_tol=1e-9)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(expected, str) and isinstance(actual, str):
+        return ' '.join(expected.split()).casefold() == ' '.join(actual.split()).casefold()
+    return expected == actual
+
+
+def score(expected, actual):
+    """(fields matched, fields expected, {field: value extracted} for the misses)"""
+    missed = {field: actual.get(field) for field, value in expected.items()
+              if not field_matches(value, actual.get(field))}
+    return len(expected) - len(missed), len(expected), missed
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty sample"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _parse(tier, case, url):
+    if tier == 'static':
+        # The parser name stands in for the store's domain, which only sets the store name
+        result, _ = url_parser._parse_static(url, case.parser)
+        return result
+    current_app.config['BROWSER_LEAN_MODE'] = tier == 'browser-lean'
+    future = url_parser._submit_browser(url, url_parser.url_domain(url), url_parser.SITE_PROFILES[case.parser])
+    result, _ = future.result(timeout=current_app.config['PARSE_TIMEOUT'])
+    return result
+
+
+def run_case(tier, case, url, repeat):
+    """Parse one page ``repeat`` times through ``tier``; scores the last result"""
+    latencies = []
+    peak = 0
+    result, error = {}, None
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        try:
+            result, error = _parse(tier, case, url), None
+        except Exception as ex:
+            result, error = {}, f'{type(ex).__name__}: {ex}'
+        latencies.append((time.perf_counter() - started) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    matched, expected, missed = score(case.expected, result)
+    return {
+        'page': case.page,
+        'parser': case.parser,
+        'tier': tier,
+        'matched': matched,
+        'expected': expected,
+        'missed': missed,
+        'error': error,
+        'latencies_ms': [round(latency, 2) for latency in latencies],
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+
+def summarize(cases):
+    """parser -> tier -> accuracy, p50/p95 latency and peak memory over its cases"""
+    grouped = {}
+    for case in cases:
+        grouped.setdefault(case['parser'], {}).setdefault(case['tier'], []).append(case)
+    parsers = {}
+    for parser, tiers in grouped.items():
+        for tier, runs in tiers.items():
+            latencies = [latency for run in runs for latency in run['latencies_ms']]
+            parsers.setdefault(parser, {})[tier] = {
+                'accuracy': round(sum(run['matched'] for run in runs) / max(1, sum(run['expected'] for run in runs)), 4),
+                'p50_ms': round(percentile(latencies, 0.5), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'peak_kib': max(run['peak_kib'] for run in runs),
+                'pages': len(runs),
+                'errors': sum(1 for run in runs if run['error'])
+            }
+    return parsers
+
+
+def run_benchmark(base_url, cases, tiers=TIERS, repeat=5, version=None):
+    """
+    Run every case through every tier against pages served under ``base_url``.
+
+    Memory is what the parse allocates in this Python process; for the browser
+    tiers Chromium's own memory is not included.
+    """
+    lean_mode = current_app.config['BROWSER_LEAN_MODE']
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        results = [run_case(tier, case, f"{base_url.rstrip('/')}/{case.page}", repeat)
+                   for case in cases for tier in tiers]
+    finally:
+        current_app.config['BROWSER_LEAN_MODE'] = lean_mode
+        if not tracing:
+            tracemalloc.stop()
+    return {
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'repeat': repeat,
+        'parsers': summarize(results),
+        'cases': results
+    }
+
+
+def compare(baseline, current, latency_tolerance=0.25, min_latency_ms=5.0):
+    """
+    Regressions of ``current`` against ``baseline`` as human-readable lines:
+    lower accuracy, or a p95 latency more than ``latency_tolerance`` (and
+    ``min_latency_ms``) above the baseline's.
+    """
+    regressions = []
+    for parser, tiers in sorted(current['parsers'].items()):
+        for tier, now in sorted(tiers.items()):
+            before = baseline['parsers'].get(parser, {}).get(tier)
+            if before is None:
+                continue
+            if now['accuracy'] < before['accuracy']:
+                regressions.append(f"{parser}/{tier}: accuracy {before['accuracy']:.0%} -> {now['accuracy']:.0%}")
+            limit = max(before['p95_ms'] * (1 + latency_tolerance), before['p95_ms'] + min_latency_ms)
+            if now['p95_ms'] > limit:
+                regressions.append(f"{parser}/{tier}: p95 {before['p95_ms']:.1f} ms -> {now['p95_ms']:.1f} ms")
+    return regressions
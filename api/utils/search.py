@@ -0,0 +1,193 @@
+"""
+Full-text search over items and options (SQLite FTS5).
+
+``item_search`` and ``option_search`` hold a normalized copy of the text
+columns, keyed by the item / option id. The write paths (``mutations`` and
+the bulk importer) re-index the rows they touch in the same transaction;
+normalization happens in Python, so the database itself has no app-only SQL
+functions and any SQLite client can still write to it. Writes made outside
+the app are picked up by ``create_search_index`` (``rebuild_search.py``).
+Queries are normalized the same way, so Arabic and Persian spellings, digits
+and ZWNJ variants of a word all match, and every term is matched as a
+prefix. Results are ranked with bm25.
+"""
+
+import re
+import unicodedata
+from sqlalchemy import DDL, column, delete, event, insert, select, table, text
+from api.app_factory import db
+from api.models import Item, Option
+from api.utils.serializers import ITEM_SHAPE, OPTION_SHAPE
+
+SEARCH_TYPES = ('all', 'item', 'option')
+
+# Folding applied after NFKC (which already maps Arabic presentation forms)
+_FOLD = str.maketrans({
+    '\u064a': '\u06cc',  # Arabic yeh -> Persian yeh
+    '\u0649': '\u06cc',  # alef maksura -> Persian yeh
+    '\u0643': '\u06a9',  # Arabic kaf -> keheh
+    '\u0629': '\u0647',  # teh marbuta -> heh
+    '\u06c0': '\u0647',  # heh with yeh above -> heh
+    '\u0623': '\u0627', '\u0625': '\u0627', '\u0671': '\u0627',  # hamza / wasla alefs -> alef
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u200c': ' ',        # ZWNJ separates the parts of a compound word
+    '\u200d': '', '\u200e': '', '\u200f': '', '\u0640': '',  # ZWJ, direction marks, tatweel
+    '\u066c': '', '\u066b': '.',  # Arabic thousands / decimal separators
+    **{chr(0x06f0 + n): str(n) for n in range(10)},  # Persian digits
+    **{chr(0x0660 + n): str(n) for n in range(10)},  # Arabic-Indic digits
+})
+
+# Harakat, tanwin, shadda, sukun, superscript alef and Quranic marks
+_DIACRITICS = re.compile('[\u064b-\u065f\u0670\u06d6-\u06ed]')
+_WORD = re.compile(r'\w+')
+
+
+def normalize_text(value):
+    """Search form of ``value``: Persian letters and digits folded, marks dropped, case folded"""
+    if value is None:
+        return None
+    value = unicodedata.normalize('NFKC', str(value)).translate(_FOLD)
+    return _DIACRITICS.sub('', value).casefold()
+
+
+def match_expression(query):
+    """FTS5 MATCH string requiring every word of ``query`` as a prefix; None if it has no words"""
+    words = _WORD.findall(normalize_text(query) or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+_SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS item_search USING fts5("
+    "name, room, notes, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS option_search USING fts5("
+    "brand, model_name, store, features, notes, item_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+]
+
+# Sync triggers of the first version of the index; they called an app-registered SQL function
+LEGACY_TRIGGERS = ('item_search_insert', 'item_search_update', 'item_search_delete',
+                   'option_search_insert', 'option_search_update', 'option_search_delete')
+
+# Fresh databases get the index with their tables (create_all creates option after item)
+for _statement in _SEARCH_SCHEMA:
+    event.listen(Option.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _table in ('item_search', 'option_search'):
+    event.listen(Option.__table__, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_table}').execute_if(dialect='sqlite'))
+
+# (index table, model, normalized text columns, columns copied as they are)
+_ITEM_INDEX = (table('item_search', column('rowid'), column('name'), column('room'), column('notes')),
+               Item, ('name', 'room', 'notes'), ())
+_OPTION_INDEX = (table('option_search', column('rowid'), column('brand'), column('model_name'), column('store'),
+                       column('features'), column('notes'), column('item_id')),
+                 Option, ('brand', 'model_name', 'store', 'features', 'notes'), ('item_id',))
+
+_CHUNK = 500
+
+
+def _entries(spec, rows):
+    _, _, normalized, copied = spec
+    return [dict({'rowid': row[0]},
+                 **{name: normalize_text(value) for name, value in zip(normalized, row[1:])},
+                 **dict(zip(copied, row[1 + len(normalized):])))
+            for row in rows]
+
+
+def _source(spec):
+    _, model, normalized, copied = spec
+    return select(model.id, *(getattr(model, name) for name in normalized + copied))
+
+
+def _reindex(spec, ids):
+    ids = sorted(set(ids))
+    if not ids or not search_available():
+        return
+    index_table, model = spec[0], spec[1]
+    for start in range(0, len(ids), _CHUNK):
+        chunk = ids[start:start + _CHUNK]
+        db.session.execute(delete(index_table).where(index_table.c.rowid.in_(chunk)))
+        # Ids whose row is gone just drop out of the index
+        rows = db.session.execute(_source(spec).where(model.id.in_(chunk))).all()
+        if rows:
+            db.session.execute(insert(index_table), _entries(spec, rows))
+
+
+def reindex_items(item_ids):
+    """Bring the index entries of ``item_ids`` in line with their rows, in the current transaction"""
+    _reindex(_ITEM_INDEX, item_ids)
+
+
+def reindex_options(option_ids):
+    """Bring the index entries of ``option_ids`` in line with their rows, in the current transaction"""
+    _reindex(_OPTION_INDEX, option_ids)
+
+
+def create_search_index(connection):
+    """Create the search tables if missing, drop the legacy triggers and (re)fill them from the live rows"""
+    for trigger in LEGACY_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for statement in _SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    for spec in (_ITEM_INDEX, _OPTION_INDEX):
+        index_table = spec[0]
+        connection.execute(delete(index_table))
+        for rows in connection.execution_options(yield_per=2000).execute(_source(spec)).partitions():
+            connection.execute(insert(index_table), _entries(spec, rows))
+        connection.execute(text(f"INSERT INTO {index_table.name} ({index_table.name}) VALUES ('optimize')"))
+
+
+def search_available():
+    return db.engine.dialect.name == 'sqlite'
+
+
+# bm25 column weights: names and models count most, free-text notes least
+_ITEM_RANK = "bm25(item_search, 10.0, 3.0, 1.0)"
+_OPTION_RANK = "bm25(option_search, 8.0, 8.0, 3.0, 2.0, 1.0)"
+
+SEARCH_OPTION_SHAPE = OPTION_SHAPE.extend(
+    ('item_id', Option.item_id, None),
+    ('item_name', Item.name, None),
+)
+
+
+def search(query, kind='all', limit=20):
+    """
+    Ranked matches for ``query``: a list of {"type", "score", "item"|"option"}
+    dicts, best first. Scores are bm25 (lower is better) negated, so higher
+    scores rank first.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    hits = []
+    if kind in ('all', 'item'):
+        hits.extend(('item', rowid, rank) for rowid, rank in db.session.execute(text(
+            f"SELECT rowid, {_ITEM_RANK} AS rank FROM item_search "
+            "WHERE item_search MATCH :match ORDER BY rank LIMIT :limit"
+        ), {'match': expression, 'limit': limit}))
+    if kind in ('all', 'option'):
+        hits.extend(('option', rowid, rank) for rowid, rank in db.session.execute(text(
+            f"SELECT rowid, {_OPTION_RANK} AS rank FROM option_search "
+            "WHERE option_search MATCH :match ORDER BY rank LIMIT :limit"
+        ), {'match': expression, 'limit': limit}))
+    hits.sort(key=lambda hit: hit[2])
+    hits = hits[:limit]
+
+    item_ids = [rowid for hit_type, rowid, _ in hits if hit_type == 'item']
+    option_ids = [rowid for hit_type, rowid, _ in hits if hit_type == 'option']
+    items = {}
+    if item_ids:
+        items = {row.id: ITEM_SHAPE.from_row(row) for row in db.session.execute(
+            select(*ITEM_SHAPE.columns).where(Item.id.in_(item_ids)))}
+    options = {}
+    if option_ids:
+        options = {row.id: SEARCH_OPTION_SHAPE.from_row(row) for row in db.session.execute(
+            select(*SEARCH_OPTION_SHAPE.columns).join(Item, Item.id == Option.item_id).where(Option.id.in_(option_ids)))}
+
+    results = []
+    for hit_type, rowid, rank in hits:
+        found = (items if hit_type == 'item' else options).get(rowid)
+        if found is not None:
+            results.append({'type': hit_type, 'score': round(-rank, 4), hit_type: found})
+    return results
@@ -0,0 +1,92 @@
+"""
+Response shapes shared by the blueprints.
+
+Each shape is declared once as (key, column, converter) fields and compiled
+into two plain functions: ``from_row`` for column tuples returned by
+``select(*shape.columns)`` and ``from_object`` for ORM instances that are
+already loaded (e.g. right after an insert).
+"""
+
+from sqlalchemy import func, select
+from api.models import Item, Option
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class Shape:
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.keys = tuple(key for key, _, _ in self.fields)
+        self.columns = tuple(column for _, column, _ in self.fields)
+        self.from_row = self._compile('r[{index}]', 'r')
+        self.from_object = self._compile('o.{attr}', 'o')
+
+    def _compile(self, accessor, arg):
+        # Build the dict literal once so serializing a row is a single call with
+        # no per-field loop, getattr or isoformat lookups
+        namespace = {}
+        parts = []
+        for index, (key, column, converter) in enumerate(self.fields):
+            attr = getattr(column, 'key', key)
+            expression = accessor.format(index=index, attr=attr)
+            if converter is not None:
+                namespace[f'_c{index}'] = converter
+                expression = f'_c{index}({expression})'
+            parts.append(f'{key!r}: {expression}')
+        return eval(f"lambda {arg}: {{{', '.join(parts)}}}", namespace)
+
+    def extend(self, *fields):
+        """Return a new shape with extra (key, column, converter) fields appended"""
+        return Shape(self.fields + tuple(fields))
+
+    def many(self, rows):
+        from_row = self.from_row
+        return [from_row(row) for row in rows]
+
+
+OPTION_SHAPE = Shape([
+    ('id', Option.id, None),
+    ('brand', Option.brand, None),
+    ('model_name', Option.model_name, None),
+    ('price', Option.price, None),
+    ('store', Option.store, None),
+    ('link', Option.link, None),
+    ('features', Option.features, None),
+    ('rating', Option.rating, None),
+    ('warranty_months', Option.warranty_months, None),
+    ('available', Option.available, None),
+    ('notes', Option.notes, None),
+    ('selected', Option.selected, None),
+    ('last_checked', Option.last_checked, isoformat),
+])
+
+ITEM_SHAPE = Shape([
+    ('id', Item.id, None),
+    ('name', Item.name, None),
+    ('room', Item.room, None),
+    ('notes', Item.notes, None),
+    ('budget', Item.budget, None),
+    ('created_at', Item.created_at, isoformat),
+    ('category_id', Item.category_id, None),
+    ('subcategory_id', Item.subcategory_id, None),
+])
+
+RECENT_ITEM_SHAPE = Shape([
+    ('id', Item.id, None),
+    ('name', Item.name, None),
+    ('room', Item.room, None),
+    ('created_at', Item.created_at, isoformat),
+])
+
+# Correlated option count; evaluated only for the item rows actually returned
+OPTIONS_COUNT = (
+    select(func.count(Option.id))
+    .where(Option.item_id == Item.id)
+    .correlate(Item)
+    .scalar_subquery()
+    .label('options_count')
+)
+
+ITEM_LIST_SHAPE = ITEM_SHAPE.extend(('options_count', OPTIONS_COUNT, None))
@@ -0,0 +1,75 @@
+"""
+Pooled HTTP client for the static (no browser) parse tier.
+
+One ``requests`` session with a connection pool per host is shared by a small
+thread pool, so repeated fetches from the same store reuse keep-alive
+connections. Like the browser pool it lives in ``app.extensions`` and is
+created on first use, after any fork.
+"""
+
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from api.utils.browser_pool import DEFAULT_USER_AGENT
+
+_create_lock = threading.Lock()
+
+
+class PageTooLarge(ValueError):
+    """Raised when a page exceeds STATIC_MAX_BYTES"""
+
+
+class StaticFetcher:
+    def __init__(self, workers=8, timeout=10, max_bytes=3 * 1024 * 1024, user_agent=DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'fa-IR,fa;q=0.9,en;q=0.8',
+        })
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='static-fetch')
+
+    def fetch(self, url):
+        """Return the decoded HTML of ``url``; raises for HTTP errors and oversized pages"""
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            content = response.raw.read(self.max_bytes + 1, decode_content=True)
+            if len(content) > self.max_bytes:
+                raise PageTooLarge(f"Page is larger than {self.max_bytes} bytes")
+            # requests assumes ISO-8859-1 for text/* without a charset; product pages are UTF-8
+            declared = 'charset' in response.headers.get('Content-Type', '').lower()
+            encoding = response.encoding if declared else 'utf-8'
+            return content.decode(encoding or 'utf-8', errors='replace')
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+def get_static_fetcher(app=None):
+    """Return the app's static fetcher, creating it on first use"""
+    app = app or current_app._get_current_object()
+    fetcher = app.extensions.get('static_fetcher')
+    if fetcher is None:
+        with _create_lock:
+            fetcher = app.extensions.get('static_fetcher')
+            if fetcher is None:
+                fetcher = StaticFetcher(
+                    workers=app.config['STATIC_FETCH_WORKERS'],
+                    timeout=app.config['STATIC_FETCH_TIMEOUT'],
+                    max_bytes=app.config['STATIC_MAX_BYTES']
+                )
+                app.extensions['static_fetcher'] = fetcher
+                atexit.register(fetcher.close)
+    return fetcher
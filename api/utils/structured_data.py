@@ -0,0 +1,187 @@
+"""
+Product fields from the structured data embedded in raw HTML.
+
+Reads ``application/ld+json`` Product/Offer blocks first and OpenGraph /
+product meta tags second, in one pass of the stdlib HTML parser, so most
+product pages can be parsed without rendering them in a browser. Prices are
+returned in toman: rial prices are divided by 10, and prices in any other
+currency are dropped so the browser tier reads the page instead.
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+# Fields a parse needs before the browser tier can be skipped
+REQUIRED_FIELDS = ('model_name', 'price')
+
+# priceCurrency codes and how many of their units make one toman
+_UNITS_PER_TOMAN = {'IRT': 1, 'TOMAN': 1, 'IRR': 10}
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+
+class _StructuredDataParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.json_ld = []
+        self.meta = {}
+        self.title = None
+        self._buffer = None
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script':
+            attrs = dict(attrs)
+            if (attrs.get('type') or '').lower() == 'application/ld+json':
+                self._buffer = []
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            name = (attrs.get('property') or attrs.get('name') or attrs.get('itemprop') or '').lower()
+            if name and attrs.get('content') is not None:
+                self.meta.setdefault(name, attrs['content'].strip())
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+            self.title = ''
+
+    def handle_endtag(self, tag):
+        if tag == 'script' and self._buffer is not None:
+            self.json_ld.append(''.join(self._buffer))
+            self._buffer = None
+        elif tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._buffer is not None:
+            self._buffer.append(data)
+        elif self._in_title:
+            self.title += data
+
+
+def _nodes(value):
+    """Yield every JSON-LD object, descending into lists and @graph"""
+    if isinstance(value, list):
+        for entry in value:
+            yield from _nodes(entry)
+    elif isinstance(value, dict):
+        yield value
+        if '@graph' in value:
+            yield from _nodes(value['@graph'])
+
+
+def _is_type(node, name):
+    types = node.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.rsplit('/', 1)[-1].lower() == name for t in types)
+
+
+def _name(value):
+    if isinstance(value, dict):
+        value = value.get('name')
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def parse_price(value):
+    """Numeric price from a number or text such as "1,250,000" or "۱۲۵۰۰۰۰ تومان" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = value.translate(_DIGITS).replace(',', '').replace('٬', '').replace('٫', '.')
+    match = _NUMBER.search(text)
+    return float(match.group()) if match else None
+
+
+def _to_toman(price, currency):
+    """``price`` in toman, or None when ``currency`` is not one we can convert"""
+    if price is None:
+        return None
+    if not isinstance(currency, str) or not currency.strip():
+        # Iranian stores that leave the currency out quote toman
+        return price
+    units = _UNITS_PER_TOMAN.get(currency.strip().upper())
+    return price / units if units else None
+
+
+def _availability(value):
+    if not isinstance(value, str) or not value:
+        return None
+    value = value.rsplit('/', 1)[-1].lower().replace(' ', '')
+    if value in ('instock', 'limitedavailability', 'onlineonly', 'instoreonly', 'presale', 'preorder'):
+        return True
+    if value in ('outofstock', 'soldout', 'discontinued', 'oos'):
+        return False
+    return None
+
+
+def _from_json_ld(blocks):
+    for block in blocks:
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        for node in _nodes(data):
+            if not _is_type(node, 'product'):
+                continue
+            result = {
+                'model_name': _name(node.get('name')),
+                'brand': _name(node.get('brand')),
+            }
+            offers = node.get('offers')
+            offers = offers if isinstance(offers, list) else [offers]
+            for offer in offers:
+                if not isinstance(offer, dict):
+                    continue
+                price = parse_price(offer.get('price', offer.get('lowPrice')))
+                if price is None and isinstance(offer.get('priceSpecification'), dict):
+                    price = parse_price(offer['priceSpecification'].get('price'))
+                price = _to_toman(price, offer.get('priceCurrency'))
+                if price is None:
+                    continue
+                result['price'] = price
+                result['currency'] = 'IRT'
+                result['available'] = _availability(offer.get('availability'))
+                result['store'] = _name(offer.get('seller'))
+                break
+            rating = node.get('aggregateRating')
+            if isinstance(rating, dict):
+                result['rating'] = parse_price(rating.get('ratingValue'))
+            return {key: value for key, value in result.items() if value is not None}
+    return {}
+
+
+def _from_meta(meta, title):
+    price = _to_toman(
+        parse_price(meta.get('product:price:amount') or meta.get('og:price:amount') or meta.get('price')),
+        meta.get('product:price:currency') or meta.get('og:price:currency') or meta.get('pricecurrency'),
+    )
+    result = {
+        'model_name': meta.get('og:title') or meta.get('twitter:title') or (title.strip() if title else None),
+        'brand': meta.get('product:brand') or meta.get('og:brand'),
+        'price': price,
+        'currency': 'IRT' if price is not None else None,
+        'available': _availability(meta.get('product:availability') or meta.get('og:availability')),
+        'store': meta.get('og:site_name'),
+    }
+    return {key: value for key, value in result.items() if value not in (None, '')}
+
+
+def extract_structured(html):
+    """
+    Return brand, model_name, price (in toman, with currency "IRT"),
+    available, store and rating found in the page's structured data;
+    JSON-LD wins over meta tags.
+    """
+    parser = _StructuredDataParser()
+    parser.feed(html)
+    parser.close()
+    result = _from_meta(parser.meta, parser.title)
+    result.update(_from_json_ld(parser.json_ld))
+    return result
+
+
+def is_complete(result, required=REQUIRED_FIELDS):
+    return all(result.get(field) not in (None, '') for field in required)
@@ -0,0 +1,182 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from sqlalchemy import and_, case, func
+from api.app_factory import db
+from api.models import Item, Option, DashboardSummary
+
+# What a single item contributes to the dashboard totals
+ItemContribution = namedtuple(
+    'ItemContribution',
+    ['category_id', 'total_items', 'items_with_choice', 'total_selected_cost', 'total_budget']
+)
+
+SUMMARY_FIELDS = ('total_items', 'items_with_choice', 'total_selected_cost', 'total_budget')
+
+
+def snapshot_item(item_id):
+    """Return the current ItemContribution of an item, or None if it does not exist"""
+    if item_id is None:
+        return None
+    row = (
+        db.session.query(
+            Item.category_id,
+            Item.budget,
+            func.count(Option.id),
+            func.sum(Option.price)
+        )
+        .outerjoin(Option, and_(Option.item_id == Item.id, Option.selected == True))
+        .filter(Item.id == item_id)
+        .group_by(Item.id)
+        .first()
+    )
+    if row is None:
+        return None
+    category_id, budget, selected_count, selected_cost = row
+    return ItemContribution(
+        category_id=category_id,
+        total_items=1,
+        items_with_choice=1 if selected_count else 0,
+        total_selected_cost=selected_cost or 0,
+        total_budget=budget or 0
+    )
+
+
+def _add_to_row(key, category_id, deltas):
+    updated = (
+        DashboardSummary.query
+        .filter(DashboardSummary.key == key)
+        .update({getattr(DashboardSummary, field): getattr(DashboardSummary, field) + value
+                 for field, value in deltas.items()}, synchronize_session=False)
+    )
+    if not updated:
+        db.session.add(DashboardSummary(key=key, category_id=category_id, **dict(
+            {field: 0 for field in SUMMARY_FIELDS}, **deltas)))
+        db.session.flush()
+
+
+def _apply(contribution, sign):
+    deltas = {field: sign * getattr(contribution, field) for field in SUMMARY_FIELDS}
+    _add_to_row(DashboardSummary.TOTAL_KEY, None, deltas)
+    _add_to_row(DashboardSummary.category_key(contribution.category_id), contribution.category_id, deltas)
+
+
+def apply_summary_deltas(deltas):
+    """Add per-category {category_id: {field: delta}} to the category rows and the total in one pass"""
+    total = dict.fromkeys(SUMMARY_FIELDS, 0)
+    for category_id, values in deltas.items():
+        _add_to_row(DashboardSummary.category_key(category_id), category_id, values)
+        for field, value in values.items():
+            total[field] += value
+    if deltas:
+        _add_to_row(DashboardSummary.TOTAL_KEY, None, total)
+
+
+def apply_item_change(before, after):
+    """Move the summary rows from an item's old contribution to its new one"""
+    if before == after:
+        return
+    if before is not None:
+        _apply(before, -1)
+    if after is not None:
+        _apply(after, 1)
+
+
+@contextmanager
+def track_item(item_id):
+    """
+    Keep the summary in step with changes made to an item or its options
+    inside the ``with`` block. The caller still owns the commit, so the
+    summary update lands in the same transaction as the change itself.
+    """
+    before = snapshot_item(item_id)
+    yield
+    db.session.flush()
+    apply_item_change(before, snapshot_item(item_id))
+
+
+def compute_summary():
+    """Recompute the totals from the live tables, keyed like DashboardSummary rows"""
+    selected = (
+        db.session.query(
+            Option.item_id.label('item_id'),
+            func.sum(Option.price).label('selected_cost')
+        )
+        .filter(Option.selected == True)
+        .group_by(Option.item_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            Item.category_id,
+            func.count(Item.id),
+            func.sum(case((selected.c.item_id.isnot(None), 1), else_=0)),
+            func.sum(selected.c.selected_cost),
+            func.sum(Item.budget)
+        )
+        .outerjoin(selected, selected.c.item_id == Item.id)
+        .group_by(Item.category_id)
+        .all()
+    )
+    summary = {DashboardSummary.TOTAL_KEY: dict({field: 0 for field in SUMMARY_FIELDS}, category_id=None)}
+    for category_id, total_items, items_with_choice, selected_cost, budget in rows:
+        values = {
+            'total_items': total_items or 0,
+            'items_with_choice': items_with_choice or 0,
+            'total_selected_cost': selected_cost or 0,
+            'total_budget': budget or 0
+        }
+        summary[DashboardSummary.category_key(category_id)] = dict(values, category_id=category_id)
+        for field in SUMMARY_FIELDS:
+            summary[DashboardSummary.TOTAL_KEY][field] += values[field]
+    return summary
+
+
+def rebuild_summary():
+    """Replace every summary row with totals recomputed from scratch (caller commits)"""
+    DashboardSummary.query.delete()
+    for key, values in compute_summary().items():
+        db.session.add(DashboardSummary(key=key, **values))
+    db.session.flush()
+
+
+def check_summary(tolerance=0.01):
+    """
+    Compare the stored summary against live aggregates.
+
+    Returns a list of (key, field, stored, expected) tuples for every mismatch.
+    """
+    expected = compute_summary()
+    stored = {row.key: row for row in DashboardSummary.query.all()}
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        expected_values = expected.get(key, {})
+        row = stored.get(key)
+        for field in SUMMARY_FIELDS:
+            expected_value = expected_values.get(field, 0)
+            stored_value = getattr(row, field) if row is not None else 0
+            if abs((stored_value or 0) - expected_value) > tolerance:
+                mismatches.append((key, field, stored_value, expected_value))
+    return mismatches
+
+
+def read_summary():
+    """Return the overall dashboard totals, rebuilding the table the first time it is empty"""
+    total = db.session.get(DashboardSummary, DashboardSummary.TOTAL_KEY, populate_existing=True)
+    if total is None:
+        rebuild_summary()
+        db.session.commit()
+        total = db.session.get(DashboardSummary, DashboardSummary.TOTAL_KEY)
+    return total
+
+
+def dashboard_totals():
+    """The overall totals as the dashboard reports them"""
+    summary = read_summary()
+    total_items = summary.total_items
+    return {
+        'total_items': total_items,
+        'items_with_choice': summary.items_with_choice,
+        'completion': int((summary.items_with_choice / total_items) * 100) if total_items else 0,
+        'total_selected_cost': summary.total_selected_cost,
+        'total_budget': summary.total_budget
+    }
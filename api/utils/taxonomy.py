@@ -0,0 +1,134 @@
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import func, select
+from api.app_factory import db
+from api.models import Category, Subcategory, Item
+from api.utils.versioning import GLOBAL_SCOPE, TAXONOMY_SCOPE, current_versions
+
+# Immutable view of the category tree. Rebuilt only when the taxonomy version
+# changes, so lookups by name never touch the database.
+TaxonomyIndex = namedtuple('TaxonomyIndex', [
+    'version',
+    'categories',             # tuple of (id, name, ((sub_id, sub_name), ...)) ordered by name
+    'category_ids',           # {category name: id}
+    'subcategory_ids',        # {(category id, subcategory name): id}
+    'subcategory_ids_by_name' # {subcategory name: (id, ...)} - names repeat across categories
+])
+
+# Serialized taxonomy payload with per-node item counts, keyed by (taxonomy, global) versions
+TaxonomySnapshot = namedtuple('TaxonomySnapshot', ['versions', 'body'])
+
+
+def _state():
+    # Kept per application so separate apps (and databases) never share snapshots
+    return current_app.extensions.setdefault('taxonomy', {
+        'lock': threading.Lock(),
+        'index': None,
+        'snapshot': None
+    })
+
+
+def _build_index(version):
+    categories = db.session.execute(
+        select(Category.id, Category.name).order_by(Category.name)
+    ).all()
+    subcategories = db.session.execute(
+        select(Subcategory.id, Subcategory.name, Subcategory.category_id).order_by(Subcategory.id)
+    ).all()
+
+    children = {category_id: [] for category_id, _ in categories}
+    subcategory_ids = {}
+    by_name = {}
+    for sub_id, sub_name, category_id in subcategories:
+        children.setdefault(category_id, []).append((sub_id, sub_name))
+        subcategory_ids[(category_id, sub_name)] = sub_id
+        by_name.setdefault(sub_name, []).append(sub_id)
+
+    return TaxonomyIndex(
+        version=version,
+        categories=tuple((cat_id, name, tuple(children[cat_id])) for cat_id, name in categories),
+        category_ids=MappingProxyType({name: cat_id for cat_id, name in categories}),
+        subcategory_ids=MappingProxyType(subcategory_ids),
+        subcategory_ids_by_name=MappingProxyType({name: tuple(ids) for name, ids in by_name.items()})
+    )
+
+
+def get_index():
+    """
+    Return the current TaxonomyIndex. Taxonomy writes bump the taxonomy
+    version, which invalidates the snapshot in every process on its next read.
+    """
+    state = _state()
+    version = current_versions(TAXONOMY_SCOPE)[TAXONOMY_SCOPE]
+    index = state['index']
+    if index is None or index.version != version:
+        with state['lock']:
+            if state['index'] is None or state['index'].version != version:
+                state['index'] = _build_index(version)
+            index = state['index']
+    return index
+
+
+def resolve_filters(category_name=None, subcategory_name=None, index=None):
+    """
+    Resolve dashboard filter names to ids through the in-memory index.
+
+    Returns (category_id, subcategory_ids). A subcategory name is looked up
+    under its parent category when one is given; otherwise every subcategory
+    with that name matches. Unknown names resolve to None, which callers treat
+    as "no filter", as before.
+    """
+    index = index or get_index()
+    category_id = index.category_ids.get(category_name) if category_name else None
+    subcategory_ids = None
+    if subcategory_name:
+        if category_id is not None:
+            sub_id = index.subcategory_ids.get((category_id, subcategory_name))
+            subcategory_ids = (sub_id,) if sub_id is not None else None
+        else:
+            subcategory_ids = index.subcategory_ids_by_name.get(subcategory_name)
+    return category_id, subcategory_ids
+
+
+def get_taxonomy():
+    """Return the serialized taxonomy payload (categories, subcategories and item counts)"""
+    state = _state()
+    versions = current_versions(TAXONOMY_SCOPE, GLOBAL_SCOPE)
+    key = (versions[TAXONOMY_SCOPE], versions[GLOBAL_SCOPE])
+    snapshot = state['snapshot']
+    if snapshot is not None and snapshot.versions == key:
+        return snapshot.body
+
+    index = get_index()
+    category_counts = {}
+    subcategory_counts = {}
+    counts = db.session.execute(
+        select(Item.category_id, Item.subcategory_id, func.count(Item.id))
+        .group_by(Item.category_id, Item.subcategory_id)
+    ).all()
+    for category_id, subcategory_id, count in counts:
+        category_counts[category_id] = category_counts.get(category_id, 0) + count
+        if subcategory_id is not None:
+            subcategory_counts[subcategory_id] = subcategory_counts.get(subcategory_id, 0) + count
+
+    payload = {
+        'version': f'{key[0]}.{key[1]}',
+        'categories': [
+            {
+                'id': cat_id,
+                'name': name,
+                'item_count': category_counts.get(cat_id, 0),
+                'subcategories': [
+                    {'id': sub_id, 'name': sub_name, 'item_count': subcategory_counts.get(sub_id, 0)}
+                    for sub_id, sub_name in subcategories
+                ]
+            }
+            for cat_id, name, subcategories in index.categories
+        ],
+        'uncategorized_count': category_counts.get(None, 0)
+    }
+    snapshot = TaxonomySnapshot(versions=key, body=current_app.json.dumps(payload))
+    state['snapshot'] = snapshot
+    return snapshot.body
@@ -1,71 +1,178 @@
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import re
+import time
+from concurrent.futures import Future
 from urllib.parse import urlparse
 from flask import current_app
+from api.utils.browser_pool import get_browser_pool
+from api.utils.navigation import load_full, load_lean
+from api.utils.page_archive import archive_page
+from api.utils.parse_stats import record_parse
+from api.utils.static_fetcher import get_static_fetcher
+from api.utils.structured_data import extract_structured, is_complete
 
 
-def parse_product_url(url):
+def url_domain(url):
+    """Return the lower-cased host of a product URL, raising ValueError if it is not absolute"""
+    parsed_url = urlparse(url)
+    if not parsed_url.scheme or not parsed_url.netloc:
+        raise ValueError("Invalid URL format")
+    return parsed_url.netloc.lower()
+
+
+# Store names for the sites with dedicated browser parsers
+STORE_NAMES = {'digikala': 'Digikala', 'amazon': 'Amazon', 'torob': 'Torob'}
+
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _store_name(domain):
+    for key, name in STORE_NAMES.items():
+        if key in domain:
+            return name
+    return None
+
+
+def _site_profile(domain):
+    """(parser, selectors the parser reads) for a domain; lean navigation waits for the selectors"""
+    for key in STORE_NAMES:
+        if key in domain:
+            return SITE_PROFILES[key]
+    # Generic parsing for unknown sites
+    return SITE_PROFILES['generic']
+
+
+def _submit_browser(url, domain, profile=None):
+    """Queue a rendered parse on the app's browser pool, with the domain's profile unless one is given"""
+    config = current_app.config
+    mode = 'lean' if config['BROWSER_LEAN_MODE'] else 'full'
+    parser, selectors = profile or _site_profile(domain)
+
+    def load_and_parse(page, timings):
+        began = time.perf_counter()
+        timings['mode'] = mode
+        if mode == 'lean':
+            load_lean(page, url, selectors, config, timings)
+        else:
+            load_full(page, url, timings)
+
+        started = time.perf_counter()
+        # Site-specific parsing logic
+        result = parser(page)
+        timings['extract_ms'] = _ms(started)
+        if config['PAGE_ARCHIVE_ENABLED']:
+            archive_page(url, page.content(), 'browser', result)
+        record_parse(domain, mode, dict(timings, total_ms=_ms(began)))
+
+        # Add URL to result
+        result['link'] = url
+        return result
+
+    # Pages are served by the app's long-lived browser pool, each in a fresh context
+    return get_browser_pool().submit(load_and_parse)
+
+
+def _parse_static(url, domain):
+    """Fetch raw HTML and read its structured data; returns (result, timings)"""
+    fetcher = get_static_fetcher()
+    timings = {}
+    started = time.perf_counter()
+    html = fetcher.fetch(url)
+    timings['fetch_ms'] = _ms(started)
+    started = time.perf_counter()
+    result = extract_structured(html)
+    timings['extract_ms'] = _ms(started)
+    archive_page(url, html, 'static', result)
+    store = _store_name(domain)
+    if store:
+        result['store'] = store
+    return result, timings
+
+
+def submit_product_url(url):
+    """
+    Start a tiered parse without waiting for it.
+
+    The static tier fetches the raw HTML and reads JSON-LD / OpenGraph data;
+    the page is only rendered in the browser pool when that leaves required
+    fields (name, price) missing. Returns a Future resolving to
+    (result, timings), where timings['tier'] is 'static' or 'browser'.
+    Raises ValueError for malformed URLs.
+    """
+    # Extract domain for site-specific parsing
+    domain = url_domain(url)
+    if not current_app.config['STATIC_TIER_ENABLED']:
+        return _submit_browser(url, domain)
+
+    app = current_app._get_current_object()
+    outer = Future()
+    outer.set_running_or_notify_cancel()
+
+    def fall_back(static_result, static_timings):
+        def finished(future):
+            try:
+                result, timings = future.result()
+            except Exception as ex:
+                outer.set_exception(ex)
+                return
+            # The rendered page wins; structured data fills whatever it missed
+            for field, value in static_result.items():
+                if result.get(field) in (None, ''):
+                    result[field] = value
+            timings['static_ms'] = static_timings.get('total_ms')
+            timings['tier'] = 'browser'
+            outer.set_result((result, timings))
+
+        _submit_browser(url, domain).add_done_callback(finished)
+
+    def static_tier():
+        with app.app_context():
+            started = time.perf_counter()
+            try:
+                result, timings = _parse_static(url, domain)
+            except Exception as ex:
+                app.logger.info(f"Static tier failed for {url}: {ex}")
+                result, timings = {}, {}
+            timings['total_ms'] = _ms(started)
+            try:
+                if is_complete(result):
+                    record_parse(domain, 'static', timings)
+                    result['link'] = url
+                    timings['tier'] = 'static'
+                    outer.set_result((result, timings))
+                else:
+                    fall_back(result, timings)
+            except Exception as ex:
+                outer.set_exception(ex)
+
+    get_static_fetcher().submit(static_tier)
+    return outer
+
+
+def parse_product_url(url, timings=None, force_refresh=False):
     """
     Parse product information from a URL
     
+    Results are served from the parse cache when a fresh (or revalidating)
+    entry exists for the canonical URL.
+    
     Args:
         url (str): The product URL to parse
+        timings (dict, optional): Filled with the tier that satisfied the
+            parse, its phase timings in milliseconds and the cache status
+        force_refresh (bool): Ignore any cached result and parse the page again
         
     Returns:
         dict: Parsed product information
     """
+    from api.utils.parse_cache import submit_cached_parse
     try:
-        # Validate URL format
-        parsed_url = urlparse(url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            raise ValueError("Invalid URL format")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
-        }
-
-        # Initialize result dictionary
-        result = {
-            'brand': None,
-            'model_name': None,
-            'price': None,
-            'store': None,
-            'features': None,
-            'rating': None,
-            'warranty_months': None
-        }
-        
-        # Extract domain for site-specific parsing
-        domain = parsed_url.netloc.lower()
-        
-        # Use Playwright to load and parse the page
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(user_agent=headers['User-Agent'])
-            page = context.new_page()
-            try:
-                page.goto(url, wait_until='domcontentloaded', timeout=15000)
-                try:
-                    page.wait_for_load_state('networkidle', timeout=15000)
-                except PlaywrightTimeoutError:
-                    pass
-
-                # Site-specific parsing logic
-                if 'digikala' in domain:
-                    result = _parse_digikala(page)
-                elif 'amazon' in domain:
-                    result = _parse_amazon(page)
-                elif 'torob' in domain:
-                    result = _parse_torob(page)
-                else:
-                    # Generic parsing for unknown sites
-                    result = _parse_generic(page)
-            finally:
-                context.close()
-                browser.close()
-
-        # Add URL to result
-        result['link'] = url
-        
+        future = submit_cached_parse(url, force_refresh=force_refresh)
+        result, job_timings = future.result(timeout=current_app.config['PARSE_TIMEOUT'])
+        if timings is not None:
+            timings.update(job_timings)
+        current_app.logger.info(f"Parsed {url_domain(url)} in {job_timings}")
         return result
         
     except Exception as e:
@@ -189,11 +296,19 @@ def _parse_generic(page):
     
     return result
 
+# Browser-tier parser name -> (parser, selectors the parser reads)
+SITE_PROFILES = {
+    'digikala': (_parse_digikala, ('h1[data-testid="pdp-title"]', 'div[data-testid="buy-box"] span[data-testid^="price"]')),
+    'amazon': (_parse_amazon, ('#productTitle',)),
+    'torob': (_parse_torob, ('div.Showcase_name__hrttI', 'div#cheapest-seller')),
+    'generic': (_parse_generic, ('h1',)),
+}
+
 def _safe_inner_text(page, selector):
     try:
         locator = page.locator(selector).first
         if locator and locator.count() > 0:
-            return locator.inner_text(timeout=2000)
+            return locator.inner_text(timeout=current_app.config['BROWSER_SELECTOR_TIMEOUT_MS'])
         return None
     except Exception:
         return None
@@ -0,0 +1,91 @@
+from functools import wraps
+from flask import make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from api.app_factory import db
+from api.models import DataVersion
+
+GLOBAL_SCOPE = 'global'
+TAXONOMY_SCOPE = 'taxonomy'
+
+
+def item_scope(item_id):
+    return f'item:{item_id}'
+
+
+def bump_versions(*scopes):
+    """
+    Increment the given version counters (plus the global one) in the current
+    transaction. The global versions the transaction moves between are kept
+    in ``session.info['global_version']`` as (before, after) until it ends,
+    so in-process caches can tell their own writes from everyone else's.
+    """
+    for scope in {GLOBAL_SCOPE, *scopes}:
+        version = db.session.execute(
+            update(DataVersion)
+            .where(DataVersion.scope == scope)
+            .values(version=DataVersion.version + 1)
+            .returning(DataVersion.version)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if version is None:
+            db.session.add(DataVersion(scope=scope, version=1))
+            version = 1
+        if scope == GLOBAL_SCOPE:
+            before, _ = db.session.info.get('global_version', (version - 1, None))
+            db.session.info['global_version'] = (before, version)
+    db.session.flush()
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _forget_global_version(session):
+    session.info.pop('global_version', None)
+
+
+def bump_item_version(item_id):
+    bump_versions(item_scope(item_id))
+
+
+def bump_taxonomy_version():
+    bump_versions(TAXONOMY_SCOPE)
+
+
+def current_versions(*scopes):
+    """Return {scope: version} with one primary-key lookup; unknown scopes are 0"""
+    rows = db.session.execute(
+        select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))
+    ).all()
+    versions = dict.fromkeys(scopes, 0)
+    versions.update(rows)
+    return versions
+
+
+def conditional_get(scopes_for, cache_control='no-cache'):
+    """
+    Serve a GET endpoint with an ETag derived from data version counters.
+
+    ``scopes_for`` receives the view arguments and returns the scopes whose
+    versions identify the response. A matching ``If-None-Match`` is answered
+    with 304 before the view (and its ORM queries) runs. ``cache_control`` is
+    a header value or a callable returning one; the default lets browsers keep
+    the body but revalidate it on every use.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            versions = current_versions(*scopes_for(**kwargs))
+            etag = '-'.join(f'{scope}.{version}' for scope, version in sorted(versions.items()))
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = cache_control() if callable(cache_control) else cache_control
+            return response
+        return wrapper
+    return decorator
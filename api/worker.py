@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Background worker for the job queue
+Starts N worker processes; each builds its own app, database pool and
+headless browser, then claims and runs queued jobs (URL parses, price
+refreshes) until it receives SIGINT/SIGTERM
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def run_loop(app, worker_id, kinds, poll, once, stopping):
+    """
+    Claim and run jobs until ``stopping`` is set (or, with once, until the
+    queue is idle). A failed iteration, such as "database is locked" under
+    write contention, is logged and rolled back and retried after ``poll``
+    seconds instead of ending the worker.
+    """
+    from api.app_factory import db
+    from api.utils.jobs import run_next_job
+    from api.utils.price_refresh import schedule_refresh
+
+    interval = app.config['PRICE_REFRESH_INTERVAL']
+    next_refresh = time.monotonic()
+    while not stopping:
+        try:
+            if interval and not once and time.monotonic() >= next_refresh:
+                # Every worker tries; schedule_refresh only starts a run when none is active
+                next_refresh = time.monotonic() + interval
+                job_id = schedule_refresh()
+                if job_id is not None:
+                    print(f"[{worker_id}] scheduled price refresh job {job_id}")
+            ran = run_next_job(worker_id, kinds)
+        except Exception:
+            app.logger.exception(f"[{worker_id}] job loop iteration failed; retrying in {poll}s")
+            db.session.rollback()
+            time.sleep(poll)
+            continue
+        if ran is None:
+            if once:
+                break
+            time.sleep(poll)
+            continue
+        job_id, status = ran
+        print(f"[{worker_id}] job {job_id}: {status}")
+
+def work(index, kinds, poll, once):
+    """Worker process body: claim and run jobs until stopped (or, with once, until the queue is idle)"""
+    from api.app_factory import create_app
+    from api.utils.browser_pool import warm_browser_pool
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+
+    app = create_app()
+    app.config['BROWSER_POOL_SIZE'] = app.config['WORKER_BROWSER_POOL_SIZE']
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    with app.app_context():
+        if not once:
+            warm_browser_pool(app)
+        print(f"[{worker_id}] waiting for jobs")
+        try:
+            run_loop(app, worker_id, kinds, poll, once, stopping)
+        finally:
+            pool = app.extensions.get('browser_pool')
+            if pool is not None:
+                pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--processes', type=int, default=None,
+                        help='worker processes to start (default: WORKER_PROCESSES)')
+    parser.add_argument('--kinds', default=None,
+                        help='comma-separated job kinds to run (default: all)')
+    parser.add_argument('--poll', type=float, default=None,
+                        help='seconds to sleep when the queue is empty (default: WORKER_POLL_SECONDS)')
+    parser.add_argument('--once', action='store_true',
+                        help='drain the due jobs and exit instead of polling forever')
+    args = parser.parse_args()
+
+    from api.config import Config
+    processes = args.processes or Config.WORKER_PROCESSES
+    poll = args.poll if args.poll is not None else Config.WORKER_POLL_SECONDS
+    kinds = [kind.strip() for kind in args.kinds.split(',')] if args.kinds else None
+
+    if processes == 1:
+        work(0, kinds, poll, args.once)
+        return 0
+
+    # Spawn rather than fork: every worker starts its own Playwright driver and threads
+    context = multiprocessing.get_context('spawn')
+    children = [context.Process(target=work, args=(index, kinds, poll, args.once), name=f'worker-{index}')
+                for index in range(processes)]
+    for child in children:
+        child.start()
+
+    def stop(*args):
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        stop()
+        for child in children:
+            child.join()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
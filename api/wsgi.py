@@ -0,0 +1,17 @@
+"""
+WSGI entry point for production servers
+
+The application is created once at import time; with ``preload_app`` the
+gunicorn master imports this module before forking, so workers start with the
+app (and its blueprints, models and caches) already built.
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import from api package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.app_factory import create_app
+
+app = create_app()
@@ -8,6 +8,7 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import { Textarea } from '@/components/ui/textarea';
 import { Separator } from '@/components/ui/separator';
+import SuggestionList from './SuggestionList';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, ScatterChart, Scatter, LineChart, Line } from 'recharts';
 
@@ -392,7 +393,10 @@ const ItemDetail = () => {
                     name="room"
                     value={itemFormData.room}
                     onChange={handleItemInputChange}
+                    list="room-suggestions"
+                    autoComplete="off"
                   />
+                  <SuggestionList id="room-suggestions" field="room" query={itemFormData.room} />
                 </div>
                 <div className="space-y-2">
                   <Label htmlFor="budget">بودجه (تومان)</Label>
@@ -536,7 +540,10 @@ const ItemDetail = () => {
                         value={optionFormData.brand}
                         onChange={handleOptionInputChange}
                         required
+                        list="new-brand-suggestions"
+                        autoComplete="off"
                       />
+                      <SuggestionList id="new-brand-suggestions" field="brand" query={optionFormData.brand} />
                     </div>
                     <div className="space-y-2">
                       <Label htmlFor="model_name">نام مدل *</Label>
@@ -565,7 +572,10 @@ const ItemDetail = () => {
                         name="store"
                         value={optionFormData.store}
                         onChange={handleOptionInputChange}
+                        list="new-store-suggestions"
+                        autoComplete="off"
                       />
+                      <SuggestionList id="new-store-suggestions" field="store" query={optionFormData.store} />
                     </div>
                     <div className="space-y-2">
                     </div>
@@ -668,7 +678,10 @@ const ItemDetail = () => {
                         value={optionFormData.brand}
                         onChange={handleOptionInputChange}
                         required
+                        list="edit-brand-suggestions"
+                        autoComplete="off"
                       />
+                      <SuggestionList id="edit-brand-suggestions" field="brand" query={optionFormData.brand} />
                     </div>
                     <div className="space-y-2">
                       <Label htmlFor="model_name">نام مدل *</Label>
@@ -697,7 +710,10 @@ const ItemDetail = () => {
                         name="store"
                         value={optionFormData.store}
                         onChange={handleOptionInputChange}
+                        list="edit-store-suggestions"
+                        autoComplete="off"
                       />
+                      <SuggestionList id="edit-store-suggestions" field="store" query={optionFormData.store} />
                     </div>
                     <div className="space-y-2">
                     </div>
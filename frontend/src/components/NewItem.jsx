@@ -8,6 +8,7 @@ import { Label } from '@/components/ui/label';
 import { Textarea } from '@/components/ui/textarea';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Separator } from '@/components/ui/separator';
+import SuggestionList from './SuggestionList';
 
 const NewItem = () => {
   const navigate = useNavigate();
@@ -31,7 +32,7 @@ const NewItem = () => {
 
   const fetchCategories = async () => {
     try {
-      const response = await axios.get('/api/dashboard');
+      const response = await axios.get('/api/taxonomy');
       setCategories(response.data.categories);
     } catch (err) {
       setError('خطا در دریافت دسته‌بندی‌ها');
@@ -39,19 +40,10 @@ const NewItem = () => {
     }
   };
 
-  const fetchSubcategories = async (categoryId) => {
-    if (!categoryId) {
-      setSubcategories([]);
-      return;
-    }
-    
-    try {
-      const response = await axios.get(`/api/subcategories/${categoryId}`);
-      setSubcategories(response.data.subcategories);
-    } catch (err) {
-      setError('خطا در دریافت زیردسته‌ها');
-      console.error('Subcategories fetch error:', err);
-    }
+  const fetchSubcategories = (categoryId) => {
+    // The taxonomy payload already carries every category's subcategories
+    const category = categories.find(cat => cat.id === categoryId);
+    setSubcategories(category ? category.subcategories : []);
   };
 
   const handleInputChange = (name, value) => {
@@ -125,7 +117,10 @@ const NewItem = () => {
                 value={formData.room}
                 onChange={(e) => handleInputChange('room', e.target.value)}
                 placeholder="مثال: آشپزخانه، پذیرایی"
+                list="room-suggestions"
+                autoComplete="off"
               />
+              <SuggestionList id="room-suggestions" field="room" query={formData.room} />
             </div>
 
             <div className="space-y-2">
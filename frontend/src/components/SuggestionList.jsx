@@ -0,0 +1,32 @@
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+
+// <datalist> of earlier brand / store / room values matching what has been typed,
+// so the same store is not saved under a new spelling every time
+const SuggestionList = ({ id, field, query }) => {
+  const [suggestions, setSuggestions] = useState([]);
+
+  useEffect(() => {
+    let cancelled = false;
+    axios.get(`/api/autocomplete/${field}`, { params: { q: query || '' } })
+      .then((response) => {
+        if (!cancelled) setSuggestions(response.data.suggestions || []);
+      })
+      .catch(() => {
+        if (!cancelled) setSuggestions([]);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [field, query]);
+
+  return (
+    <datalist id={id}>
+      {suggestions.map((suggestion) => (
+        <option key={suggestion.value} value={suggestion.value} />
+      ))}
+    </datalist>
+  );
+};
+
+export default SuggestionList;
@@ -3,7 +3,7 @@ echo Starting Home Shopping Application...
 echo.
 
 echo Starting Flask API Server...
-start "Flask API" cmd /k "cd api && python app.py"
+start "Flask API" cmd /k "cd api && python app.py --dev"
 
 echo Waiting for API server to start...
 timeout /t 5 /nobreak > nul
@@ -5,7 +5,7 @@ echo
 
 echo "Starting Flask API Server..."
 cd api
-python app.py &
+python app.py --dev &
 API_PID=$!
 cd ..
 